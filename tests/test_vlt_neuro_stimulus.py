@@ -31,6 +31,18 @@ class TestStimIds2Reps(unittest.TestCase):
         np.testing.assert_array_equal(reps, [1, 1, 1, 2, 2])
         self.assertTrue(isregular)
 
+    def test_long_sequence(self):
+        rng = np.random.default_rng(0)
+        numstims = 20
+        stimids = np.concatenate([rng.permutation(numstims) + 1 for _ in range(5000)])[:-7]
+        reps, isregular = stimids2reps(stimids, numstims)
+        self.assertTrue(isregular)
+        self.assertEqual(reps[-1], 5000)
+
+        stimids[12345] = stimids[12346]
+        reps, isregular = stimids2reps(stimids, numstims)
+        self.assertFalse(isregular)
+
 class TestFindControlStimulus(unittest.TestCase):
     def test_regular(self):
         stimid = [1, 2, 3, 1, 2, 3, 1, 2, 3, 1, 2, 3, 1, 2, 3]
@@ -0,0 +1,89 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from vlt.cache.diskcache import DiskCache
+from vlt.cache.memoize import memoize
+
+calls = []
+
+def slow_square(x, scale=1):
+    calls.append(1)
+    return np.asarray(x) ** 2 * scale
+
+def square_in_process(args):
+    filename, x = args
+    f = memoize(slow_square, store=DiskCache(filename))
+    return float(f(x))
+
+class TestMemoize(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.dir.name, 'cache.sqlite')
+        calls.clear()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_hits_and_misses(self):
+        f = memoize(slow_square, store=DiskCache(self.filename))
+        np.testing.assert_array_equal(f(np.arange(3)), [0, 1, 4])
+        np.testing.assert_array_equal(f(np.arange(3)), [0, 1, 4])
+        f(np.arange(3), scale=2)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual((f.store.hits, f.store.misses), (1, 2))
+
+        # a new store on the same file sees the stored results
+        g = memoize(slow_square, store=DiskCache(self.filename))
+        g(np.arange(3), scale=2)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(g.store.stats()['hits'], 2)
+
+    def test_decorator(self):
+        @memoize(store=DiskCache(self.filename))
+        def add(a, b):
+            calls.append(1)
+            return a + b
+        self.assertEqual(add(1, 2), 3)
+        self.assertEqual(add(1, 2), 3)
+        self.assertEqual(len(calls), 1)
+
+    def test_lru_eviction(self):
+        store = DiskCache(self.filename, max_bytes=3000)
+        for k in range(5):
+            store.set(str(k), np.zeros(100)) # about 900 bytes each
+            store.get('0') # keep entry 0 recently used
+        self.assertTrue(store.get('0')[0])
+        self.assertFalse(store.get('1')[0])
+        self.assertTrue(store.get('4')[0])
+        self.assertLessEqual(store.stats()['bytes'], 3000)
+
+    def test_lookups_are_read_only(self):
+        store = DiskCache(self.filename)
+        store.set('a', 1)
+        for k in range(10):
+            store.get('a')
+            store.get('b')
+        con = sqlite3.connect(self.filename)
+        counters = dict(con.execute("SELECT name, value FROM counters").fetchall())
+        self.assertEqual(counters, {'hits': 0, 'misses': 0})
+        self.assertEqual((store.hits, store.misses), (10, 10))
+        self.assertEqual(store.stats()['hits'], 10)
+        counters = dict(con.execute("SELECT name, value FROM counters").fetchall())
+        self.assertEqual(counters, {'hits': 10, 'misses': 10})
+        con.close()
+
+    def test_processes(self):
+        DiskCache(self.filename)
+        args = [(self.filename, x % 4) for x in range(16)]
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(square_in_process, args))
+        self.assertEqual(results, [float((x % 4) ** 2) for x in range(16)])
+        stats = DiskCache(self.filename).stats()
+        self.assertEqual(stats['hits'] + stats['misses'], 16)
+        self.assertEqual(stats['entries'], 4)
+
+if __name__ == '__main__':
+    unittest.main()
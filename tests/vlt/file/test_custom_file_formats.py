@@ -50,6 +50,10 @@ class TestCustomFileFormats(unittest.TestCase):
         self.assertEqual(p['samplingrate'], 1000.0)
 
         self.assertEqual(w.shape, (11, 2, 3))
+
+        layout = cff.vhlspikewaveformfile_layout(p, os.path.getsize(self.spike_file))
+        self.assertEqual(layout['num_waves'], 3)
+        self.assertEqual(layout['wave_size_bytes'], 11 * 2 * 4)
         self.assertTrue(np.allclose(w[:,:,0], 1))
         self.assertTrue(np.allclose(w[:,:,1], 2))
         self.assertTrue(np.allclose(w[:,:,2], 3))
@@ -82,3 +86,15 @@ class TestCustomFileFormats(unittest.TestCase):
 
         self.assertTrue(np.allclose(x, x_read))
         self.assertTrue(np.allclose(y, y_read))
+
+    def test_vhsb_memmap(self):
+        x = np.arange(50) * 0.1
+        y = np.random.rand(50, 3)
+        cff.vhsb_write(self.vhsb_file, x, y)
+
+        y_map, h = cff.vhsb_memmap(self.vhsb_file)
+        self.assertEqual(y_map.shape, (50, 3))
+        self.assertEqual(h['num_samples'], 50)
+        self.assertTrue(np.allclose(y_map, y))
+        del y_map # release the mapping so the file can be removed
+
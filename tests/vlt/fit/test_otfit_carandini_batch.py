@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from vlt.fit.otfit_carandini_batch import otfit_carandini_batch
+from vlt.fit.otfit_carandini import otfit_carandini
+
+def double_gaussian(angles, Rsp, Rp, Op, sig, Rn):
+    d1 = ((Op[:, None] - angles + 180) % 360) - 180
+    d2 = ((180 + Op[:, None] - angles + 180) % 360) - 180
+    return (Rsp[:, None] + Rp[:, None] * np.exp(-d1 ** 2 / (2 * sig[:, None] ** 2)) +
+            Rn[:, None] * np.exp(-d2 ** 2 / (2 * sig[:, None] ** 2)))
+
+class TestOtfitCarandiniBatch(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        M = 200
+        self.angles = np.arange(0, 360, 22.5)
+        self.params = [rng.uniform(0, 2, M), rng.uniform(4, 10, M), rng.uniform(0, 360, M),
+                       rng.uniform(20, 45, M), rng.uniform(0, 3, M)]
+        self.data = double_gaussian(self.angles, *self.params)
+
+    def test_recovers_parameters(self):
+        Rsp, Rp, Op, sig, Rn = self.params
+        # start near, but not at, the true parameters
+        out = otfit_carandini_batch(self.angles, Rsp + 0.5, Rp * 0.8, Op + 15, 30, data=self.data)
+        np.testing.assert_allclose(out[0], Rsp, atol=1e-3)
+        np.testing.assert_allclose(out[1], Rp, rtol=1e-3)
+        np.testing.assert_allclose(((out[2] - Op + 180) % 360) - 180, 0, atol=1e-2)
+        np.testing.assert_allclose(out[3], sig, rtol=1e-3)
+        np.testing.assert_allclose(out[4], Rn, atol=1e-3)
+        self.assertEqual(out[5].shape, (200, 360))
+        self.assertTrue(np.all(out[7] > 0.999))
+
+    def test_matches_single_fits(self):
+        rng = np.random.default_rng(1)
+        data = self.data[:5] + rng.normal(0, 0.3, self.data[:5].shape)
+        maxresp = np.max(data, axis=1)
+        otpref = self.angles[np.argmax(data, axis=1)]
+        out = otfit_carandini_batch(self.angles, 0, maxresp, otpref, 30, data=data,
+                                    widthint=[11.25, 180], Rpint=np.column_stack([0 * maxresp, 3 * maxresp]),
+                                    Rnint=np.column_stack([0 * maxresp, 3 * maxresp]))
+        for m in range(5):
+            single = otfit_carandini(self.angles, 0, maxresp[m], otpref[m], 30, widthint=[11.25, 180],
+                                     Rpint=[0, 3 * maxresp[m]], Rnint=[0, 3 * maxresp[m]], data=data[m])
+            self.assertLessEqual(out[6][m], single[6] * (1 + 1e-3))
+
+    def test_spontfixed_and_nan(self):
+        data = self.data[:3].copy()
+        data[0, 2] = np.nan
+        Rsp, Rp, Op, sig, Rn = (p[:3] for p in self.params)
+        out = otfit_carandini_batch(self.angles, 0, Rp, Op + 10, 30, data=data, spontfixed=0)
+        np.testing.assert_array_equal(out[0], 0)
+        self.assertTrue(np.all(np.isfinite(out[6])))
+
+if __name__ == '__main__':
+    unittest.main()
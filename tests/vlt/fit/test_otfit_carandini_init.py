@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+from vlt.fit.otfit_carandini_init import otfit_carandini_init
+from vlt.neuro.vision.oridir.index.oridir_fitindexes import oridir_fitindexes
+
+class TestOtfitCarandiniInit(unittest.TestCase):
+    def setUp(self):
+        self.angles = np.arange(0, 360, 30.0)
+        d1 = ((self.angles - 120 + 180) % 360) - 180
+        d2 = ((self.angles - 300 + 180) % 360) - 180
+        self.data = 1 + 6 * np.exp(-d1 ** 2 / (2 * 30 ** 2)) + 3 * np.exp(-d2 ** 2 / (2 * 30 ** 2))
+
+    def test_template(self):
+        P, err = otfit_carandini_init(self.angles, self.data)
+        self.assertEqual(P[2], 120)
+        self.assertAlmostEqual(P[4] / P[1], 0.5)
+        self.assertLess(abs(P[3] - 30), 5)
+        self.assertLess(err, 0.5)
+
+        many, errs = otfit_carandini_init(self.angles, np.vstack([self.data, np.roll(self.data, 3)]))
+        np.testing.assert_allclose(many[0], P)
+        self.assertEqual(many[1, 2], 210)
+
+    def test_starts_inside_intervals(self):
+        P, _ = otfit_carandini_init(self.angles, self.data, widthint=[15, 180], Rnint=[0, 21])
+        self.assertGreater(P[3], 15)
+        self.assertGreater(P[4], 0)
+
+    def test_fitindexes_templates(self):
+        respstruct = {'curve': np.vstack([self.angles, self.data, 0 * self.data, 0 * self.data])}
+        fi = oridir_fitindexes(respstruct, init='templates')
+        expected = oridir_fitindexes(respstruct)
+        np.testing.assert_allclose(fi['fit_parameters'], expected['fit_parameters'], rtol=1e-3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import numpy as np
+from vlt.math.fouriercoeffs_tf2 import fouriercoeffs_tf2, _fourier_kernel
+from vlt.math.fouriercoeffs_tf_spikes import fouriercoeffs_tf_spikes
+from vlt.math.fouriercoeffs_tf2_batch import fouriercoeffs_tf2_batch
+
+class TestFourierCoeffsTf2(unittest.TestCase):
+    def test_amplitude(self):
+        sr = 1000.0
+        t = np.arange(1, 1001) / sr
+        f = fouriercoeffs_tf2(np.cos(2 * np.pi * 4 * t), 4, sr)
+        self.assertAlmostEqual(abs(f), 1.0, places=6)
+        self.assertAlmostEqual(fouriercoeffs_tf2(np.ones(10) * 3, 0, sr), 3.0)
+
+    def test_kernel_cache(self):
+        _fourier_kernel.cache_clear()
+        x = np.random.default_rng(0).standard_normal(500)
+        fouriercoeffs_tf2(x, 2, 1000)
+        fouriercoeffs_tf2(x + 1, 2, 1000)
+        info = _fourier_kernel.cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 1)
+
+    def test_kernel_cache_is_bounded_by_bytes(self):
+        _fourier_kernel.cache_clear()
+        max_bytes = _fourier_kernel.cache_info().max_bytes
+        n = max_bytes // 16 // 3 # 3 kernels fit
+        for tf in range(1, 6):
+            _fourier_kernel(n, float(tf), 1000.0)
+        info = _fourier_kernel.cache_info()
+        self.assertEqual(info.currsize, 3)
+        self.assertLessEqual(info.nbytes, max_bytes)
+        # the most recent kernels are kept
+        _fourier_kernel(n, 5.0, 1000.0)
+        self.assertEqual(_fourier_kernel.cache_info().hits, 1)
+        # a kernel larger than the whole cache is computed but not kept
+        _fourier_kernel(max_bytes // 16 + 1, 1.0, 1000.0)
+        self.assertEqual(_fourier_kernel.cache_info().currsize, 3)
+        _fourier_kernel.cache_clear()
+
+    def test_batch_matches_single(self):
+        rng = np.random.default_rng(1)
+        sr = 500.0
+        lengths = np.array([400, 450, 500, 380])
+        padded = np.full((4, 500), np.nan)
+        for k, n in enumerate(lengths):
+            padded[k, :n] = rng.standard_normal(n)
+
+        for tf in [0, 3]:
+            f = fouriercoeffs_tf2_batch(padded, tf, sr, lengths)
+            expected = [fouriercoeffs_tf2(padded[k, :n], tf, sr) for k, n in enumerate(lengths)]
+            np.testing.assert_allclose(f, expected)
+
+        full = rng.standard_normal((3, 200))
+        np.testing.assert_allclose(fouriercoeffs_tf2_batch(full, 5, sr),
+                                   [fouriercoeffs_tf2(row, 5, sr) for row in full])
+
+    def test_many_frequencies(self):
+        rng = np.random.default_rng(2)
+        sr = 1000.0
+        x = rng.standard_normal((1000, 2))
+        tfs = [0, 2, 4, 6]
+        f = fouriercoeffs_tf2(x, tfs, sr)
+        self.assertEqual(f.shape, (4, 2))
+        for k, tf in enumerate(tfs):
+            np.testing.assert_allclose(f[k], fouriercoeffs_tf2(x, tf, sr))
+
+        spikes = np.sort(rng.random(50) * 2)
+        f = fouriercoeffs_tf_spikes(spikes, np.array(tfs), 2)
+        np.testing.assert_allclose(f, [fouriercoeffs_tf_spikes(spikes, tf, 2) for tf in tfs])
+
+    def test_batch_too_short(self):
+        with self.assertRaises(ValueError):
+            fouriercoeffs_tf2_batch(np.ones((2, 10)), 1, 1000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+from scipy.stats import chi2
+from vlt.neuro.spikesorting.cluster_quality import cluster_quality
+
+class TestClusterQuality(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        # 3 features, two well separated clusters and some unassigned spikes
+        a = rng.standard_normal((3, 40))
+        b = rng.standard_normal((3, 30)) + 6
+        noise = rng.standard_normal((3, 10)) * 4
+        self.features = np.hstack([a, b, noise])
+        self.clusterids = np.concatenate([np.ones(40), 2 * np.ones(30), np.full(10, np.nan)])
+
+    def test_matches_direct_computation(self):
+        numbers, isod, lr = cluster_quality(self.features, self.clusterids, chunk_size=17)
+        np.testing.assert_array_equal(numbers, [1, 2])
+
+        X = self.features.T
+        for c, n in enumerate(numbers):
+            members = X[self.clusterids == n]
+            others = X[self.clusterids != n]
+            mu = np.mean(members, axis=0)
+            invS = np.linalg.inv(np.cov(members, rowvar=False))
+            d2 = np.array([(x - mu) @ invS @ (x - mu) for x in others])
+            self.assertAlmostEqual(isod[c], np.sort(d2)[len(members) - 1])
+            self.assertAlmostEqual(lr[c], np.sum(1 - chi2.cdf(d2, 3)) / len(members))
+
+    def test_chunk_size(self):
+        results = [cluster_quality(self.features, self.clusterids, chunk_size=k) for k in [1, 7, 1000]]
+        for r in results[1:]:
+            np.testing.assert_allclose(r[1], results[0][1])
+            np.testing.assert_allclose(r[2], results[0][2])
+
+    def test_separated_clusters_are_well_isolated(self):
+        numbers, isod, lr = cluster_quality(self.features, self.clusterids)
+        self.assertTrue(np.all(isod > 20))
+        self.assertTrue(np.all(lr < 0.1))
+
+    def test_too_few_spikes(self):
+        clusterids = self.clusterids.copy()
+        clusterids[:3] = 5 # 3 spikes in 3 dimensions: singular covariance
+        numbers, isod, lr = cluster_quality(self.features, clusterids)
+        np.testing.assert_array_equal(numbers, [1, 2, 5])
+        self.assertTrue(np.isnan(isod[2]))
+        self.assertTrue(np.isnan(lr[2]))
+        self.assertFalse(np.isnan(lr[0]))
+
+if __name__ == '__main__':
+    unittest.main()
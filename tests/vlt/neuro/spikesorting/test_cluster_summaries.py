@@ -0,0 +1,53 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import vlt.file.custom_file_formats as cff
+from vlt.neuro.spikesorting.cluster_summaries import cluster_summaries
+
+class TestClusterSummaries(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.spike_file = os.path.join(self.tmpdir.name, 'test_spike.vhl')
+
+        params = {
+            'numchannels': 2,
+            'S0': -3,
+            'S1': 4,
+            'name': 'Test',
+            'ref': 1,
+            'comment': '',
+            'samplingrate': 30000.0
+        }
+        cff.newvhlspikewaveformfile(self.spike_file, params)
+
+        rng = np.random.default_rng(1)
+        # 8 samples, 2 channels, 25 spikes
+        self.waves = rng.standard_normal((8, 2, 25)).astype(np.float32)
+        cff.addvhlspikewaveformfile(self.spike_file, self.waves)
+
+        self.clusterids = np.array([1, 2, 3, np.nan, 2] * 5)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_matches_masked_computation(self):
+        # use a chunk size that does not divide the number of spikes
+        numbers, counts, meanshapes, stdshapes = cluster_summaries(self.spike_file, self.clusterids, chunk_size=7)
+
+        np.testing.assert_array_equal(numbers, [1, 2, 3])
+        np.testing.assert_array_equal(counts, [5, 10, 5])
+        self.assertEqual(meanshapes.shape, (8, 2, 3))
+        self.assertEqual(stdshapes.shape, (8, 2, 3))
+
+        for c, n in enumerate(numbers):
+            w = self.waves[:, :, self.clusterids == n].astype(np.float64)
+            np.testing.assert_allclose(meanshapes[:, :, c], np.mean(w, axis=2), atol=1e-10)
+            np.testing.assert_allclose(stdshapes[:, :, c], np.std(w, axis=2, ddof=1), atol=1e-10)
+
+    def test_wrong_number_of_ids(self):
+        with self.assertRaises(ValueError):
+            cluster_summaries(self.spike_file, self.clusterids[:-1])
+
+if __name__ == '__main__':
+    unittest.main()
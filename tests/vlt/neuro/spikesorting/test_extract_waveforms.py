@@ -0,0 +1,64 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import vlt.file.custom_file_formats as cff
+from vlt.neuro.spikesorting.extract_waveforms import extract_waveforms
+
+class TestExtractWaveforms(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.vhsb_file = os.path.join(self.tmpdir.name, 'test.vhsb')
+        # 1000 samples at 1 kHz, 3 channels; channel c holds 1000*c + sample index
+        self.x = np.arange(1000) * 0.001
+        self.y = np.arange(1000)[:, np.newaxis] + 1000 * np.arange(3)[np.newaxis, :]
+        cff.vhsb_write(self.vhsb_file, self.x, self.y, use_filelock=0)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_extract_waveforms(self):
+        spike_times = [0.5, 0.1, 0.2501]
+        waves = extract_waveforms(self.vhsb_file, spike_times, -2, 3, [1, 3], chunk_size=2)
+
+        self.assertEqual(waves.shape, (6, 2, 3))
+        self.assertEqual(waves.dtype, np.float32)
+        for k, s in enumerate([500, 100, 250]):
+            np.testing.assert_array_equal(waves[:, 0, k], np.arange(s - 2, s + 4))
+            np.testing.assert_array_equal(waves[:, 1, k], 2000 + np.arange(s - 2, s + 4))
+
+    def test_out_of_bounds_is_nan(self):
+        waves = extract_waveforms(self.vhsb_file, [0.0, 0.999], -2, 2, [2])
+        self.assertTrue(np.all(np.isnan(waves[0:2, 0, 0])))
+        np.testing.assert_array_equal(waves[2:, 0, 0], [1000, 1001, 1002])
+        self.assertTrue(np.all(np.isnan(waves[3:, 0, 1])))
+
+    def test_preallocated_and_file_output(self):
+        spike_times = [0.3, 0.2]
+        out = np.zeros((4, 3, 2), dtype=np.float32)
+        result = extract_waveforms(self.vhsb_file, spike_times, -1, 2, [1, 2, 3], out=out)
+        self.assertIs(result, out)
+
+        spike_file = os.path.join(self.tmpdir.name, 'spikes.vhl')
+        cff.newvhlspikewaveformfile(spike_file, {'numchannels': 3, 'S0': -1, 'S1': 2,
+            'name': '', 'ref': 0, 'comment': '', 'samplingrate': 1000.0})
+        extract_waveforms(self.vhsb_file, spike_times, -1, 2, [1, 2, 3], out=spike_file, chunk_size=1)
+        w, _ = cff.readvhlspikewaveformfile(spike_file)
+        np.testing.assert_array_equal(w, out)
+
+    def test_bad_out(self):
+        spike_times = [0.3, 0.2]
+        for out in [np.zeros((4, 3, 2), dtype=np.int16), np.zeros((4, 3, 1), dtype=np.float32),
+                    np.zeros((4, 3), dtype=np.float32), np.zeros((4, 3, 2)).tolist()]:
+            with self.assertRaises(ValueError):
+                extract_waveforms(self.vhsb_file, spike_times, -1, 2, [1, 2, 3], out=out)
+        out = np.zeros((4, 3, 2))
+        out.setflags(write=False)
+        with self.assertRaises(ValueError):
+            extract_waveforms(self.vhsb_file, spike_times, -1, 2, [1, 2, 3], out=out)
+        # float64 is allowed
+        out = np.zeros((4, 3, 2))
+        self.assertIs(extract_waveforms(self.vhsb_file, spike_times, -1, 2, [1, 2, 3], out=out), out)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import vlt.file.custom_file_formats as cff
+from vlt.neuro.spikesorting.spikewaves2features import spikewaves2features
+
+class TestSpikeWaves2Features(unittest.TestCase):
+    def test_spikewaves2features(self):
+        # 10 samples, 1 channel, 2 spikes
+        waves = np.zeros((10, 1, 2))
+        waves[3, 0, 0] = -2.0 # trough at 3
+        waves[7, 0, 0] = 1.0  # peak after trough at 7
+        waves[1, 0, 0] = 1.5  # larger peak before the trough
+        waves[:, 0, 1] = -1.0 # flat spike: trough at 0, peak after trough at 0
+
+        features = spikewaves2features(waves)
+
+        self.assertEqual(features.shape, (5, 2))
+        self.assertEqual(features.dtype, np.float32)
+        self.assertTrue(features.flags['C_CONTIGUOUS'])
+
+        np.testing.assert_allclose(features[:, 0], [1.5, -2.0, 4, 1.5**2 + 4 + 1, 3.0 / 4])
+        np.testing.assert_allclose(features[:, 1], [-1.0, -1.0, 0, 10, 0])
+
+    def test_multichannel_order(self):
+        rng = np.random.default_rng(2)
+        waves = rng.standard_normal((12, 3, 20))
+        features = spikewaves2features(waves, features=['trough', 'energy'])
+        self.assertEqual(features.shape, (6, 20))
+        np.testing.assert_allclose(features[0:3], np.min(waves, axis=0), rtol=1e-6)
+        np.testing.assert_allclose(features[3:6], np.sum(waves**2, axis=0), rtol=1e-6)
+
+    def test_unknown_feature(self):
+        with self.assertRaises(ValueError):
+            spikewaves2features(np.zeros((5, 1, 2)), features=['bogus'])
+
+    def test_from_file(self):
+        rng = np.random.default_rng(3)
+        waves = rng.standard_normal((11, 2, 23)).astype(np.float32)
+        with tempfile.TemporaryDirectory() as d:
+            fname = os.path.join(d, 'spikes.vhl')
+            cff.newvhlspikewaveformfile(fname, {'numchannels': 2, 'S0': -5, 'S1': 5,
+                'name': '', 'ref': 0, 'comment': '', 'samplingrate': 30000.0})
+            cff.addvhlspikewaveformfile(fname, waves)
+            from_file = spikewaves2features(fname, chunk_size=5)
+
+        np.testing.assert_allclose(from_file, spikewaves2features(waves), rtol=1e-6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+import numpy as np
+from vlt.neuro.stimulus.findcontrolstimulus import findcontrolstimulus
+
+class TestFindControlStimulus(unittest.TestCase):
+    def test_regular(self):
+        stimid = [1, 3, 2, 3, 1, 2, 2, 1]
+        np.testing.assert_array_equal(findcontrolstimulus(stimid, 3), [1, 1, 1, 3, 3, 3, 3, 3, 3])
+
+    def test_irregular_nearest(self):
+        stimid = [3, 1, 1, 2, 3, 2, 2]
+        # stimulus 2 (index 2) is equally close to controls at 0 and 4; the first is taken
+        np.testing.assert_array_equal(findcontrolstimulus(stimid, 3), [0, 0, 0, 4, 4, 4, 4])
+
+    def test_irregular_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        stimid = rng.integers(1, 6, size=2000)
+        cs_inds = np.where(np.isin(stimid, [4, 5]))[0]
+        dist = np.abs(np.arange(len(stimid))[None, :] - cs_inds[:, None])
+        expected = cs_inds[np.argmin(dist, axis=0)]
+        np.testing.assert_array_equal(findcontrolstimulus(stimid, [4, 5]), expected)
+
+    def test_no_control(self):
+        self.assertEqual(len(findcontrolstimulus([1, 2, 1, 2], [])), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+from vlt.neuro.stimulus.stimulus_psth import stimulus_psth
+
+class TestStimulusPsth(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.spikes = np.sort(rng.random(3000) * 100)
+        onsets = np.arange(1, 95, 2.5)
+        self.stim = np.column_stack([onsets, onsets + 1, (np.arange(len(onsets)) % 4) + 1])
+        self.edges = np.linspace(-0.5, 1.5, 21)
+
+    def brute_force_rates(self, spikes):
+        counts = np.array([np.histogram(spikes - on, self.edges)[0] for on in self.stim[:, 0]])
+        return counts / np.diff(self.edges)
+
+    def test_matches_histogram(self):
+        p = stimulus_psth(self.spikes, self.stim, self.edges, rasters=True)
+        rates = self.brute_force_rates(self.spikes)
+        np.testing.assert_array_equal(p['stimid'], [1, 2, 3, 4])
+        for s, sid in enumerate(p['stimid']):
+            r = rates[self.stim[:, 2] == sid]
+            np.testing.assert_allclose(p['mean'][s], r.mean(axis=0))
+            np.testing.assert_allclose(p['sem'][s], r.std(axis=0, ddof=1) / np.sqrt(len(r)), atol=1e-9)
+            self.assertEqual(p['n'][s], len(r))
+        np.testing.assert_allclose(p['raster'].toarray() / np.diff(self.edges), rates)
+
+    def test_bin_width_and_units(self):
+        p = stimulus_psth([self.spikes, self.spikes[::2]], self.stim, 0.1, pre=0.5, post=1.5)
+        np.testing.assert_allclose(p['bin_edges'], self.edges)
+        self.assertEqual(p['mean'].shape, (2, 4, 20))
+        single = stimulus_psth(self.spikes[::2], self.stim, self.edges)
+        np.testing.assert_allclose(p['mean'][1], single['mean'])
+
+    def test_single_trial_sem(self):
+        p = stimulus_psth([0.1, 0.2, 1.1], [[0, 1, 1], [1, 2, 2], [2, 3, 2]], [0, 0.5, 1])
+        np.testing.assert_allclose(p['mean'], [[4, 0], [1, 0]])
+        self.assertTrue(np.all(np.isnan(p['sem'][0])))
+
+if __name__ == '__main__':
+    unittest.main()
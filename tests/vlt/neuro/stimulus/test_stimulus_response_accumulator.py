@@ -0,0 +1,117 @@
+import unittest
+import numpy as np
+from vlt.neuro.stimulus.stimulus_response_accumulator import StimulusResponseAccumulator
+from vlt.neuro.stimulus.stimulus_response_scalar import stimulus_response_scalar
+
+class TestStimulusResponseAccumulator(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.timestamps = np.arange(0, 60, 0.01)
+        self.timeseries = rng.standard_normal((len(self.timestamps), 2))
+        self.timeseries[rng.random(self.timeseries.shape) < 0.02] = np.nan
+        onsets = np.arange(1, 58, 2.0)
+        # an irregular sequence, so that the control is the nearest control stimulus
+        stimid = rng.integers(1, 5, size=len(onsets))
+        self.stim = np.column_stack([onsets, onsets + 1, stimid])
+
+    def feed(self, acc, timestamps, timeseries, chunk=137):
+        # add the data in chunks, and each stimulus as soon as it has finished
+        s = 0
+        for start in range(0, len(timestamps), chunk):
+            acc.add_data(timestamps[start:start + chunk], timeseries[start:start + chunk])
+            t = timestamps[min(start + chunk, len(timestamps)) - 1]
+            while s < len(self.stim) and self.stim[s, 1] <= t:
+                acc.add_stimuli(self.stim[s])
+                s += 1
+        acc.add_stimuli(self.stim[s:])
+        acc.finish()
+
+    def test_matches_stimulus_response_scalar(self):
+        kwargs = dict(control_stimid=[4], prestimulus_time=0.5, prestimulus_normalization='subtract')
+        acc = StimulusResponseAccumulator(**kwargs)
+        self.feed(acc, self.timestamps, self.timeseries)
+        r = stimulus_response_scalar(self.timeseries, self.timestamps, self.stim, **kwargs)
+        np.testing.assert_allclose(acc.response, r['response'])
+        np.testing.assert_allclose(acc.control_response, r['control_response'])
+        np.testing.assert_array_equal(acc.controlstimnumber, r['controlstimnumber'])
+
+        curve = acc.curve
+        for k, sid in enumerate(curve['stimid']):
+            v = r['response'][self.stim[:, 2] == sid]
+            np.testing.assert_allclose(curve['mean'][k], np.nanmean(v, axis=0))
+            np.testing.assert_allclose(curve['std'][k], np.nanstd(v, axis=0, ddof=1))
+
+    def test_control_out_of_bounds(self):
+        # the data start after the first control stimulus, so the stimuli that use it as
+        # their control have NaN responses
+        stim = np.array([[1, 2, 4], [3, 4, 1], [5, 6, 2], [7, 8, 3], [9, 10, 1], [11, 12, 4],
+                         [13, 14, 2], [15, 16, 1]], dtype=float)
+        keep = self.timestamps >= 1.5
+        t, y = self.timestamps[keep], self.timeseries[keep]
+        kwargs = dict(control_stimid=[4])
+        acc = StimulusResponseAccumulator(**kwargs)
+        self.stim = stim
+        self.feed(acc, t, y)
+        r = stimulus_response_scalar(y, t, stim, **kwargs)
+        np.testing.assert_allclose(acc.response, r['response'])
+        np.testing.assert_allclose(acc.control_response, r['control_response'])
+        self.assertTrue(np.all(np.isnan(acc.response[:3])))
+        curve = acc.curve
+        for k, sid in enumerate(curve['stimid']):
+            v = r['response'][stim[:, 2] == sid]
+            np.testing.assert_array_equal(curve['n'][k], np.sum(~np.isnan(v), axis=0))
+
+    def test_regular_design(self):
+        # in a regular design each stimulus uses the control stimulus of its own
+        # repetition, not the nearest one; the data end before the last control stimulus,
+        # so the stimuli of the last repetition have NaN responses
+        seq = [1, 4, 2, 3, 2, 3, 1, 4, 4, 1, 3, 2, 3, 2, 1, 4]
+        onsets = np.arange(1, 2 * len(seq), 2.0)
+        stim = np.column_stack([onsets, onsets + 1, seq])
+        keep = self.timestamps < 31.5
+        t, y = self.timestamps[keep], self.timeseries[keep]
+        kwargs = dict(control_stimid=[4], prestimulus_time=0.5, prestimulus_normalization='subtract')
+        acc = StimulusResponseAccumulator(**kwargs)
+        self.stim = stim
+        self.feed(acc, t, y)
+        r = stimulus_response_scalar(y, t, stim, **kwargs)
+        np.testing.assert_array_equal(acc.controlstimnumber, [1, 1, 1, 1, 7, 7, 7, 7, 8, 8, 8, 8, 15, 15, 15, 15])
+        np.testing.assert_array_equal(acc.controlstimnumber, r['controlstimnumber'])
+        np.testing.assert_allclose(acc.response, r['response'])
+        np.testing.assert_allclose(acc.control_response, r['control_response'])
+        self.assertTrue(np.all(np.isnan(acc.response[12:])))
+        curve = acc.curve
+        for k, sid in enumerate(curve['stimid']):
+            v = r['response'][stim[:, 2] == sid]
+            np.testing.assert_array_equal(curve['n'][k], np.sum(~np.isnan(v), axis=0))
+            np.testing.assert_allclose(curve['mean'][k], np.nanmean(v, axis=0))
+
+    def test_buffer_stays_small(self):
+        acc = StimulusResponseAccumulator(prestimulus_time=0.5)
+        self.feed(acc, self.timestamps, self.timeseries, chunk=50)
+        self.assertLess(len(acc._tbuf), 2000)
+
+    def test_spikes(self):
+        rng = np.random.default_rng(1)
+        spikes = np.sort(rng.random(500) * 60)
+        acc = StimulusResponseAccumulator(isspike=1)
+        for start in range(0, 60, 5):
+            sel = (spikes >= start) & (spikes < start + 5)
+            acc.add_data(spikes[sel], np.ones(np.sum(sel)), t_end=start + 5)
+            acc.add_stimuli(self.stim[(self.stim[:, 1] < start + 5) & (self.stim[:, 1] >= start)])
+        r = stimulus_response_scalar(np.ones(len(spikes)), spikes, self.stim, isspike=1)
+        np.testing.assert_allclose(acc.response, r['response'])
+
+    def test_live_curve(self):
+        acc = StimulusResponseAccumulator()
+        acc.add_data(self.timestamps[:500], self.timeseries[:500, 0])
+        acc.add_stimuli([[1, 2, 1], [3, 4, 2]])
+        self.assertEqual(list(acc.curve['stimid']), [1, 2])
+        acc.add_stimuli([[5, 6, 1]])
+        self.assertTrue(np.isnan(acc.response[2]))
+        self.assertEqual(acc.curve['n'][0], 1)
+        acc.add_data(self.timestamps[500:700], self.timeseries[500:700, 0])
+        self.assertEqual(acc.curve['n'][0], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+from unittest import mock
+import numpy as np
+from vlt.neuro.stimulus.stimulus_response_scalar import stimulus_response_scalar
+from vlt.math.fouriercoeffs_tf2 import fouriercoeffs_tf2
+
+class TestStimulusResponseScalar(unittest.TestCase):
+    def setUp(self):
+        # 0.1 s sampling from 0 to 20 s; value equals the time
+        self.timestamps = np.arange(0, 20.05, 0.1)
+        self.timeseries = self.timestamps.copy()
+        # stimulus 2 is the control (blank)
+        self.stim = np.array([
+            [1.0, 2.0, 1],
+            [4.0, 5.0, 2],
+            [7.0, 8.0, 1],
+            [10.0, 11.0, 2],
+        ])
+
+    def test_mean_response(self):
+        r = stimulus_response_scalar(self.timeseries, self.timestamps, self.stim, control_stimid=[2])
+        np.testing.assert_array_equal(r['stimid'], [1, 2, 1, 2])
+        np.testing.assert_allclose(r['response'], [1.5, 4.5, 7.5, 10.5])
+        # regular sequence: the control of each repetition is used
+        np.testing.assert_array_equal(r['controlstimnumber'], [1, 1, 3, 3])
+        np.testing.assert_allclose(r['control_response'], [4.5, 4.5, 10.5, 10.5])
+
+    def test_no_control(self):
+        r = stimulus_response_scalar(self.timeseries, self.timestamps, self.stim)
+        self.assertTrue(np.all(np.isnan(r['control_response'])))
+
+    def test_nan_values_are_ignored(self):
+        ts = self.timeseries.copy()
+        ts[np.isclose(self.timestamps, 1.0)] = np.nan
+        r = stimulus_response_scalar(ts, self.timestamps, self.stim)
+        self.assertAlmostEqual(r['response'][0], np.nanmean(ts[10:21]))
+
+    def test_prestimulus_normalization(self):
+        r = stimulus_response_scalar(self.timeseries, self.timestamps, self.stim, control_stimid=[2],
+                                     prestimulus_time=0.5, prestimulus_normalization='subtract')
+        # prestimulus window [onset-0.5, onset) has mean onset - 0.3
+        np.testing.assert_allclose(r['response'], [0.8, 0.8, 0.8, 0.8])
+        np.testing.assert_allclose(r['control_response'], [0.8, 0.8, 0.8, 0.8])
+
+        r = stimulus_response_scalar(self.timeseries, self.timestamps, self.stim,
+                                     prestimulus_time=0.5, prestimulus_normalization='divide')
+        np.testing.assert_allclose(r['response'], [1.5 / 0.7, 4.5 / 3.7, 7.5 / 6.7, 10.5 / 9.7])
+
+    def test_out_of_bounds(self):
+        stim = np.vstack([self.stim, [[19.5, 21.0, 1]]])
+        r = stimulus_response_scalar(self.timeseries, self.timestamps, stim)
+        self.assertTrue(np.isnan(r['response'][-1]))
+        self.assertFalse(np.any(np.isnan(r['response'][:-1])))
+
+    def test_spikes(self):
+        timeseries = np.zeros(len(self.timestamps))
+        timeseries[[12, 13, 15, 41]] = 1
+        r = stimulus_response_scalar(timeseries, self.timestamps, self.stim, isspike=1)
+        np.testing.assert_allclose(r['response'], [3, 1, 0, 0])
+
+    def test_unsorted_timestamps(self):
+        order = np.random.default_rng(0).permutation(len(self.timestamps))
+        r1 = stimulus_response_scalar(self.timeseries, self.timestamps, self.stim)
+        r2 = stimulus_response_scalar(self.timeseries[order], self.timestamps[order], self.stim)
+        np.testing.assert_allclose(r1['response'], r2['response'])
+
+    def test_fourier_response(self):
+        timestamps = np.arange(0, 20, 0.01)
+        timeseries = np.cos(2 * np.pi * 2 * timestamps)
+        stim = np.array([[1.0, 2.995, 1], [5.0, 6.995, 2]])
+        r = stimulus_response_scalar(timeseries, timestamps, stim, freq_response=2)
+        self.assertTrue(np.iscomplexobj(r['response']))
+        np.testing.assert_allclose(np.abs(r['response']), [1, 1], atol=0.01)
+
+    def test_multichannel(self):
+        rng = np.random.default_rng(1)
+        timestamps = np.arange(0, 30, 0.01)
+        timeseries = rng.standard_normal((len(timestamps), 3))
+        timeseries[rng.random(timeseries.shape) < 0.05] = np.nan
+        stim = np.array([[1 + 3 * k, 3 + 3 * k, (k % 3) + 1] for k in range(9)], dtype=float)
+
+        for kwargs in [dict(control_stimid=[3], prestimulus_time=0.5, prestimulus_normalization='subtract'),
+                       dict(freq_response=2, control_stimid=[3]),
+                       dict(isspike=1, control_stimid=[3])]:
+            r = stimulus_response_scalar(timeseries, timestamps, stim, **kwargs)
+            self.assertEqual(r['response'].shape, (9, 3))
+            self.assertEqual(r['control_response'].shape, (9, 3))
+            for c in range(3):
+                rc = stimulus_response_scalar(timeseries[:, c], timestamps, stim, **kwargs)
+                np.testing.assert_allclose(r['response'][:, c], rc['response'])
+                np.testing.assert_allclose(r['control_response'][:, c], rc['control_response'])
+
+    def test_harmonics(self):
+        rng = np.random.default_rng(3)
+        timestamps = np.arange(0, 30, 0.01)
+        timeseries = rng.standard_normal((len(timestamps), 2))
+        stim = np.array([[1 + 3 * k, 3 + 3 * k, (k % 3) + 1] for k in range(9)], dtype=float)
+
+        for kwargs in [dict(freq_response=2, control_stimid=[3], prestimulus_time=1, prestimulus_normalization='subtract'),
+                       dict(freq_response=2, isspike=1)]:
+            r = stimulus_response_scalar(timeseries, timestamps, stim, harmonics=[0, 1, 2], **kwargs)
+            self.assertEqual(r['response'].shape, (9, 2, 3))
+            for h in range(3):
+                kw = dict(kwargs, freq_response=2 * h)
+                rh = stimulus_response_scalar(timeseries, timestamps, stim, **kw)
+                np.testing.assert_allclose(r['response'][:, :, h], rh['response'])
+                np.testing.assert_allclose(r['control_response'][:, :, h], rh['control_response'])
+
+    def test_control_windows_evaluated_once(self):
+        timestamps = np.arange(0, 40, 0.01)
+        timeseries = np.cos(2 * np.pi * 2 * timestamps)
+        stim = np.array([[1.5 + 3 * k, 3.5 + 3 * k, (k % 4) + 1] for k in range(12)], dtype=float)
+        with mock.patch('vlt.neuro.stimulus.stimulus_response_scalar.fouriercoeffs_tf2',
+                        side_effect=fouriercoeffs_tf2) as f:
+            r = stimulus_response_scalar(timeseries, timestamps, stim, freq_response=2,
+                                         control_stimid=[4], prestimulus_time=1)
+        # one stimulus and one prestimulus window per trial, even though each control is shared
+        self.assertEqual(f.call_count, 2 * len(stim))
+        self.assertTrue(np.all(np.isfinite(r['control_response'])))
+
+    def test_bad_timeseries_size(self):
+        with self.assertRaises(ValueError):
+            stimulus_response_scalar(np.zeros((5, 2)), self.timestamps, self.stim)
+
+if __name__ == '__main__':
+    unittest.main()
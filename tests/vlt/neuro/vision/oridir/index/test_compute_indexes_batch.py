@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+from vlt.neuro.vision.oridir.index.compute_circularvariance import compute_circularvariance
+from vlt.neuro.vision.oridir.index.compute_dircircularvariance import compute_dircircularvariance
+from vlt.neuro.vision.oridir.index.compute_orientationindex import compute_orientationindex
+from vlt.neuro.vision.oridir.index.compute_directionindex import compute_directionindex
+from vlt.neuro.vision.oridir.index.compute_circularvariance_batch import compute_circularvariance_batch
+from vlt.neuro.vision.oridir.index.compute_dircircularvariance_batch import compute_dircircularvariance_batch
+from vlt.neuro.vision.oridir.index.compute_orientationindex_batch import compute_orientationindex_batch
+from vlt.neuro.vision.oridir.index.compute_directionindex_batch import compute_directionindex_batch
+from vlt.neuro.vision.oridir.index.compute_tuningwidth import compute_tuningwidth
+from vlt.neuro.vision.oridir.index.compute_tuningwidth_batch import compute_tuningwidth_batch
+from vlt.neuro.vision.oridir.index.compute_directionsignificancedotproduct import compute_directionsignificancedotproduct
+from vlt.neuro.vision.oridir.index.compute_directionsignificancedotproduct_batch import compute_directionsignificancedotproduct_batch
+
+class TestComputeIndexesBatch(unittest.TestCase):
+    def test_matches_single_cell(self):
+        rng = np.random.default_rng(0)
+        pairs = [(compute_circularvariance, compute_circularvariance_batch),
+                 (compute_dircircularvariance, compute_dircircularvariance_batch),
+                 (compute_orientationindex, compute_orientationindex_batch),
+                 (compute_directionindex, compute_directionindex_batch),
+                 (compute_tuningwidth, compute_tuningwidth_batch)]
+        for angles in [np.arange(0, 360, 30), np.arange(0, 360, 22.5), np.array([0, 45, 90, 135, 200, 300])]:
+            rates = rng.random((50, len(angles))) * 10
+            for single, batch in pairs:
+                expected = [single(angles, r) for r in rates]
+                np.testing.assert_array_equal(batch(angles, rates), expected)
+
+    def test_tuningwidth(self):
+        angles = np.arange(0, 360, 30)
+        d = ((angles - 90 + 180) % 360) - 180
+        rates = np.vstack([np.exp(-d ** 2 / (2 * 30 ** 2)), np.ones(len(angles))])
+        np.testing.assert_array_equal(compute_tuningwidth_batch(angles, rates),
+                                      [compute_tuningwidth(angles, r) for r in rates])
+        self.assertEqual(compute_tuningwidth_batch(angles, rates)[1], 90)
+
+    def test_tuningwidth_ties(self):
+        # integer rates have flat maxima and half-height points that tie
+        angles = np.arange(0, 360, 30)
+        self.assertEqual(compute_tuningwidth_batch(angles, [3, 1, 0, 0, 5, 5, 3, 5, 1, 1, 3, 1])[0], 24.5)
+        rng = np.random.default_rng(5)
+        for angles in [np.arange(0, 360, 30), np.arange(0, 360, 22.5)]:
+            rates = rng.integers(0, 6, (300, len(angles))).astype(float)
+            np.testing.assert_array_equal(compute_tuningwidth_batch(angles, rates),
+                                          [compute_tuningwidth(angles, r) for r in rates])
+
+    def test_single_row(self):
+        angles = np.arange(0, 360, 45)
+        rates = np.array([1, 2, 5, 2, 1, 1, 3, 1])
+        self.assertEqual(compute_directionindex_batch(angles, rates).shape, (1,))
+        self.assertEqual(compute_directionindex_batch(angles, rates)[0], compute_directionindex(angles, rates))
+
+    def test_directionsignificancedotproduct(self):
+        rng = np.random.default_rng(4)
+        angles = np.arange(0, 360, 30)
+        d = ((angles - 120 + 180) % 360) - 180
+        rates = 2 + 6 * np.exp(-d ** 2 / (2 * 30 ** 2)) + rng.normal(0, 2, (5, 10, len(angles)))
+        ntrials = [10, 8, 5, 2, 1]
+        for c, n in enumerate(ntrials):
+            rates[c, n:] = np.nan
+        p = compute_directionsignificancedotproduct_batch(angles, rates)
+        for c, n in enumerate(ntrials[:-1]):
+            self.assertAlmostEqual(p[c], compute_directionsignificancedotproduct(angles, rates[c, :n]))
+        self.assertTrue(np.isnan(p[-1]))
+
+if __name__ == '__main__':
+    unittest.main()
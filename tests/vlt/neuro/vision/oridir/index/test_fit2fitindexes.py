@@ -0,0 +1,40 @@
+import unittest
+import numpy as np
+from vlt.neuro.vision.oridir.index.fit2fitindexes import fit2fitindexes
+from vlt.neuro.vision.oridir.index.fit2fitindexes_batch import fit2fitindexes_batch
+from vlt.neuro.vision.oridir.index.fit2fitoi import fit2fitoi
+from vlt.neuro.vision.oridir.index.fit2fitoidiffsum import fit2fitoidiffsum
+from vlt.neuro.vision.oridir.index.fit2fitdi import fit2fitdi
+from vlt.neuro.vision.oridir.index.fit2fitdidiffsum import fit2fitdidiffsum
+
+def _single(R):
+    return [fit2fitoi(R), fit2fitoidiffsum(R), fit2fitdi(R), fit2fitdidiffsum(R)]
+
+class TestFit2fitindexes(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        directions = np.arange(360)
+        fits = []
+        for Op, sig, Rp, Rn, Rsp in zip(rng.uniform(0, 360, 40), rng.uniform(10, 60, 40), rng.uniform(1, 10, 40),
+                                        rng.uniform(0, 5, 40), rng.uniform(-1, 2, 40)):
+            d1 = ((directions - Op + 180) % 360) - 180
+            d2 = ((directions - Op) % 360) - 180
+            fits.append(Rsp + Rp * np.exp(-d1 ** 2 / (2 * sig ** 2)) + Rn * np.exp(-d2 ** 2 / (2 * sig ** 2)))
+        fits.append(np.zeros(360)) # no response
+        self.fits = np.array(fits)
+
+    def test_batch_matches_single(self):
+        values = np.column_stack(fit2fitindexes_batch(self.fits))
+        for fit, v in zip(self.fits, values):
+            np.testing.assert_allclose(v, _single(np.vstack([np.arange(360), fit])))
+        self.assertTrue(np.all(np.isnan(values[-1])))
+
+    def test_single(self):
+        R = np.vstack([np.arange(360), self.fits[0]])
+        np.testing.assert_allclose(fit2fitindexes(R), _single(R))
+        # unevenly spaced directions use the individual functions
+        R = R[:, ::7]
+        np.testing.assert_allclose(fit2fitindexes(R), _single(R))
+
+if __name__ == '__main__':
+    unittest.main()
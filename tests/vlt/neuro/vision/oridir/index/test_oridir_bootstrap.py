@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+from vlt.neuro.vision.oridir.index.oridir_bootstrap import oridir_bootstrap
+from vlt.neuro.vision.oridir.index.oridir_vectorindexes import oridir_vectorindexes
+
+def _respstruct(trials, angles):
+    mean = np.nanmean(trials, axis=0)
+    sd = np.nanstd(trials, axis=0)
+    return {'curve': np.vstack([angles, mean, sd, sd / np.sqrt(trials.shape[0])]), 'ind': list(trials.T)}
+
+class TestOridirBootstrap(unittest.TestCase):
+    def setUp(self):
+        self.angles = np.arange(0, 360, 30.0)
+        d = ((self.angles - 350 + 180) % 360) - 180
+        self.tuning = 1 + 8 * np.exp(-d ** 2 / (2 * 25 ** 2))
+
+    def test_identical_trials(self):
+        # every resample of identical trials is the original curve
+        trials = np.tile(self.tuning, (5, 1))
+        respstruct = _respstruct(trials, self.angles)
+        vi = oridir_vectorindexes(respstruct)
+        ci, samples = oridir_bootstrap(respstruct, 50, seed=1)
+        for name in ['ot_pref', 'ot_circularvariance', 'ot_index', 'tuning_width', 'dir_pref',
+                     'dir_circularvariance', 'dir_index']:
+            np.testing.assert_allclose(samples[name], vi[name], atol=1e-9)
+            np.testing.assert_allclose(ci[name], [vi[name], vi[name]], atol=1e-9)
+
+    def test_identical_trials_flat_maximum(self):
+        # spike-count curves often have flat maxima; the interval must still contain the
+        # point estimate of every index
+        angles = np.arange(0, 360, 30.0)
+        trials = np.tile(np.array([3, 1, 0, 0, 5, 5, 3, 5, 1, 1, 3, 1], dtype=float), (6, 1))
+        respstruct = _respstruct(trials, angles)
+        vi = oridir_vectorindexes(respstruct)
+        self.assertEqual(vi['tuning_width'], 24.5)
+        ci, samples = oridir_bootstrap(respstruct, 20, seed=0)
+        for name in ci:
+            np.testing.assert_allclose(ci[name], [vi[name], vi[name]], atol=1e-9, err_msg=name)
+
+    def test_intervals(self):
+        rng = np.random.default_rng(0)
+        trials = self.tuning + rng.normal(0, 1, (10, len(self.angles)))
+        trials[8:, 3] = np.nan # unequal numbers of trials
+        respstruct = _respstruct(trials, self.angles)
+        vi = oridir_vectorindexes(respstruct)
+        ci, samples = oridir_bootstrap(respstruct, 2000, seed=2)
+        ci2, samples2 = oridir_bootstrap(respstruct, 2000, seed=2)
+        np.testing.assert_array_equal(samples['ot_index'], samples2['ot_index'])
+        self.assertEqual(samples['dir_index'].shape, (2000,))
+        for name in ['ot_circularvariance', 'ot_index', 'dir_circularvariance', 'dir_index']:
+            self.assertLess(ci[name][0], vi[name])
+            self.assertGreater(ci[name][1], vi[name])
+        # the direction preference is near 350, so its interval wraps around 0/360
+        self.assertLess(ci['dir_pref'][0], 350)
+        self.assertGreater(ci['dir_pref'][1], 350)
+        self.assertLess(ci['dir_pref'][1] - ci['dir_pref'][0], 30)
+
+    def test_orientation_only(self):
+        angles = np.arange(0, 180, 30.0)
+        rng = np.random.default_rng(3)
+        trials = 2 + 4 * np.cos(2 * angles * np.pi / 180) + rng.normal(0, 0.5, (6, len(angles)))
+        ci, samples = oridir_bootstrap(_respstruct(trials, angles), 100, seed=0)
+        self.assertTrue(np.all(np.isnan(ci['dir_index'])))
+        self.assertTrue(np.all(np.isfinite(ci['ot_index'])))
+
+if __name__ == '__main__':
+    unittest.main()
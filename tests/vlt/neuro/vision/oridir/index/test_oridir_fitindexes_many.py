@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+from vlt.neuro.vision.oridir.index.oridir_fitindexes import oridir_fitindexes
+from vlt.neuro.vision.oridir.index.oridir_fitindexes_many import oridir_fitindexes_many
+
+def make_respstruct(otpref, width, rng):
+    angles = np.arange(0, 360, 30.0)
+    d = ((angles - otpref + 180) % 360) - 180
+    mean = 1 + 6 * np.exp(-d ** 2 / (2 * width ** 2)) + rng.normal(0, 0.2, len(angles))
+    return {'curve': np.vstack([angles, mean, np.ones(len(angles)), np.ones(len(angles)) * 0.3])}
+
+class TestOridirFitindexesMany(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.respstructs = [make_respstruct(p, w, rng) for p, w in [(30, 25), (200, 40)]]
+
+    def test_matches_serial(self):
+        calls = []
+        respstructs = self.respstructs[:1] + [{'nocurve': None}] + self.respstructs[1:]
+        fis, errors = oridir_fitindexes_many(respstructs, max_workers=2, chunksize=2,
+                                             progress=lambda n, N: calls.append((n, N)))
+        self.assertIsNone(fis[1])
+        self.assertIsInstance(errors[1], KeyError)
+        self.assertEqual(calls[-1], (3, 3))
+        for fi, rs in zip(fis[:1] + fis[2:], self.respstructs):
+            expected = oridir_fitindexes(rs)
+            np.testing.assert_allclose(fi['fit_parameters'], expected['fit_parameters'])
+            self.assertAlmostEqual(fi['ot_index'], expected['ot_index'])
+
+    def test_in_process(self):
+        fis, errors = oridir_fitindexes_many(self.respstructs[1:], max_workers=1)
+        self.assertEqual(errors, [None])
+        self.assertAlmostEqual(fis[0]['dirpref'], oridir_fitindexes(self.respstructs[1])['dirpref'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+import numpy as np
+from vlt.neuro.vision.oridir.index.oridir_vectorindexes import oridir_vectorindexes
+from vlt.stats.hotellingt2test import hotellingt2test
+
+class TestOridirVectorindexes(unittest.TestCase):
+    def test_hotelling_p(self):
+        rng = np.random.default_rng(0)
+        angles = np.arange(0, 360, 45.0)
+        d = ((angles - 90 + 180) % 360) - 180
+        trials = 1 + 5 * np.exp(-d ** 2 / (2 * 30 ** 2)) + rng.normal(0, 1, (8, len(angles)))
+        mean = trials.mean(axis=0)
+        respstruct = {'curve': np.vstack([angles, mean, trials.std(axis=0), trials.std(axis=0) / np.sqrt(8)]),
+                      'ind': list(trials.T)}
+        vi = oridir_vectorindexes(respstruct)
+
+        rad = angles * np.pi / 180
+        ot = trials @ np.exp(2j * (rad % np.pi))
+        di = trials @ np.exp(1j * rad)
+        self.assertAlmostEqual(vi['ot_HotellingT2_p'], hotellingt2test(np.column_stack([ot.real, ot.imag]), [0, 0])[1])
+        self.assertAlmostEqual(vi['dir_HotellingT2_p'], hotellingt2test(np.column_stack([di.real, di.imag]), [0, 0])[1])
+        self.assertAlmostEqual(vi['dir_pref'], 90, delta=20)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+from vlt.neuro.vision.oridir.responses2respstruct import responses2respstruct
+from vlt.neuro.stimulus.stimulus_response_scalar import stimulus_response_scalar
+
+class TestResponses2Respstruct(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        # stimids 1..8 are directions 0..315, stimid 9 is a blank
+        self.stimid = np.concatenate([rng.permutation(9) + 1 for _ in range(5)])
+        self.response = rng.random((len(self.stimid), 3))
+        self.nan_trial = np.where(self.stimid == 2)[0][0]
+        self.response[self.nan_trial, 1] = np.nan
+        self.angles = np.arange(0, 360, 45)
+
+    def test_single_cell(self):
+        rs = responses2respstruct(self.stimid, self.response[:, 0], self.angles)
+        np.testing.assert_array_equal(rs['curve'][0], self.angles)
+        for k in range(8):
+            r = self.response[self.stimid == k + 1, 0]
+            np.testing.assert_allclose(rs['ind'][k], r)
+            np.testing.assert_allclose(rs['curve'][1:, k], [r.mean(), r.std(ddof=1), r.std(ddof=1) / np.sqrt(5)])
+
+    def test_population_matches_single(self):
+        angles = {s + 1: a for s, a in enumerate(self.angles)}
+        control = self.response[:, 0] * 0.1
+        rss = responses2respstruct(self.stimid, self.response, angles, control_response=control)
+        self.assertEqual(len(rss), 3)
+        for m in range(3):
+            rs = responses2respstruct(self.stimid, self.response[:, m], self.angles, control_response=control)
+            np.testing.assert_allclose(rss[m]['curve'], rs['curve'])
+            np.testing.assert_allclose(rss[m]['blankresp'], rs['blankresp'])
+        self.assertAlmostEqual(rss[0]['blankresp'][0], np.mean(control))
+
+    def test_nan_response(self):
+        rs = responses2respstruct(self.stimid, self.response[:, 1], self.angles)
+        r = self.response[self.stimid == 2, 1]
+        self.assertEqual(len(rs['ind'][1]), 5)
+        self.assertAlmostEqual(rs['curve'][1, 1], np.nanmean(r))
+        self.assertAlmostEqual(rs['curve'][3, 1], np.nanstd(r, ddof=1) / 2)
+
+    def test_shared_blank(self):
+        # each blank trial is the control of the 8 direction trials of its repetition
+        rng = np.random.default_rng(1)
+        timestamps = np.arange(0, 100, 0.01)
+        data = rng.standard_normal(len(timestamps))
+        onsets = 1 + 2.0 * np.arange(len(self.stimid))
+        stim = np.column_stack([onsets, onsets + 1, self.stimid])
+        r = stimulus_response_scalar(data, timestamps, stim, control_stimid=[9])
+        blank = r['response'][self.stimid == 9]
+
+        rs = responses2respstruct(self.stimid, r['response'], self.angles, control_response=r['control_response'],
+                                  controlstimnumber=r['controlstimnumber'])
+        np.testing.assert_allclose(np.sort(rs['blankind']), np.sort(blank))
+        np.testing.assert_allclose(rs['blankresp'], [blank.mean(), blank.std(ddof=1), blank.std(ddof=1) / np.sqrt(5)])
+
+        rs2 = responses2respstruct(self.stimid, r['response'], self.angles, blank_stimid=9)
+        np.testing.assert_allclose(rs2['blankind'], blank)
+        np.testing.assert_allclose(rs2['blankresp'], rs['blankresp'])
+
+    def test_partial_last_repetition(self):
+        # the session ends partway through the last repetition of a regular design
+        rng = np.random.default_rng(2)
+        stimid = np.concatenate([rng.permutation(9) + 1 for _ in range(5)])[:42]
+        timestamps = np.arange(0, 100, 0.01)
+        onsets = 1 + 2.0 * np.arange(len(stimid))
+        stim = np.column_stack([onsets, onsets + 1, stimid])
+        r = stimulus_response_scalar(rng.standard_normal(len(timestamps)), timestamps, stim, control_stimid=[9])
+        self.assertGreater(len(r['controlstimnumber']), len(stimid))
+        rs = responses2respstruct(stimid, r['response'], self.angles, control_response=r['control_response'],
+                                  controlstimnumber=r['controlstimnumber'])
+        blank = r['response'][stimid == 9]
+        np.testing.assert_allclose(np.sort(rs['blankind']), np.sort(blank))
+        with self.assertRaises(ValueError):
+            responses2respstruct(stimid, r['response'], self.angles, control_response=r['control_response'],
+                                 controlstimnumber=r['controlstimnumber'][:10])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import vlt.file.custom_file_formats as cff
+from vlt.signal.estimate_noise import estimate_noise
+
+class TestEstimateNoise(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.vhsb_file = os.path.join(self.tmpdir.name, 'noise.vhsb')
+        rng = np.random.default_rng(4)
+        N = 200000
+        y = rng.standard_normal((N, 2)) * np.array([1.0, 5.0])
+        # a few large spikes should not change a robust estimate
+        y[::1000, :] = 100
+        cff.vhsb_write(self.vhsb_file, np.arange(N) / 20000.0, y, use_filelock=0)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_mad(self):
+        noise = estimate_noise(self.vhsb_file, sample_fraction=0.2, chunk_samples=1000, seed=1)
+        self.assertEqual(noise.shape, (2,))
+        np.testing.assert_allclose(noise, [1.0, 5.0], rtol=0.05)
+
+    def test_percentile(self):
+        noise = estimate_noise(self.vhsb_file, method='percentile', percentile=50, sample_fraction=0.5, seed=2)
+        np.testing.assert_allclose(noise, [0, 0], atol=0.1)
+
+    def test_whole_file(self):
+        a = estimate_noise(self.vhsb_file, sample_fraction=1, max_samples=np.inf, seed=3)
+        b = estimate_noise(self.vhsb_file, sample_fraction=1, max_samples=np.inf, seed=4)
+        np.testing.assert_allclose(a, b)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            estimate_noise(self.vhsb_file, method='bogus')
+
+if __name__ == '__main__':
+    unittest.main()
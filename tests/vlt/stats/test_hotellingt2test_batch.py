@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+from vlt.stats.hotellingt2test import hotellingt2test
+from vlt.stats.hotellingt2test_batch import hotellingt2test_batch
+
+class TestHotellingT2TestBatch(unittest.TestCase):
+    def test_matches_single(self):
+        rng = np.random.default_rng(0)
+        for p, N in [(2, 12), (2, 80), (3, 20)]:
+            X = rng.normal(0.3, 1, (40, N, p))
+            H, P = hotellingt2test_batch(X, np.zeros(p))
+            for c in range(40):
+                h, pv = hotellingt2test(X[c], np.zeros(p))
+                self.assertAlmostEqual(P[c], pv, places=10)
+                self.assertEqual(H[c], h)
+
+    def test_ragged(self):
+        rng = np.random.default_rng(1)
+        X = rng.normal(0.5, 1, (3, 10, 2))
+        X[0, 7:] = np.nan
+        X[1, 2, 1] = np.nan
+        X[2, 2:] = np.nan # too few trials to test
+        H, P = hotellingt2test_batch(X, [0, 0])
+        self.assertAlmostEqual(P[0], hotellingt2test(X[0, :7], [0, 0])[1], places=10)
+        self.assertAlmostEqual(P[1], hotellingt2test(np.delete(X[1], 2, axis=0), [0, 0])[1], places=10)
+        self.assertTrue(np.isnan(P[2]))
+        self.assertFalse(H[2])
+
+    def test_rank_deficient(self):
+        # sets whose covariance inv finds singular use the pseudoinverse, as in hotellingt2test
+        rng = np.random.default_rng(2)
+        X = rng.normal(0.5, 1, (4, 12, 2))
+        X[1, :, 1] = 3 # no variance in the second dimension
+        X[2, :, 1] = X[2, :, 0] # duplicated dimension
+        X[3, :, 1] = X[3, :, 0] + 1e-4 * rng.normal(size=12) # nearly collinear, but invertible
+        H, P = hotellingt2test_batch(X, [0, 0])
+        for c in range(4):
+            h, pv = hotellingt2test(X[c], [0, 0])
+            np.testing.assert_allclose(P[c], pv, rtol=1e-6, atol=1e-12)
+            self.assertEqual(H[c], h)
+
+        X3 = rng.normal(0.3, 1, (3, 15, 3))
+        X3[0, :, 2] = X3[0, :, 0] # duplicated dimension
+        X3[1, :, 1] = -1 # no variance
+        H, P = hotellingt2test_batch(X3, np.zeros(3))
+        for c in range(3):
+            np.testing.assert_allclose(P[c], hotellingt2test(X3[c], np.zeros(3))[1], rtol=1e-6, atol=1e-12)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,2 @@
+from .diskcache import DiskCache
+from .memoize import memoize
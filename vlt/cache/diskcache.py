@@ -0,0 +1,257 @@
+import os
+import pickle
+import random
+import sqlite3
+import time
+import weakref
+
+class DiskCache:
+    """
+    vlt.cache.DiskCache - a size-bounded store of computed results on disk
+
+    STORE = vlt.cache.DiskCache([FILENAME], [MAX_BYTES])
+
+    Stores pickled values under string keys in the SQLite file FILENAME (default:
+    the file 'vlt_cache.sqlite' in the directory named by the environment variable
+    VLT_CACHE_DIR, or in ~/.vlt/cache). When the stored values exceed MAX_BYTES
+    (default 1 GB), the least recently used entries are removed.
+
+    The file may be used by several processes at once: SQLite serializes the writes,
+    and each process opens its own connection. The first process to use the file
+    creates the tables and puts the file in write-ahead-log mode (so lookups do not
+    wait for writes); operations that find the file locked or busy are retried.
+
+    The hits and misses of this object are counted in STORE.hits and STORE.misses;
+    the counts of all processes that have used the file are returned by STORE.stats().
+    Lookups only read the file: the counts and the access times used for the LRU
+    order are written in batches (with the next SET, every FLUSH_EVERY lookups, when
+    STATS is called, and when STORE is deleted).
+    """
+
+    flush_every = 100
+    retry_timeout = 60
+
+    def __init__(self, filename=None, max_bytes=2**30):
+        if filename is None:
+            directory = os.environ.get('VLT_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.vlt', 'cache'))
+            filename = os.path.join(directory, 'vlt_cache.sqlite')
+        directory = os.path.dirname(os.path.abspath(filename))
+        os.makedirs(directory, exist_ok=True)
+
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._setup_local()
+
+        self._retry(self._create_schema)
+
+    def _setup_local(self):
+        # per-process state: the connection and the counts/access times not yet written
+        self._local = {'connection': None, 'pid': None, 'hits': 0, 'misses': 0, 'touched': {}}
+        weakref.finalize(self, DiskCache._flush_local, self.filename, self._local, self.retry_timeout)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_local']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._setup_local()
+
+    def _connect(self):
+        return DiskCache._local_connection(self.filename, self._local)
+
+    @staticmethod
+    def _local_connection(filename, local):
+        # one connection per process; connections cannot be shared across a fork, and
+        # counts inherited from the parent process are not this process's
+        if local['connection'] is None or local['pid'] != os.getpid():
+            if local['pid'] is not None and local['pid'] != os.getpid():
+                local.update(hits=0, misses=0, touched={})
+            local['connection'] = sqlite3.connect(filename, timeout=60, isolation_level=None)
+            local['pid'] = os.getpid()
+        return local['connection']
+
+    @staticmethod
+    def _retry_call(local, timeout, func, *args):
+        # call FUNC, retrying while the file is locked or busy (or, while another process
+        # sets it up, reports an I/O error)
+        deadline = time.monotonic() + timeout
+        delay = 0.01
+        while True:
+            try:
+                return func(*args)
+            except sqlite3.OperationalError as e:
+                message = str(e).lower()
+                if not any(m in message for m in ('locked', 'busy', 'disk i/o')) or time.monotonic() > deadline:
+                    raise
+                if 'disk i/o' in message and local['connection'] is not None:
+                    # start over with a new connection
+                    try:
+                        local['connection'].close()
+                    except sqlite3.Error:
+                        pass
+                    local['connection'] = None
+                time.sleep(delay * (1 + random.random()))
+                delay = min(2 * delay, 0.5)
+
+    def _retry(self, func, *args):
+        return DiskCache._retry_call(self._local, self.retry_timeout, func, *args)
+
+    def _create_schema(self):
+        con = self._connect()
+        exists = con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'counters'").fetchone()
+        if exists is None:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                con.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB, size INTEGER, last_access REAL)")
+                con.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+                con.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+                con.execute("INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0)")
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+        # the journal mode is stored in the file, so it is set only once
+        if con.execute("PRAGMA journal_mode").fetchone()[0].lower() != 'wal':
+            con.execute("PRAGMA journal_mode=WAL")
+
+    @staticmethod
+    def _write_pending(con, local):
+        # write the counts and access times of this process; must be called in a
+        # transaction, and followed by _clear_pending once it is committed
+        if local['hits'] or local['misses']:
+            con.executemany("UPDATE counters SET value = value + ? WHERE name = ?",
+                            [(local['hits'], 'hits'), (local['misses'], 'misses')])
+        if local['touched']:
+            con.executemany("UPDATE entries SET last_access = ? WHERE key = ?",
+                            [(t, k) for k, t in local['touched'].items()])
+
+    @staticmethod
+    def _clear_pending(local):
+        local.update(hits=0, misses=0, touched={})
+
+    @staticmethod
+    def _flush_local(filename, local, timeout):
+        if not (local['hits'] or local['misses'] or local['touched']):
+            return
+        def flush():
+            con = DiskCache._local_connection(filename, local)
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                DiskCache._write_pending(con, local)
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            DiskCache._clear_pending(local)
+        try:
+            DiskCache._retry_call(local, timeout, flush)
+        except sqlite3.Error:
+            pass # the counts are only statistics
+
+    def flush(self):
+        """
+        FLUSH - write the counts and access times of this process to the file
+
+        STORE.flush()
+        """
+        DiskCache._flush_local(self.filename, self._local, self.retry_timeout)
+
+    def get(self, key):
+        """
+        GET - look up a stored value
+
+        [FOUND, VALUE] = STORE.get(KEY)
+
+        Returns FOUND True and the VALUE stored under KEY, or FOUND False and None.
+        """
+        row = self._retry(lambda: self._connect().execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone())
+        found = row is not None
+        if found:
+            self.hits += 1
+            self._local['hits'] += 1
+            self._local['touched'][key] = time.time()
+        else:
+            self.misses += 1
+            self._local['misses'] += 1
+        if self._local['hits'] + self._local['misses'] >= self.flush_every:
+            self.flush()
+        if found:
+            return True, pickle.loads(row[0])
+        return False, None
+
+    def set(self, key, value):
+        """
+        SET - store a value
+
+        STORE.set(KEY, VALUE)
+
+        Stores VALUE under KEY, and removes the least recently used entries if the
+        stored values exceed the size bound.
+        """
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._retry(self._set, key, blob)
+
+    def _set(self, key, blob):
+        con = self._connect()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            DiskCache._write_pending(con, self._local)
+            con.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", (key, blob, len(blob), time.time()))
+            total = con.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total > self.max_bytes:
+                # walk from the least recently used entry until enough has been removed
+                excess = total - self.max_bytes
+                doomed = []
+                for k, size in con.execute("SELECT key, size FROM entries ORDER BY last_access"):
+                    if excess <= 0:
+                        break
+                    doomed.append((k,))
+                    excess -= size
+                con.executemany("DELETE FROM entries WHERE key = ?", doomed)
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        DiskCache._clear_pending(self._local)
+
+    def clear(self):
+        """
+        CLEAR - remove all stored values and reset the counters
+        """
+        def clear():
+            con = self._connect()
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                con.execute("DELETE FROM entries")
+                con.execute("UPDATE counters SET value = 0")
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+        self._retry(clear)
+        DiskCache._clear_pending(self._local)
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """
+        STATS - counts of the store
+
+        S = STORE.stats()
+
+        Returns a dictionary with the number of hits and misses of all processes that
+        have used the file, the number of entries, and their total size in bytes.
+        """
+        self.flush()
+        def read():
+            con = self._connect()
+            counters = dict(con.execute("SELECT name, value FROM counters").fetchall())
+            entries, nbytes = con.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            return counters, entries, nbytes
+        counters, entries, nbytes = self._retry(read)
+        return {'hits': counters.get('hits', 0), 'misses': counters.get('misses', 0),
+                'entries': entries, 'bytes': nbytes}
@@ -0,0 +1,58 @@
+import functools
+import hashlib
+import inspect
+from vlt.data.hashmatlabvariable import hashmatlabvariable
+from .diskcache import DiskCache
+
+def memoize(func=None, store=None):
+    """
+    MEMOIZE - remember the results of a function on disk
+
+    F = vlt.cache.memoize(FUNC, [STORE])
+
+    or, as a decorator,
+
+    @vlt.cache.memoize
+    def FUNC(...):
+
+    @vlt.cache.memoize(store=STORE)
+    def FUNC(...):
+
+    Returns a version of FUNC that stores each result in STORE (a vlt.cache.DiskCache;
+    by default one at the default location) and returns the stored result when it is
+    called again with the same inputs, even from another process or session. Results
+    are keyed by vlt.data.hashmatlabvariable of the inputs together with the qualified
+    name of FUNC and a hash of its source code, so that editing FUNC invalidates its
+    stored results.
+
+    For example, F = vlt.cache.memoize(vlt.neuro.vision.oridir.index.oridir_fitindexes)
+    re-uses the fits of cells whose responses have not changed.
+
+    The store is available as F.store; its hits and misses count the re-use.
+    """
+
+    if func is None:
+        return lambda f: memoize(f, store=store)
+
+    if store is None:
+        store = DiskCache()
+
+    name = f"{func.__module__}.{func.__qualname__}"
+    try:
+        source = inspect.getsource(func).encode()
+    except (OSError, TypeError):
+        source = func.__code__.co_code
+    source_hash = hashlib.md5(source).hexdigest()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = name + ':' + source_hash + ':' + hashmatlabvariable((args, sorted(kwargs.items())))
+        found, value = store.get(key)
+        if found:
+            return value
+        value = func(*args, **kwargs)
+        store.set(key, value)
+        return value
+
+    wrapper.store = store
+    return wrapper
@@ -6,6 +6,10 @@ import vlt.string
 import vlt.signal
 import vlt.math
 
+# spike waveform files: a 512-byte header followed by float32 waveforms
+VHLSPIKEWAVEFORM_HEADERSIZE = 512
+VHLSPIKEWAVEFORM_VALUESIZE = 4
+
 def vhsb_sampletype2matlabfwritestring(data_type, data_size):
     """
     Return struct format string for sample type.
@@ -299,6 +303,33 @@ def vhsb_write(fo, x, y, **kwargs):
 
     return True
 
+def vhsb_sampledtype(h):
+    """
+    Return the numpy dtype of one sample of a VHLab series binary file.
+
+    DT = vhsb_sampledtype(H)
+
+    H is the header returned by vhsb_readheader. DT is a structured dtype of
+    H['sample_size'] bytes with a field 'y' holding the prod(Y_dim[1:]) values of the
+    sample and, if H['X_stored'] is set, a field 'x' holding its X value.
+    """
+    x_fmt = vhsb_sampletype2matlabfwritestring(h['X_data_type'], h['X_data_size'])
+    y_fmt = vhsb_sampletype2matlabfwritestring(h['Y_data_type'], h['Y_data_size'])
+    y_dim_prod = int(np.prod(h['Y_dim'][1:]) if len(h['Y_dim']) > 1 else 1)
+
+    dtype_spec = {'names': [], 'formats': [], 'offsets': [], 'itemsize': h['sample_size']}
+    off = 0
+    if h['X_stored']:
+        dtype_spec['names'].append('x')
+        dtype_spec['formats'].append('<' + x_fmt)
+        dtype_spec['offsets'].append(0)
+        off += int(h['X_data_size'] / 8)
+    dtype_spec['names'].append('y')
+    dtype_spec['formats'].append(('<' + y_fmt, (y_dim_prod,)))
+    dtype_spec['offsets'].append(off)
+
+    return np.dtype(dtype_spec)
+
 def vhsb_read(fo, x0, x1, out_of_bounds_err=False):
     """
     Read a VHLab series binary file.
@@ -320,37 +351,13 @@ def vhsb_read(fo, x0, x1, out_of_bounds_err=False):
 
         start_sample_idx = int(s[0] - 1)
 
-        x_fmt = vhsb_sampletype2matlabfwritestring(h['X_data_type'], h['X_data_size'])
-        y_fmt = vhsb_sampletype2matlabfwritestring(h['Y_data_type'], h['Y_data_size'])
-
-        x_bytes_len = int(h['X_data_size'] / 8)
-        y_bytes_len = int(h['Y_data_size'] / 8)
-        y_dim_prod = int(np.prod(h['Y_dim'][1:]) if len(h['Y_dim']) > 1 else 1)
-
         full_sample_size = h['sample_size']
 
         f.seek(h['headersize'] + start_sample_idx * full_sample_size)
 
         data_chunk = f.read(num_samples_to_read * full_sample_size)
 
-        dtype_spec = {
-            'names': [],
-            'formats': [],
-            'offsets': [],
-            'itemsize': full_sample_size
-        }
-        off = 0
-        if h['X_stored']:
-            dtype_spec['names'].append('x')
-            dtype_spec['formats'].append('<' + x_fmt)
-            dtype_spec['offsets'].append(0)
-            off += x_bytes_len
-
-        dtype_spec['names'].append('y')
-        dtype_spec['formats'].append(('<' + y_fmt, (y_dim_prod,)))
-        dtype_spec['offsets'].append(off)
-
-        dt = np.dtype(dtype_spec)
+        dt = vhsb_sampledtype(h)
 
         data = np.frombuffer(data_chunk, dtype=dt)
 
@@ -376,6 +383,32 @@ def vhsb_read(fo, x0, x1, out_of_bounds_err=False):
 
         return y, x
 
+def vhsb_memmap(fo):
+    """
+    Return a memory-mapped view of the samples of a VHLab series binary file.
+
+    [Y, H] = vhsb_memmap(FO)
+
+    Y is a read-only numpy memmap view with one row per sample and one column per
+    element of a sample (prod(Y_dim[1:]) columns). Nothing is read from disk until
+    Y is indexed. The values are stored values; if H['Y_usescale'] is set, the
+    caller must apply (Y - H['Y_offset']) * H['Y_scale'] as vhsb_read does.
+
+    H is the header returned by vhsb_readheader.
+    """
+    h = vhsb_readheader(fo)
+    filename = vlt.file.filename_value(fo)
+
+    dt = vhsb_sampledtype(h)
+
+    if h['num_samples'] == 0:
+        return np.zeros((0,) + dt['y'].shape, dtype=dt['y'].base), h
+
+    data = np.memmap(filename, dtype=dt, mode='r',
+                     offset=h['headersize'], shape=(h['num_samples'],))
+
+    return data['y'], h
+
 def newvhlspikewaveformfile(fid_or_filename, parameters):
     """
     Create a binary file for storing spike waveforms.
@@ -409,7 +442,7 @@ def newvhlspikewaveformfile(fid_or_filename, parameters):
         fid.write(struct.pack('<f', float(parameters['samplingrate'])))
 
         current_pos = fid.tell()
-        fid.write(b'\0' * (512 - current_pos))
+        fid.write(b'\0' * (VHLSPIKEWAVEFORM_HEADERSIZE - current_pos))
 
     finally:
         if close_at_end:
@@ -439,6 +472,29 @@ def addvhlspikewaveformfile(fid_or_filename, waveforms):
         if close_at_end:
             fid.close()
 
+def vhlspikewaveformfile_layout(parameters, filesize):
+    """
+    Return the sizes of the waveforms in a VHL spike waveform file.
+
+    L = vhlspikewaveformfile_layout(PARAMETERS, FILESIZE)
+
+    PARAMETERS is the header returned by readvhlspikewaveformfile and FILESIZE the
+    size of the file in bytes. L is a dictionary with fields:
+    Field name:          | Description:
+    ------------------------------------------------------------------
+    headersize           | The size of the header in bytes
+    samples_per_channel  | S1 - S0 + 1
+    wave_size            | The number of values in one waveform (all channels)
+    wave_size_bytes      | The number of bytes of one waveform
+    num_waves            | The number of complete waveforms in the file
+    """
+    samples_per_channel = int(parameters['S1'] - parameters['S0'] + 1)
+    wave_size = int(parameters['numchannels']) * samples_per_channel
+    wave_size_bytes = wave_size * VHLSPIKEWAVEFORM_VALUESIZE
+    num_waves = max(int(filesize) - VHLSPIKEWAVEFORM_HEADERSIZE, 0) // wave_size_bytes if wave_size_bytes > 0 else 0
+    return {'headersize': VHLSPIKEWAVEFORM_HEADERSIZE, 'samples_per_channel': samples_per_channel,
+            'wave_size': wave_size, 'wave_size_bytes': wave_size_bytes, 'num_waves': num_waves}
+
 def readvhlspikewaveformfile(file_or_fid, wave_start=1, wave_end=float('inf')):
     """
     Read spike waveforms from binary file.
@@ -470,17 +526,15 @@ def readvhlspikewaveformfile(file_or_fid, wave_start=1, wave_end=float('inf')):
 
         parameters['samplingrate'] = struct.unpack('<f', fid.read(4))[0]
 
-        header_size = 512
-        samples_per_channel = parameters['S1'] - parameters['S0'] + 1
         num_channels = parameters['numchannels']
-        wave_size_floats = num_channels * samples_per_channel
-        wave_size_bytes = wave_size_floats * 4
 
         if wave_start > 0:
             fid.seek(0, 2)
-            filesize = fid.tell()
-
-            total_waves = (filesize - header_size) / wave_size_bytes
+            layout = vhlspikewaveformfile_layout(parameters, fid.tell())
+            header_size = layout['headersize']
+            samples_per_channel = layout['samples_per_channel']
+            wave_size_bytes = layout['wave_size_bytes']
+            total_waves = layout['num_waves']
 
             if wave_end == float('inf'):
                 wave_end = int(total_waves)
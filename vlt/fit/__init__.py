@@ -1,3 +1,5 @@
 from .otfit_carandini import otfit_carandini
 from .otfit_carandini_conv import otfit_carandini_conv
 from .otfit_carandini_err import otfit_carandini_err
+from .otfit_carandini_batch import otfit_carandini_batch
+from .otfit_carandini_init import otfit_carandini_init
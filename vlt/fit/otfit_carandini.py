@@ -8,12 +8,16 @@ def otfit_carandini(angles, sponthint, maxresphint, otprefhint, widthhint, **kwa
     vlt.fit.otfit_carandini Fits orientation curves like Carandini/Ferster 2000
 
     [Rsp,Rp,Ot,sigm,Rn,fitcurve,er,R2] = vlt.fit.otfit_carandini(angles, sponthint, ...)
+
+    The fit of Rn starts from MAXRESPHINT unless the name/value pair 'Rnhint' is given.
     """
 
     spontfixed = kwargs.get('spontfixed', np.nan)
     data = kwargs.get('data', np.nan)
 
-    Po = np.array([sponthint, maxresphint, otprefhint, widthhint, maxresphint])
+    Rnhint = kwargs.get('Rnhint', maxresphint)
+
+    Po = np.array([sponthint, maxresphint, otprefhint, widthhint, Rnhint])
 
     if not np.isnan(spontfixed):
         Po = Po[1:]
@@ -0,0 +1,173 @@
+import numpy as np
+
+def otfit_carandini_batch(angles, sponthint, maxresphint, otprefhint, widthhint, **kwargs):
+    """
+    vlt.fit.otfit_carandini_batch Fits many orientation curves like Carandini/Ferster 2000
+
+    [Rsp,Rp,Ot,sigm,Rn,fitcurve,er,R2] = vlt.fit.otfit_carandini_batch(angles, sponthint, ...
+        maxresphint, otprefhint, widthhint, 'data', DATA, ...)
+
+    Fits the function
+        R = Rsp + Rp*exp(-angdiff(Ot-angles)^2/(2*sigm^2)) + Rn*exp(-angdiff(180+Ot-angles)^2/(2*sigm^2))
+    to each row of the M x numel(ANGLES) matrix DATA (one tuning curve per cell) at
+    once. All cells are fit simultaneously with a batched Levenberg-Marquardt
+    iteration that uses the analytic Jacobian of the double Gaussian, so there is no
+    per-cell Python loop.
+
+    The hints SPONTHINT, MAXRESPHINT, OTPREFHINT and WIDTHHINT are the starting values
+    of the parameters; each can be a scalar (used for every cell) or a vector with one
+    entry per cell.
+
+    This function takes name/value pairs that modify its behavior; the intervals can be
+    1x2 (used for every cell) or Mx2 (one row per cell):
+    Parameter (default)         | Description
+    ------------------------------------------------------------------------
+    data (required)             | M x numel(ANGLES) responses to fit
+    stddev (None)               | Standard deviation of each point of DATA; errors
+                                |   are divided by it (M x numel(ANGLES))
+    spontfixed (NaN)            | Fixed value of Rsp (NaN to fit it)
+    spontint (NaN)              | [min max] interval of Rsp
+    Rpint (NaN)                 | [min max] interval of Rp (Rp >= 0 otherwise)
+    Rnint (NaN)                 | [min max] interval of Rn (Rn >= 0 otherwise)
+    widthint (NaN)              | [min max] interval of sigm
+    maxiter (200)               | Maximum number of iterations
+    tol (1e-6)                  | Stop a cell when its error improves by less than
+                                |   this fraction
+
+    NaN values of DATA are ignored. As in vlt.fit.otfit_carandini, the parameters are
+    reported with Rp >= Rn (by swapping them and shifting Ot by 180 degrees if needed)
+    and Ot in [0, 360). Each output is a vector with one entry per cell; FITCURVE is
+    M x 360 (the fit evaluated at 0:359) and ER is the sum of squared (normalized)
+    errors of each cell, with R2 the fraction of variance explained.
+
+    See also: vlt.fit.otfit_carandini
+    """
+
+    angles = np.array(angles, dtype=float).flatten()
+    data = np.array(kwargs.get('data'), dtype=float)
+    if data.ndim == 1:
+        data = data.reshape(1, -1)
+    M, A = data.shape
+    if A != len(angles):
+        raise ValueError("DATA must have one column per angle.")
+
+    stddev = kwargs.get('stddev', None)
+    spontfixed = kwargs.get('spontfixed', np.nan)
+    maxiter = kwargs.get('maxiter', 200)
+    tol = kwargs.get('tol', 1e-6)
+
+    def interval(name):
+        v = np.array(kwargs.get(name, np.nan), dtype=float)
+        if np.all(np.isnan(v)):
+            return None
+        return np.broadcast_to(v.reshape(-1, 2), (M, 2))
+
+    spontint = interval('spontint')
+    Rpint = interval('Rpint')
+    Rnint = interval('Rnint')
+    widthint = interval('widthint')
+
+    fit_spont = np.isnan(spontfixed)
+
+    # weights; NaN data points get zero weight
+    w = np.ones((M, A)) if stddev is None else 1 / np.broadcast_to(np.array(stddev, dtype=float), (M, A))
+    w = np.where(np.isnan(data), 0, w)
+    y = np.where(np.isnan(data), 0, data)
+
+    # parameters, one row per cell: [Rsp Rp Op sig Rn]
+    p = np.column_stack([np.broadcast_to(np.array(h, dtype=float).flatten(), (M,)) if np.size(h) > 1
+                         else np.full(M, float(np.array(h).flatten()[0]))
+                         for h in [sponthint, maxresphint, otprefhint, widthhint, maxresphint]])
+    if not fit_spont:
+        p[:, 0] = spontfixed
+    free = [0, 1, 2, 3, 4] if fit_spont else [1, 2, 3, 4]
+
+    def project(p, idx=slice(None)):
+        # keep the parameters of the cells IDX inside their intervals
+        p = p.copy()
+        if fit_spont and spontint is not None:
+            p[:, 0] = np.clip(p[:, 0], spontint[idx, 0], spontint[idx, 1])
+        for k, iv in ((1, Rpint), (4, Rnint)):
+            p[:, k] = np.maximum(p[:, k], 0) if iv is None else np.clip(p[:, k], iv[idx, 0], iv[idx, 1])
+        p[:, 3] = np.maximum(np.abs(p[:, 3]), 1e-6) if widthint is None else np.clip(p[:, 3], widthint[idx, 0], widthint[idx, 1])
+        p[:, 2] = np.mod(p[:, 2], 360)
+        return p
+
+    def model(p, theta, jacobian=False):
+        Rsp, Rp, Op, sig, Rn = (p[:, k:k + 1] for k in range(5))
+        d1 = _angdiff(Op - theta)
+        d2 = _angdiff(180 + Op - theta)
+        g1 = np.exp(-d1 ** 2 / (2 * sig ** 2))
+        g2 = np.exp(-d2 ** 2 / (2 * sig ** 2))
+        R = Rsp + Rp * g1 + Rn * g2
+        if not jacobian:
+            return R
+        J = np.empty(R.shape + (5,))
+        J[..., 0] = 1
+        J[..., 1] = g1
+        J[..., 2] = -(Rp * g1 * d1 + Rn * g2 * d2) / sig ** 2
+        J[..., 3] = (Rp * g1 * d1 ** 2 + Rn * g2 * d2 ** 2) / sig ** 3
+        J[..., 4] = g2
+        return R, J
+
+    def error(p, idx=slice(None)):
+        return np.sum((w[idx] * (y[idx] - model(p, angles))) ** 2, axis=1)
+
+    p = project(p)
+    err = error(p)
+    lam = np.full(M, 1e-3)
+    active = np.ones(M, dtype=bool)
+    eye = np.eye(len(free))
+
+    for _ in range(maxiter):
+        if not np.any(active):
+            break
+        idx = np.where(active)[0]
+        R, J = model(p[idx], angles, jacobian=True)
+        J = J[..., free] * w[idx, :, np.newaxis]
+        r = w[idx] * (y[idx] - R)
+        JTJ = np.einsum('map,maq->mpq', J, J)
+        JTr = np.einsum('map,ma->mp', J, r)
+        D = np.diagonal(JTJ, axis1=1, axis2=2)
+        H = JTJ + lam[idx, np.newaxis, np.newaxis] * (D[:, :, np.newaxis] * eye + 1e-12 * eye)
+        try:
+            step = np.linalg.solve(H, JTr[..., np.newaxis])[..., 0]
+        except np.linalg.LinAlgError:
+            step = np.stack([np.linalg.lstsq(h, g, rcond=None)[0] for h, g in zip(H, JTr)])
+
+        trial = p[idx].copy()
+        trial[:, free] += step
+        trial = project(trial, idx)
+        trial_err = error(trial, idx)
+
+        better = trial_err < err[idx]
+        improvement = np.where(better, (err[idx] - trial_err) / np.maximum(err[idx], 1e-300), 0)
+        p[idx[better]] = trial[better]
+        err[idx[better]] = trial_err[better]
+        lam[idx] = np.where(better, lam[idx] / 10, lam[idx] * 10)
+
+        converged = (better & (improvement < tol)) | (lam[idx] > 1e10) | (err[idx] == 0)
+        active[idx[converged]] = False
+
+    # report Rp >= Rn, as otfit_carandini does
+    swap = p[:, 1] < p[:, 4]
+    p[swap, 1], p[swap, 4] = p[swap, 4], p[swap, 1].copy()
+    p[swap, 2] = p[swap, 2] + 180
+    p[:, 2] = np.mod(p[:, 2], 360)
+
+    Rsp, Rp, Ot, sigm, Rn = (p[:, k] for k in range(5))
+    fitcurve = model(p, np.arange(360.0))
+    er = error(p)
+
+    # R2 = 1 - sum(er)/(sum((data-mean(data)).^2))
+    n = np.sum(~np.isnan(data), axis=1, keepdims=True)
+    mean = np.sum(y, axis=1, keepdims=True) / np.maximum(n, 1)
+    sst = np.sum(np.where(np.isnan(data), 0, data - mean) ** 2, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        R2 = np.where(sst != 0, 1 - er / sst, 0)
+
+    return Rsp, Rp, Ot, sigm, Rn, fitcurve, er, R2
+
+def _angdiff(ang):
+    # angular difference in degrees, in [-180, 180)
+    return ((ang + 180) % 360) - 180
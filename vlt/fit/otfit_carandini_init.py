@@ -0,0 +1,109 @@
+import numpy as np
+from functools import lru_cache
+
+def otfit_carandini_init(angles, data, **kwargs):
+    """
+    vlt.fit.otfit_carandini_init Starting parameters for Carandini/Ferster orientation fits
+
+    [P, ERR] = vlt.fit.otfit_carandini_init(ANGLES, DATA, ...)
+
+    Finds starting values for vlt.fit.otfit_carandini by comparing DATA with a bank of
+    double-Gaussian templates
+        T = exp(-angdiff(Op-angles)^2/(2*sig^2)) + ratio*exp(-angdiff(180+Op-angles)^2/(2*sig^2))
+    over a grid of preferred angles Op, widths sig and null/preferred ratios. For each
+    template the linear parameters Rsp and Rp of the fit Rsp + Rp*T (with Rn = ratio*Rp)
+    are found in closed form by least squares; all templates are compared with the data
+    in a single matrix product, and the template with the smallest squared error is
+    returned.
+
+    DATA can be a vector of responses at ANGLES, or an M x numel(ANGLES) matrix with one
+    tuning curve per row.
+
+    This function takes name/value pairs that modify its behavior:
+    Parameter (default)         | Description
+    ------------------------------------------------------------------------
+    widthint (NaN)              | [min max] interval of sig; the template widths are
+                                |   spaced logarithmically from its min to the
+                                |   smaller of its max and max_width
+    max_width (90)              | Largest template width; very wide templates can
+                                |   mimic a narrow curve with large Rp and Rn
+    spontint (NaN)              | [min max] interval of Rsp
+    Rpint (NaN)                 | [min max] interval of Rp
+    Rnint (NaN)                 | [min max] interval of Rn
+    Op_step (5)                 | Spacing of the template preferred angles (degrees)
+    num_widths (12)             | Number of template widths
+    ratios ([0 0.25 0.5 0.75 1])| Template ratios of Rn to Rp
+
+    P is [Rsp Rp Op sig Rn] (or an M x 5 matrix with one row per tuning curve) and ERR
+    is the squared error of the best template. Parameters with an interval are moved
+    to just inside it (by 1% of its width), so that a fit can move away from the edge.
+
+    See also: vlt.fit.otfit_carandini
+    """
+
+    angles = np.array(angles, dtype=float).flatten()
+    data = np.array(data, dtype=float)
+    single = data.ndim == 1
+    Y = data.reshape(-1, len(angles))
+
+    max_width = kwargs.get('max_width', 90)
+    widthint = np.array(kwargs.get('widthint', np.nan), dtype=float).flatten()
+    if np.any(np.isnan(widthint)):
+        widthint = np.array([5.0, max_width])
+    Op_step = kwargs.get('Op_step', 5)
+    num_widths = kwargs.get('num_widths', 12)
+    ratios = tuple(np.array(kwargs.get('ratios', [0, 0.25, 0.5, 0.75, 1]), dtype=float).flatten())
+
+    bank, params = _template_bank(tuple(angles), float(Op_step), float(max(widthint[0], 1e-3)),
+                                  float(max(min(widthint[1], max_width), widthint[0])), int(num_widths), ratios)
+
+    # least squares of Y ~ Rsp + Rp*T for every template at once, with centered templates
+    Tc = bank - np.mean(bank, axis=1, keepdims=True)
+    Yc = Y - np.mean(Y, axis=1, keepdims=True)
+    var = np.sum(Tc ** 2, axis=1)[:, np.newaxis] # templates x 1
+    cov = Tc @ Yc.T # templates x M
+    with np.errstate(invalid='ignore', divide='ignore'):
+        Rp = np.where(var > 0, np.maximum(cov, 0) / var, 0)
+    sse = np.sum(Yc ** 2, axis=1)[np.newaxis, :] - Rp * np.maximum(cov, 0)
+
+    best = np.argmin(sse, axis=0)
+    cells = np.arange(Y.shape[0])
+    Rp = Rp[best, cells]
+    Rsp = np.mean(Y, axis=1) - Rp * np.mean(bank[best], axis=1)
+    Op, sig, ratio = params[best].T
+    Rn = ratio * Rp
+
+    def clip(v, name):
+        # keep starting values just inside the intervals; otfit_carandini cannot move a
+        # parameter away from the edge of its interval
+        iv = np.array(kwargs.get(name, np.nan), dtype=float).flatten()
+        if np.any(np.isnan(iv)):
+            return v
+        margin = 0.01 * (iv[1] - iv[0])
+        return np.clip(v, iv[0] + margin, iv[1] - margin)
+
+    P = np.column_stack([clip(Rsp, 'spontint'), clip(Rp, 'Rpint'), Op, clip(sig, 'widthint'), clip(Rn, 'Rnint')])
+    err = sse[best, cells]
+
+    if single:
+        return P[0], err[0]
+    return P, err
+
+@lru_cache(maxsize=16)
+def _template_bank(angles, Op_step, minwidth, maxwidth, num_widths, ratios):
+    """
+    Templates (templates x angles) and their [Op sig ratio] parameters (templates x 3).
+    """
+    angles = np.array(angles)
+    Op = np.arange(0, 360, Op_step)
+    sig = np.geomspace(minwidth, maxwidth, num_widths)
+    params = np.array(np.meshgrid(Op, sig, np.array(ratios), indexing='ij')).reshape(3, -1).T
+
+    d1 = ((params[:, 0:1] - angles + 180) % 360) - 180
+    d2 = ((180 + params[:, 0:1] - angles + 180) % 360) - 180
+    s2 = 2 * params[:, 1:2] ** 2
+    bank = np.exp(-d1 ** 2 / s2) + params[:, 2:3] * np.exp(-d2 ** 2 / s2)
+
+    bank.setflags(write=False)
+    params.setflags(write=False)
+    return bank, params
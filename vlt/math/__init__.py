@@ -1,6 +1,7 @@
 from .clip import clip
 from .rectify import rectify
 from .fouriercoeffs_tf2 import fouriercoeffs_tf2
+from .fouriercoeffs_tf2_batch import fouriercoeffs_tf2_batch
 from .fouriercoeffs_tf_spikes import fouriercoeffs_tf_spikes
 from .group_enumeration import group_enumeration
 from .interval_add import interval_add
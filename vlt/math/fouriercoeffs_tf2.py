@@ -1,4 +1,82 @@
 import numpy as np
+import functools
+import threading
+from collections import OrderedDict, namedtuple
+
+_CacheInfo = namedtuple('_CacheInfo', ['hits', 'misses', 'currsize', 'nbytes', 'max_bytes'])
+
+def _bytes_lru_cache(max_bytes):
+    """
+    Like functools.lru_cache, but bounded by the total size (in bytes) of the cached
+    arrays rather than by their number. Arrays larger than MAX_BYTES are not cached.
+    """
+    def decorator(func):
+        cache = OrderedDict()
+        lock = threading.Lock()
+        stats = {'hits': 0, 'misses': 0, 'nbytes': 0}
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            with lock:
+                if args in cache:
+                    cache.move_to_end(args)
+                    stats['hits'] += 1
+                    return cache[args]
+                stats['misses'] += 1
+            value = func(*args)
+            if value.nbytes <= max_bytes:
+                with lock:
+                    if args not in cache:
+                        cache[args] = value
+                        stats['nbytes'] += value.nbytes
+                        while stats['nbytes'] > max_bytes:
+                            _, old = cache.popitem(last=False)
+                            stats['nbytes'] -= old.nbytes
+            return value
+
+        def cache_info():
+            with lock:
+                return _CacheInfo(stats['hits'], stats['misses'], len(cache), stats['nbytes'], max_bytes)
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+                stats.update(hits=0, misses=0, nbytes=0)
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+@_bytes_lru_cache(max_bytes=32 * 2**20)
+def _fourier_kernel(nsamples, tf, samplerate):
+    """
+    Return the read-only kernel exp(-(1:nsamples)*2*pi*i*tf/samplerate).
+
+    Kernels are cached because analyses usually evaluate many windows of the
+    same length at the same frequency and sample rate; the cache holds at most
+    32 MB of kernels, so long windows do not stay in memory indefinitely.
+    """
+    indices = np.arange(1, nsamples + 1)
+    expvec = np.exp(-indices * 2 * np.pi * 1j * tf / samplerate)
+    expvec.setflags(write=False)
+    return expvec
+
+@_bytes_lru_cache(max_bytes=32 * 2**20)
+def _fourier_kernel_matrix(nsamples, tfs, samplerate):
+    """
+    Return the read-only (len(tfs) x nsamples) matrix whose product with a response
+    gives the coefficients at each frequency in the tuple tfs: (2/nsamples) times
+    the kernel for nonzero frequencies, and 1/nsamples (the mean) for zero.
+    """
+    K = np.empty((len(tfs), nsamples), dtype=complex)
+    for k, tf in enumerate(tfs):
+        if tf == 0:
+            K[k] = 1 / nsamples
+        else:
+            K[k] = (2 / nsamples) * _fourier_kernel(nsamples, tf, samplerate)
+    K.setflags(write=False)
+    return K
 
 def fouriercoeffs_tf2(response, tf, samplerate):
     """
@@ -9,9 +87,29 @@ def fouriercoeffs_tf2(response, tf, samplerate):
          returns a row vector.
          tf is expressed in whatever units SAMPLERATE is expressed in
          (I usually use Hz).
+
+         The exponential kernel for each (number of samples, tf, SAMPLERATE)
+         is cached, so repeated calls with the same window length reuse it.
+
+         tf can also be a vector of F frequencies (such as [0, tf, 2*tf] for
+         F0, F1 and F2); then all coefficients are computed with a single
+         product of an (F x samples) kernel matrix with response, and the
+         result has one row per frequency (F, or F x columns if response is
+         two-dimensional).
     """
 
     response = np.array(response)
+
+    if np.ndim(tf) > 0:
+        tfs = tuple(float(t) for t in np.array(tf).flatten())
+        nsamples = response.shape[0]
+        duration = nsamples / samplerate
+        for t in tfs:
+            if t != 0 and np.floor(samplerate * np.floor(duration * t) / t) == 0:
+                raise ValueError('Correctnsamples is zero')
+        K = _fourier_kernel_matrix(nsamples, tfs, float(samplerate))
+        return K @ response
+
     # Ensure 2D column vector if 1D array
     if response.ndim == 1:
         response = response.reshape(-1, 1)
@@ -35,8 +133,7 @@ def fouriercoeffs_tf2(response, tf, samplerate):
             raise ValueError('Correctnsamples is zero')
 
         # 1-based index in MATLAB `1:length(response)` -> 1, 2, ..., nsamples
-        indices = np.arange(1, nsamples + 1)
-        expvec = np.exp(-indices * 2 * np.pi * 1j * tf / samplerate)
+        expvec = _fourier_kernel(nsamples, float(tf), float(samplerate))
 
         # expvec is (nsamples,). response is (nsamples, cols).
         # We need dot product: expvec * response
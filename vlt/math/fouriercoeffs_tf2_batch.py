@@ -0,0 +1,48 @@
+import numpy as np
+from .fouriercoeffs_tf2 import _fourier_kernel
+
+def fouriercoeffs_tf2_batch(responses, tf, samplerate, nsamples=None):
+    """
+    FOURIERCOEFFS_TF2_BATCH  Fourier Transform of many trials at a particular frequency.
+
+    F = vlt.math.fouriercoeffs_tf2_batch(RESPONSES, TF, SAMPLERATE, [NSAMPLES])
+
+    Computes vlt.math.fouriercoeffs_tf2 for every row of RESPONSES at once.
+    RESPONSES is a (trials x samples) matrix; row k holds the NSAMPLES[k] samples of
+    trial k followed by padding, which is ignored. If NSAMPLES is not given, every
+    row is used in full. All coefficients are computed with a single matrix-vector
+    product against the (cached) kernel exp(-(1:samples)*2*pi*i*tf/SAMPLERATE).
+
+    If TF is zero the mean of each trial is returned.
+
+    F is a vector with one coefficient per trial.
+    """
+
+    responses = np.array(responses)
+    if responses.ndim == 1:
+        responses = responses.reshape(1, -1)
+
+    ntrials, maxsamples = responses.shape
+
+    if nsamples is None:
+        nsamples = np.full(ntrials, maxsamples)
+    else:
+        nsamples = np.array(nsamples, dtype=int).flatten()
+        if len(nsamples) != ntrials:
+            raise ValueError("NSAMPLES must have one entry per row of RESPONSES.")
+        if np.any(nsamples > maxsamples) or np.any(nsamples < 1):
+            raise ValueError(f"NSAMPLES must be between 1 and {maxsamples}.")
+        # zero the padding so that it does not contribute to the sums
+        responses = np.where(np.arange(maxsamples)[np.newaxis, :] < nsamples[:, np.newaxis], responses, 0)
+
+    if tf == 0:
+        return np.sum(responses, axis=1) / nsamples
+
+    duration = nsamples / samplerate
+    correctnsamples = np.floor(samplerate * np.floor(duration * tf) / tf)
+    if np.any(correctnsamples == 0):
+        raise ValueError('Correctnsamples is zero')
+
+    expvec = _fourier_kernel(maxsamples, float(tf), float(samplerate))
+
+    return (2 / nsamples) * (responses @ expvec)
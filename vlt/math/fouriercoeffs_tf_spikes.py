@@ -12,10 +12,20 @@ def fouriercoeffs_tf_spikes(spiketimes, tf, duration):
 
     The function calculates (2/DURATION) * exp(-2*pi*sqrt(-1)*tf).
     If tf is zero it returns the number of spikes times divided by the duration.
+
+    TF can also be a vector of F frequencies (such as [0, tf, 2*tf] for F0, F1
+    and F2); then the exponent is evaluated once for all (F x spikes) pairs and
+    F is a vector with one coefficient per frequency.
     """
 
     spiketimes = np.array(spiketimes).flatten()
 
+    if np.ndim(tf) > 0:
+        tf = np.array(tf, dtype=float).flatten()
+        f = np.sum(np.exp(-2 * np.pi * 1j * tf[:, np.newaxis] * spiketimes[np.newaxis, :]), axis=1) * (2 / duration)
+        f[tf == 0] = len(spiketimes) / duration
+        return f
+
     if tf == 0:
         f = len(spiketimes) / duration
     else:
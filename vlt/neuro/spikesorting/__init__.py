@@ -2,3 +2,7 @@ from .centerspikes_neg import centerspikes_neg
 from .oversamplespikes import oversamplespikes
 from .spikewaves2pca import spikewaves2pca
 from .cluster_initializeclusterinfo import cluster_initializeclusterinfo
+from .cluster_summaries import cluster_summaries
+from .cluster_quality import cluster_quality
+from .spikewaves2features import spikewaves2features
+from .extract_waveforms import extract_waveforms
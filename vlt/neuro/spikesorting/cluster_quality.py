@@ -0,0 +1,112 @@
+import numpy as np
+from scipy.stats import chi2
+
+def cluster_quality(features, clusterids, chunk_size=10000):
+    """
+    Compute isolation distance and L-ratio for each cluster of spikes.
+
+    [CLUSTERNUMBERS, ISOLATIONDISTANCE, LRATIO] = cluster_quality(FEATURES, CLUSTERIDS, [CHUNK_SIZE])
+
+    Computes two Mahalanobis distance based measures of cluster quality for each
+    cluster in the feature space FEATURES (such as those returned by spikewaves2pca).
+    For each cluster, the squared Mahalanobis distance of every spike to the cluster
+    center is computed using the covariance of the cluster's own spikes.
+
+    The isolation distance of a cluster with n spikes is the squared Mahalanobis
+    distance of the n-th closest spike that is not a member of the cluster
+    (Harris et al. 2001). It is NaN if there are fewer than n spikes outside the cluster.
+
+    The L-ratio of a cluster is L/n, where L is the sum over all spikes outside of
+    the cluster of the probability that a member of the cluster would be at least
+    that far from the cluster center (chi-square distribution with P degrees of
+    freedom) (Schmitzer-Torbert et al. 2005).
+
+    Inputs:
+        features: A P x NumSpikes array of features (P features for each spike).
+        clusterids: a vector with one cluster id per spike. Spikes whose cluster id is
+            NaN do not form a cluster but are counted as spikes outside every cluster.
+        chunk_size: (optional) the number of spikes for which distances are computed
+            at a time (default 10000).
+
+    Outputs:
+        clusternumbers: the sorted unique cluster ids (length C).
+        isolationdistance: the isolation distance of each cluster (length C).
+        lratio: the L-ratio of each cluster (length C).
+
+    Clusters with no more spikes than features have a singular covariance; their
+    measures are returned as NaN.
+    """
+
+    features = np.array(features, dtype=float)
+    if features.ndim == 1:
+        features = features[np.newaxis, :]
+    clusterids = np.array(clusterids, dtype=float).flatten()
+
+    P, K = features.shape
+    if len(clusterids) != K:
+        raise ValueError(f"Number of cluster ids ({len(clusterids)}) does not match the number of spikes ({K}).")
+
+    X = features.T # K x P
+
+    assigned = ~np.isnan(clusterids)
+    clusternumbers, inverse = np.unique(clusterids[assigned], return_inverse=True)
+    labels = np.full(K, -1, dtype=int)
+    labels[assigned] = inverse
+
+    C = len(clusternumbers)
+    counts = np.bincount(inverse, minlength=C)
+
+    isolationdistance = np.full(C, np.nan)
+    lratio = np.full(C, np.nan)
+
+    # cluster centers and covariances, computed once
+    centers = np.zeros((C, P))
+    covs = np.tile(np.eye(P), (C, 1, 1))
+    valid = counts > P
+    for c in np.where(valid)[0]:
+        members = X[labels == c]
+        centers[c] = np.mean(members, axis=0)
+        covs[c] = np.cov(members, rowvar=False).reshape(P, P)
+
+    try:
+        chol = np.linalg.cholesky(covs)
+    except np.linalg.LinAlgError:
+        chol = np.tile(np.eye(P), (C, 1, 1))
+        for c in np.where(valid)[0]:
+            try:
+                chol[c] = np.linalg.cholesky(covs[c])
+            except np.linalg.LinAlgError:
+                valid[c] = False
+
+    # the distances are reduced chunk by chunk: for each cluster, only the n smallest
+    # distances of outside spikes seen so far are kept, and the L-ratio sum is accumulated
+    closest = [np.empty(0) for c in range(C)]
+    num_outside = np.zeros(C, dtype=int)
+    sf_sums = np.zeros(C)
+    cluster_index = np.arange(C)[:, np.newaxis]
+
+    for start in range(0, K, chunk_size):
+        stop = min(start + chunk_size, K)
+        # squared Mahalanobis distance of the chunk's spikes to every cluster center, C x chunk
+        diffs = X[np.newaxis, start:stop, :] - centers[:, np.newaxis, :] # C x chunk x P
+        z = np.linalg.solve(chol, diffs.transpose(0, 2, 1)) # C x P x chunk
+        d2 = np.sum(z**2, axis=1)
+
+        outside = labels[np.newaxis, start:stop] != cluster_index # C x chunk
+        num_outside += np.sum(outside, axis=1)
+        sf_sums += np.sum(np.where(outside, chi2.sf(d2, P), 0), axis=1)
+
+        for c in np.where(valid)[0]:
+            n = counts[c]
+            candidates = np.concatenate([closest[c], d2[c, outside[c]]])
+            if len(candidates) > n:
+                candidates = np.partition(candidates, n - 1)[:n]
+            closest[c] = candidates
+
+    for c in np.where(valid)[0]:
+        n = counts[c]
+        if num_outside[c] >= n:
+            isolationdistance[c] = np.max(closest[c])
+        lratio[c] = sf_sums[c] / n
+
+    return clusternumbers, isolationdistance, lratio
@@ -0,0 +1,87 @@
+import numpy as np
+from vlt.file.custom_file_formats import readvhlspikewaveformfile, vhlspikewaveformfile_layout
+
+def cluster_summaries(waveform_file, clusterids, chunk_size=10000):
+    """
+    Compute spike counts, mean and standard deviation shapes of each cluster.
+
+    [CLUSTERNUMBERS, COUNTS, MEANSHAPES, STDSHAPES] = cluster_summaries(WAVEFORM_FILE, CLUSTERIDS, [CHUNK_SIZE])
+
+    Reads the spike waveforms in WAVEFORM_FILE (a VHL spike waveform file, see
+    vlt.file.custom_file_formats.newvhlspikewaveformfile) CHUNK_SIZE spikes at a time
+    and accumulates the sum, sum of squares, and number of spikes of each cluster
+    in a single pass, so the whole set of waveforms never needs to be in memory.
+
+    Inputs:
+        waveform_file: the filename (or open binary file object) of the spike waveform file.
+        clusterids: a vector with one cluster id per spike in the file. Spikes whose
+            cluster id is NaN are not assigned to any cluster and are ignored.
+        chunk_size: (optional) the number of spikes to read at a time (default 10000).
+
+    Outputs:
+        clusternumbers: the sorted unique cluster ids (length C).
+        counts: the number of spikes in each cluster (length C); this is the
+            'number_of_spikes' field of the clusterinfo structure.
+        meanshapes: a NumSamples x NumChannels x C array with the mean waveform of
+            each cluster; meanshapes[:, :, c] is the 'meanshape' field of the clusterinfo
+            structure (see cluster_initializeclusterinfo).
+        stdshapes: a NumSamples x NumChannels x C array with the standard deviation
+            (N-1 normalization, as in MATLAB) of each cluster's waveforms.
+    """
+
+    clusterids = np.array(clusterids, dtype=float).flatten()
+
+    close_at_end = False
+    if isinstance(waveform_file, str):
+        fid = open(waveform_file, 'rb')
+        close_at_end = True
+    else:
+        fid = waveform_file
+
+    try:
+        _, parameters = readvhlspikewaveformfile(fid, wave_start=0)
+        fid.seek(0, 2)
+        layout = vhlspikewaveformfile_layout(parameters, fid.tell())
+        samples_per_channel = layout['samples_per_channel']
+        num_channels = parameters['numchannels']
+        wave_size = layout['wave_size']
+        total_waves = layout['num_waves']
+
+        if len(clusterids) != total_waves:
+            raise ValueError(f"Number of cluster ids ({len(clusterids)}) does not match the number of spikes in the file ({total_waves}).")
+
+        assigned = ~np.isnan(clusterids)
+        clusternumbers, inverse = np.unique(clusterids[assigned], return_inverse=True)
+        labels = np.full(len(clusterids), -1, dtype=int)
+        labels[assigned] = inverse
+
+        C = len(clusternumbers)
+        counts = np.bincount(inverse, minlength=C)
+        sums = np.zeros((C, wave_size))
+        sumsquares = np.zeros((C, wave_size))
+
+        for start in range(0, total_waves, chunk_size):
+            stop = min(start + chunk_size, total_waves)
+            waves, _ = readvhlspikewaveformfile(fid, wave_start=start + 1, wave_end=stop)
+            # readvhlspikewaveformfile returns a samples x channels x spikes view of
+            # spikes x channels x samples data; undo the transpose to get one row per spike
+            w = waves.transpose(2, 1, 0).reshape(stop - start, wave_size).astype(np.float64)
+            labels_here = labels[start:stop]
+            keep = labels_here >= 0
+            np.add.at(sums, labels_here[keep], w[keep])
+            np.add.at(sumsquares, labels_here[keep], w[keep]**2)
+    finally:
+        if close_at_end:
+            fid.close()
+
+    n = counts[:, np.newaxis].astype(float)
+    means = sums / np.maximum(n, 1)
+    # MATLAB's std of a single observation is 0
+    variances = (sumsquares - n * means**2) / np.maximum(n - 1, 1)
+    stds = np.sqrt(np.maximum(variances, 0))
+
+    # rows are C x (channels*samples); return as samples x channels x C like the waveforms
+    meanshapes = means.reshape(C, num_channels, samples_per_channel).transpose(2, 1, 0)
+    stdshapes = stds.reshape(C, num_channels, samples_per_channel).transpose(2, 1, 0)
+
+    return clusternumbers, counts, meanshapes, stdshapes
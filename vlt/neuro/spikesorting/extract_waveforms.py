@@ -0,0 +1,102 @@
+import numpy as np
+from vlt.file.custom_file_formats import vhsb_memmap, addvhlspikewaveformfile
+from vlt.signal.point2samplelabel import point2samplelabel
+
+def extract_waveforms(vhsb, spike_times, S0, S1, channels, out=None, chunk_size=10000):
+    """
+    Extract spike waveforms around a set of spike times from a VHSB file.
+
+    WAVES = extract_waveforms(VHSB, SPIKE_TIMES, S0, S1, CHANNELS, [OUT], [CHUNK_SIZE])
+
+    Cuts the samples S0..S1 (inclusive, relative to the sample closest to each spike
+    time) out of the VHLab series binary file VHSB for each spike time in SPIKE_TIMES.
+    The file must have a constant sampling interval. Spike times are converted to
+    samples with vlt.signal.point2samplelabel, sorted, and all windows of a chunk of
+    CHUNK_SIZE spikes are gathered from a memory-mapped view of the file with a
+    single fancy index, so the whole recording is never loaded.
+
+    Inputs:
+        vhsb: the filename of the VHSB file
+        spike_times: a vector of spike times, in the units of the file's X axis
+        S0: the first sample of each window relative to the spike (e.g., -10)
+        S1: the last sample of each window relative to the spike (e.g., 25)
+        channels: the channel numbers to extract (numbered from 1, as in MATLAB)
+        out: (optional) where to write the waveforms. It can be None (default; a new
+            array is allocated), a preallocated writeable floating point array (such as
+            float32) of size (S1-S0+1) x numel(CHANNELS) x numel(SPIKE_TIMES), or the
+            filename (or open binary file object) of a VHL spike waveform file (already
+            created with vlt.file.custom_file_formats.newvhlspikewaveformfile) to which
+            the waveforms are appended. A ValueError is raised if an OUT array has
+            the wrong size or dtype.
+        chunk_size: (optional) the number of spikes to gather at a time (default 10000).
+
+    Outputs:
+        waves: a (S1-S0+1) x numel(CHANNELS) x numel(SPIKE_TIMES) float32 array of spike
+            waveforms in the order of SPIKE_TIMES (the layout used by spikewaves2pca).
+            Samples that fall outside of the recording are NaN. If OUT is a spike
+            waveform file, OUT is returned instead.
+    """
+
+    y, h = vhsb_memmap(vhsb)
+
+    if not h['X_constantinterval']:
+        raise ValueError("extract_waveforms requires a VHSB file with a constant sampling interval.")
+
+    spike_times = np.array(spike_times, dtype=float).flatten()
+    channels = np.array(channels, dtype=int).flatten() - 1
+    if np.any(channels < 0) or np.any(channels >= y.shape[1]):
+        raise ValueError(f"Channels must be in 1..{y.shape[1]}.")
+
+    K = len(spike_times)
+    M = int(S1) - int(S0) + 1
+    D = len(channels)
+    offsets = np.arange(int(S0), int(S1) + 1)
+
+    tofile = isinstance(out, str) or hasattr(out, 'write')
+    if out is None:
+        waves = np.empty((M, D, K), dtype=np.float32)
+    elif tofile:
+        waves = None
+    else:
+        # checked as numpy checks the OUT argument of a ufunc, so that a wrong buffer
+        # is not silently truncated or broadcast into
+        if not isinstance(out, np.ndarray):
+            raise ValueError("OUT must be a numpy array, a spike waveform file, or None.")
+        if out.shape != (M, D, K):
+            raise ValueError(f"OUT must be of size {(M, D, K)}, not {out.shape}.")
+        if not np.can_cast(np.float32, out.dtype, casting='same_kind'):
+            raise ValueError(f"OUT must have a floating point dtype, not {out.dtype}.")
+        if not out.flags.writeable:
+            raise ValueError("OUT must be writeable.")
+        waves = out
+
+    # 0-based sample index of each spike
+    s = point2samplelabel(spike_times, h['X_increment'], h['X_start']) - 1
+
+    for start in range(0, K, chunk_size):
+        stop = min(start + chunk_size, K)
+        order = np.argsort(s[start:stop], kind='stable')
+        base = s[start:stop][order]
+
+        idx = base[:, np.newaxis] + offsets[np.newaxis, :] # spikes x M
+        outside = (idx < 0) | (idx >= h['num_samples'])
+        idx = np.clip(idx, 0, max(h['num_samples'] - 1, 0))
+
+        chunk = y[idx[:, :, np.newaxis], channels[np.newaxis, np.newaxis, :]].astype(np.float32) # spikes x M x D
+        if h['Y_usescale']:
+            chunk = ((chunk - h['Y_offset']) * h['Y_scale']).astype(np.float32)
+        chunk[outside] = np.nan
+
+        # back to the order of spike_times, as M x D x spikes
+        unsorted = np.empty_like(chunk)
+        unsorted[order] = chunk
+        unsorted = unsorted.transpose(1, 2, 0)
+
+        if tofile:
+            addvhlspikewaveformfile(out, unsorted)
+        else:
+            waves[:, :, start:stop] = unsorted
+
+    if tofile:
+        return out
+    return waves
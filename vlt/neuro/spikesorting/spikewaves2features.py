@@ -0,0 +1,109 @@
+import numpy as np
+from vlt.file.custom_file_formats import readvhlspikewaveformfile, vhlspikewaveformfile_layout
+
+def spikewaves2features(waves, features=('peak', 'trough', 'p2t_width', 'energy', 'slope'), chunk_size=10000):
+    """
+    Compute simple shape features of spike waveforms.
+
+    FEATURES = spikewaves2features(WAVES, [FEATURES], [CHUNK_SIZE])
+
+    Creates a set of "features" of the spike waveforms WAVES by computing simple
+    shape measurements of each spike on each channel. All spikes and channels are
+    processed at once with reductions along the sample axis.
+
+    Inputs:
+        waves: A NumSamples x NumChannels x NumSpikes array of spike waveforms (the
+            layout used by spikewaves2pca), or the filename (or open binary file object)
+            of a VHL spike waveform file, which is read CHUNK_SIZE spikes at a time.
+        features: (optional) a list of the features to compute, in order. Default is
+            ['peak', 'trough', 'p2t_width', 'energy', 'slope'].
+            Feature name:  | Description:
+            ------------------------------------------------------------------
+            peak           | The maximum value of the waveform
+            trough         | The minimum value of the waveform
+            p2t_width      | The number of samples between the trough and the largest
+                           |   value that follows it
+            energy         | The sum of the squared values of the waveform
+            slope          | The average slope (per sample) from the trough to the
+                           |   largest value that follows it (0 if the trough is
+                           |   the last sample)
+        chunk_size: (optional) the number of spikes to read at a time if WAVES is a file
+            (default 10000).
+
+    Outputs:
+        features: A (NumFeatures*NumChannels) x NumSpikes C-contiguous float32 array.
+            Rows are grouped by feature; within each feature there is one row per channel.
+    """
+
+    if isinstance(features, str):
+        features = [features]
+    features = [f.lower() for f in features]
+    known = ['peak', 'trough', 'p2t_width', 'energy', 'slope']
+    for f in features:
+        if f not in known:
+            raise ValueError(f"Unknown feature {f}; must be one of {known}.")
+
+    if isinstance(waves, str) or hasattr(waves, 'read'):
+        close_at_end = False
+        if isinstance(waves, str):
+            fid = open(waves, 'rb')
+            close_at_end = True
+        else:
+            fid = waves
+        try:
+            _, parameters = readvhlspikewaveformfile(fid, wave_start=0)
+            C = parameters['numchannels']
+            fid.seek(0, 2)
+            K = vhlspikewaveformfile_layout(parameters, fid.tell())['num_waves']
+
+            out = np.empty((len(features) * C, K), dtype=np.float32)
+            for start in range(0, K, chunk_size):
+                stop = min(start + chunk_size, K)
+                w, _ = readvhlspikewaveformfile(fid, wave_start=start + 1, wave_end=stop)
+                out[:, start:stop] = _shape_features(w, features)
+        finally:
+            if close_at_end:
+                fid.close()
+        return out
+
+    waves = np.array(waves)
+    if waves.ndim == 2:
+        waves = waves[:, np.newaxis, :]
+
+    return np.ascontiguousarray(_shape_features(waves, features), dtype=np.float32)
+
+def _shape_features(waves, features):
+    """
+    Compute the features of a NumSamples x NumChannels x NumSpikes array.
+
+    Returns a (NumFeatures*NumChannels) x NumSpikes array.
+    """
+    S, C, K = waves.shape
+    waves = waves.astype(np.float64)
+
+    out = np.empty((len(features), C, K))
+    trough_idx = None
+    after_idx = None
+
+    if any(f in ('p2t_width', 'slope') for f in features):
+        trough_idx = np.argmin(waves, axis=0) # C x K
+        sample = np.arange(S)[:, np.newaxis, np.newaxis]
+        after = np.where(sample >= trough_idx[np.newaxis], waves, -np.inf)
+        after_idx = np.argmax(after, axis=0) # C x K
+
+    for i, f in enumerate(features):
+        if f == 'peak':
+            out[i] = np.max(waves, axis=0)
+        elif f == 'trough':
+            out[i] = np.min(waves, axis=0)
+        elif f == 'p2t_width':
+            out[i] = after_idx - trough_idx
+        elif f == 'energy':
+            out[i] = np.sum(waves**2, axis=0)
+        elif f == 'slope':
+            width = after_idx - trough_idx
+            rise = np.take_along_axis(waves, after_idx[np.newaxis], axis=0)[0] - \
+                np.take_along_axis(waves, trough_idx[np.newaxis], axis=0)[0]
+            out[i] = np.where(width > 0, rise / np.maximum(width, 1), 0)
+
+    return out.reshape(len(features) * C, K)
@@ -32,49 +32,33 @@ def findcontrolstimulus(stimid, controlstimid):
     if len(controlstimid) == 0:
         return np.array([])
 
-    numstims = np.max(stimid)
+    numstims = int(np.max(stimid))
 
     reps, isregular = stimids2reps(stimid, numstims)
 
-    controlstimnumber = []
-
     isregular = (isregular and (len(controlstimid) == 1))
 
     if isregular:
         R = np.max(reps) if len(reps) > 0 else 0
-
-        for r in range(1, R): # 1 to R-1
-            rep_inds = np.where(reps == r)[0]
-            stimids_in_rep = stimid[rep_inds]
-
-            idx_in_rep = np.where(stimids_in_rep == controlstimid[0])[0]
-            if len(idx_in_rep) > 0:
-                control_idx_in_rep = idx_in_rep[0]
-                control_idx_global = (r - 1) * numstims + control_idx_in_rep
-                controlstimnumber.extend([control_idx_global] * numstims)
-            else:
-                pass
-
-        # Last rep (R)
-        if R > 0:
-            rep_inds = np.where(reps == R)[0]
-            stimids_in_rep = stimid[rep_inds]
-            idx_in_rep = np.where(stimids_in_rep == controlstimid[0])[0]
-
-            if len(idx_in_rep) > 0:
-                 control_idx_in_rep = idx_in_rep[0]
-                 control_idx_global = (R - 1) * numstims + control_idx_in_rep
-                 controlstimnumber.extend([control_idx_global] * numstims)
-            else:
-                 # Last trial may not be complete.
-                 if R > 1:
-                     rep_prev_inds = np.where(reps == R - 1)[0]
-                     stimids_in_prev_rep = stimid[rep_prev_inds]
-                     idx_in_prev_rep = np.where(stimids_in_prev_rep == controlstimid[0])[0]
-                     if len(idx_in_prev_rep) > 0:
-                         control_idx_prev_in_rep = idx_in_prev_rep[0]
-                         control_idx_prev_global = (R - 2) * numstims + control_idx_prev_in_rep
-                         controlstimnumber.extend([control_idx_prev_global] * numstims)
+        if R == 0:
+            return np.array([])
+
+        # position of the control stimulus within each complete repetition 1..R-1,
+        # found for all repetitions at once
+        is_control = stimid[:(R - 1) * numstims].reshape(R - 1, numstims) == controlstimid[0]
+        has_control = np.any(is_control, axis=1)
+        rep_control = np.arange(R - 1) * numstims + np.argmax(is_control, axis=1)
+        rep_control = list(rep_control[has_control])
+
+        # Last rep (R); the last trial may not be complete, in which case the control
+        # stimulus of the previous repetition is used
+        idx_in_rep = np.where(stimid[(R - 1) * numstims:] == controlstimid[0])[0]
+        if len(idx_in_rep) > 0:
+            rep_control.append((R - 1) * numstims + idx_in_rep[0])
+        elif R > 1 and has_control[-1]:
+            rep_control.append(rep_control[-1])
+
+        controlstimnumber = np.repeat(np.array(rep_control, dtype=int), numstims)
     else:
         # Not regular
         cs_inds = np.where(np.isin(stimid, controlstimid))[0]
@@ -82,9 +66,13 @@ def findcontrolstimulus(stimid, controlstimid):
         if len(cs_inds) == 0:
              return np.array([])
 
+        # nearest control stimulus by binary search of the (sorted) control indices;
+        # on a tie the earlier control stimulus is taken
         stimid_indices = np.arange(len(stimid))
-        cs_dist_matrix = np.abs(stimid_indices[None, :] - cs_inds[:, None])
-        min_indices = np.argmin(cs_dist_matrix, axis=0)
-        controlstimnumber = cs_inds[min_indices]
+        after = np.searchsorted(cs_inds, stimid_indices, side='left')
+        before = np.clip(after - 1, 0, len(cs_inds) - 1)
+        after = np.clip(after, 0, len(cs_inds) - 1)
+        take_before = np.abs(stimid_indices - cs_inds[before]) <= np.abs(cs_inds[after] - stimid_indices)
+        controlstimnumber = np.where(take_before, cs_inds[before], cs_inds[after])
 
     return np.array(controlstimnumber)
@@ -1,5 +1,4 @@
 import numpy as np
-from vlt.data.eqlen import eqlen
 
 def stimids2reps(stimids, numstims):
     """
@@ -37,18 +36,17 @@ def stimids2reps(stimids, numstims):
 
     isregular = True # look for evidence that contradicts
 
-    for r in range(1, R): # 1 to R-1
-        # In MATLAB: sort(stimids(find(reps==r)))
-        # reps starts at 1.
-        current_reps_indices = np.where(reps == r)[0]
-        current_stimids = stimids[current_reps_indices]
-        if not eqlen(np.sort(current_stimids), np.arange(1, numstims + 1)):
+    # Complete repetitions 1..R-1: each row, sorted, must be exactly 1..NUMSTIMS
+    if R > 1:
+        n = int(numstims)
+        complete = np.sort(stimids[:(R - 1) * n].reshape(R - 1, n), axis=1)
+        if not np.all(complete == np.arange(1, n + 1)):
             isregular = False
             return reps, isregular
 
     # Last repetition (R)
     if R > 0:
-        laststims = stimids[np.where(reps == R)[0]]
+        laststims = stimids[(R - 1) * int(numstims):]
 
         # are all stimid numbers in range?
         in_range = np.all((laststims <= numstims) & (laststims >= 1))
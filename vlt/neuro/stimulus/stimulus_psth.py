@@ -0,0 +1,128 @@
+import numpy as np
+import scipy.sparse
+
+def stimulus_psth(spike_times, stim_onsetoffsetid, bin_edges, pre=0, post=None, rasters=False):
+    """
+    STIMULUS_PSTH - compute peri-stimulus time histograms of spike trains
+
+    PSTH = vlt.neuro.stimulus.stimulus_psth(SPIKE_TIMES, STIM_ONSETOFFSETID, BIN_EDGES, [PRE], [POST], [RASTERS])
+
+    Inputs:
+      SPIKE_TIMES is a vector of spike times (s), or a list of such vectors with one
+          entry per unit.
+      STIM_ONSETOFFSETID is a variable that describes the stimulus history. Each row should
+          contain [stim_onset_time stim_offset_time stimid] where the times are in units of
+          SPIKE_TIMES (s).
+      BIN_EDGES is a vector of bin edges in seconds relative to each stimulus onset. Each
+          bin includes its left edge and excludes its right edge. If BIN_EDGES is a scalar,
+          it is taken as the bin width, and bins of that width are laid out from -PRE to
+          POST seconds around the onset.
+      PRE is the time before each onset to include when BIN_EDGES is a bin width (default 0).
+      POST is the time after each onset to include when BIN_EDGES is a bin width (default:
+          the longest stimulus duration).
+      RASTERS, if true, also returns the binned spike counts of each trial as sparse matrices.
+
+    The spikes of each trial are located with a binary search of the sorted spike times,
+    and the spikes of all trials are binned at once with a single bincount over
+    trial-offset bin numbers, so the work grows linearly with the number of spikes
+    and trials.
+
+    Computes a dictionary PSTH with fields:
+    Field name:                   | Description:
+    ------------------------------------------------------------------------
+    stimid                        | The unique stimulus ids (S)
+    bin_edges                     | The bin edges relative to stimulus onset (B+1)
+    bin_centers                   | The centers of the bins (B)
+    n                             | The number of trials of each stimulus (S)
+    mean                          | The mean firing rate (spikes/s) in each bin across the
+                                  |   trials of each stimulus (S x B, or U x S x B if
+                                  |   SPIKE_TIMES is a list of U units)
+    sem                           | The standard error of the mean of the rates (same size
+                                  |   as mean; NaN for stimuli with a single trial)
+    trialstimid                   | The stimulus id of each trial (N) (only if RASTERS)
+    raster                        | A sparse N x B matrix of spike counts of each trial (or a
+                                  |   list of U such matrices) (only if RASTERS)
+    """
+
+    stim_onsetoffsetid = np.array(stim_onsetoffsetid, dtype=float).reshape(-1, 3)
+    onsets = stim_onsetoffsetid[:, 0]
+    trialstimid = stim_onsetoffsetid[:, 2]
+    N = len(onsets)
+
+    bin_edges = np.array(bin_edges, dtype=float).flatten()
+    if bin_edges.size == 1:
+        if post is None:
+            post = np.max(stim_onsetoffsetid[:, 1] - onsets) if N > 0 else 0
+        width = bin_edges[0]
+        if width <= 0:
+            raise ValueError("The bin width must be positive.")
+        nbins = max(1, int(np.ceil((post + pre) / width - 1e-9)))
+        bin_edges = -pre + width * np.arange(nbins + 1)
+    if bin_edges.size < 2 or np.any(np.diff(bin_edges) <= 0):
+        raise ValueError("BIN_EDGES must be increasing and define at least one bin.")
+    B = bin_edges.size - 1
+
+    multiunit = isinstance(spike_times, (list, tuple)) and len(spike_times) > 0 and np.ndim(spike_times[0]) > 0
+    units = spike_times if multiunit else [spike_times]
+
+    stimid, stim_index = np.unique(trialstimid, return_inverse=True)
+    S = len(stimid)
+    n = np.bincount(stim_index, minlength=S)
+    # flat (stimulus, bin) index of each (trial, bin)
+    stimbin = (stim_index[:, np.newaxis] * B + np.arange(B)[np.newaxis, :]).ravel()
+
+    means = []
+    sems = []
+    raster_list = []
+    for u in units:
+        counts = _trial_counts(np.sort(np.array(u, dtype=float).flatten()), onsets, bin_edges)
+        if rasters:
+            raster_list.append(scipy.sparse.csr_matrix(counts))
+        rates = counts / np.diff(bin_edges)[np.newaxis, :]
+
+        sums = np.bincount(stimbin, weights=rates.ravel(), minlength=S * B).reshape(S, B)
+        sumsq = np.bincount(stimbin, weights=(rates ** 2).ravel(), minlength=S * B).reshape(S, B)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = sums / n[:, np.newaxis]
+            var = (sumsq - n[:, np.newaxis] * mean ** 2) / (n[:, np.newaxis] - 1)
+            sem = np.sqrt(np.maximum(var, 0) / n[:, np.newaxis])
+        sem[n < 2, :] = np.nan
+        means.append(mean)
+        sems.append(sem)
+
+    psth = {
+        'stimid': stimid,
+        'bin_edges': bin_edges,
+        'bin_centers': (bin_edges[:-1] + bin_edges[1:]) / 2,
+        'n': n,
+        'mean': np.array(means) if multiunit else means[0],
+        'sem': np.array(sems) if multiunit else sems[0],
+    }
+    if rasters:
+        psth['trialstimid'] = trialstimid
+        psth['raster'] = raster_list if multiunit else raster_list[0]
+
+    return psth
+
+def _trial_counts(spikes, onsets, bin_edges):
+    """
+    Spike counts of each trial in each bin (N x B) for sorted SPIKES.
+    """
+    N = len(onsets)
+    B = len(bin_edges) - 1
+
+    # span of spikes of each trial
+    lo = np.searchsorted(spikes, onsets + bin_edges[0], side='left')
+    hi = np.searchsorted(spikes, onsets + bin_edges[-1], side='left')
+    nspikes = hi - lo
+    total = int(np.sum(nspikes))
+
+    # index of every spike of every trial, concatenated trial by trial
+    trial = np.repeat(np.arange(N), nspikes)
+    starts = np.cumsum(nspikes) - nspikes
+    idx = np.arange(total) - np.repeat(starts, nspikes) + np.repeat(lo, nspikes)
+
+    b = np.searchsorted(bin_edges, spikes[idx] - onsets[trial], side='right') - 1
+    b = np.clip(b, 0, B - 1) # guards against round-off at the outer edges
+
+    return np.bincount(trial * B + b, minlength=N * B).reshape(N, B)
@@ -0,0 +1,384 @@
+import numpy as np
+from vlt.neuro.stimulus.findcontrolstimulus import findcontrolstimulus
+
+class StimulusResponseAccumulator:
+    """
+    vlt.neuro.stimulus.StimulusResponseAccumulator - compute stimulus responses as data arrive
+
+    ACC = vlt.neuro.stimulus.StimulusResponseAccumulator(...)
+
+    Computes the same mean responses as vlt.neuro.stimulus.stimulus_response_scalar, but
+    for data that arrive in pieces, such as in a closed-loop experiment. Chunks of data
+    are added with ADD_DATA and completed stimulus presentations with ADD_STIMULI, in any
+    interleaving. Each stimulus response is computed once, as soon as the data cover its
+    stimulus and prestimulus windows, and is added to running per-stimid sums, so the
+    tuning curve returned by CURVE is always up to date and costs O(1) to update per trial.
+
+    Windows are evaluated with binary searches of the timestamps and running cumulative
+    sums of the data, so each response costs O(log T). Data older than the prestimulus
+    window of the most recent stimulus are discarded, which requires stimuli to be added
+    in the order in which they were presented. The retained data are kept in a buffer
+    that grows by doubling, so adding a chunk costs time proportional to the chunk.
+
+    While data arrive, the control stimulus of each stimulus is the closest control
+    stimulus in the presentation order (if 2 are equally close, the first one); it is
+    assigned as soon as a control stimulus at or after the stimulus has been added.
+    Whether the design is regular (see vlt.neuro.stimulus.findcontrolstimulus) is only
+    known once all stimuli have been added, so when FINISH is called the control stimuli
+    are assigned by findcontrolstimulus, as in stimulus_response_scalar: for a regular
+    design with a single control stimulus id, each stimulus then uses the control
+    stimulus of its own repetition. As in stimulus_response_scalar, if the windows of
+    the control stimulus extend beyond the data, the response of the stimulus is NaN;
+    it is then removed from the tuning curve once the control stimulus's response is
+    computed (and restored if FINISH assigns it another control stimulus).
+
+    This class takes name/value pairs that modify its behavior:
+    Parameter (default)         | Description
+    ------------------------------------------------------------------------
+    control_stimid ([])         | Stimulus id(s) of the control stimulus
+    prestimulus_time ([])       | Duration of the prestimulus window, if any
+    prestimulus_normalization   | How to normalize by the prestimulus response:
+      ([])                      |   'none', 'subtract', 'fractional', or 'divide'
+    isspike (0)                 | 1 if the data are spike events (timestamps of
+                                |   spikes with values of 1); responses are then
+                                |   counts divided by the window duration
+
+    See also: vlt.neuro.stimulus.stimulus_response_scalar
+    """
+
+    def __init__(self, control_stimid=[], prestimulus_time=[], prestimulus_normalization=[], isspike=0):
+        self.control_stimid = np.array(control_stimid).flatten()
+        self.prestimulus_time = prestimulus_time
+        self.pt = 0
+        if prestimulus_time:
+            self.pt = prestimulus_time if np.isscalar(prestimulus_time) else prestimulus_time[0]
+        if isinstance(prestimulus_normalization, str):
+            prestimulus_normalization = prestimulus_normalization.lower()
+        self.prestimulus_normalization = prestimulus_normalization
+        self.isspike = isspike
+
+        # data buffer: timestamps, and cumulative sums (with a leading zero row) of the
+        # NaN-zeroed values and of the NaN indicators; the retained data are
+        # _tbuf[_start:_start+_len] (and _start:_start+_len+1 of the sums)
+        self._tbuf = np.zeros(0)
+        self._csumbuf = None
+        self._cnanbuf = None
+        self._start = 0
+        self._len = 0
+        self._channels = None
+        self._first_time = None
+        self._covered_until = -np.inf
+        self._finished = False
+
+        # stimuli
+        self._onset = []
+        self._offset = []
+        self._stimid = []
+        self._response = [] # response of each stimulus, or None if not yet computed
+        self._computed = [] # response of each stimulus before its control is checked, or None
+        self._oob = [] # whether the windows of each stimulus extend beyond the data, or None
+        self._control = [] # index of the control stimulus of each stimulus, or None
+        self._control_inds = [] # indexes of the control stimuli, in order
+        self._next_pending = 0 # first stimulus whose response may not be computed yet
+        self._next_unresolved = 0 # first stimulus whose control may not be known yet
+        self._control_check = [] # stimuli whose control's out-of-bounds state is not yet applied
+
+        # running sums for the tuning curve
+        self._curve_index = {}
+        self._curve_n = []
+        self._curve_sum = []
+        self._curve_sumsq = []
+
+    def add_data(self, timestamps, values, t_end=None):
+        """
+        ADD_DATA - add a chunk of data
+
+        ACC.add_data(TIMESTAMPS, VALUES, [T_END])
+
+        Appends the samples VALUES (a vector, or a TxC array with one column per channel)
+        taken at TIMESTAMPS. Chunks must be added in time order. T_END, if given, is the
+        time up to which all data have now been added (for spike data, for example, it
+        is the end of the period that was searched for spikes); by default it is the last
+        of TIMESTAMPS.
+        """
+        timestamps = np.array(timestamps, dtype=float).flatten()
+        values = np.array(values, dtype=float)
+        if values.ndim < 2:
+            values = values.reshape(-1)
+        if values.shape[0] != len(timestamps):
+            raise ValueError("VALUES must have one row per timestamp.")
+        if self._channels is None:
+            self._channels = values.shape[1:]
+            self._csumbuf = np.zeros((1,) + self._channels)
+            self._cnanbuf = np.zeros((1,) + self._channels)
+        elif values.shape[1:] != self._channels:
+            raise ValueError(f"VALUES must have shape (T,) + {self._channels}.")
+        if len(timestamps) > 0:
+            if np.any(np.diff(timestamps) < 0) or (len(self._t) > 0 and timestamps[0] < self._t[-1]):
+                raise ValueError("Data must be added in time order.")
+            if self._first_time is None:
+                self._first_time = timestamps[0]
+
+            self._append(timestamps, values)
+
+        if t_end is None:
+            t_end = timestamps[-1] if len(timestamps) > 0 else -np.inf
+        self._covered_until = max(self._covered_until, t_end)
+        self._update()
+
+    def add_stimuli(self, stim_onsetoffsetid):
+        """
+        ADD_STIMULI - add completed stimulus presentations
+
+        ACC.add_stimuli(STIM_ONSETOFFSETID)
+
+        Appends stimulus presentations; each row of STIM_ONSETOFFSETID should contain
+        [stim_onset_time stim_offset_time stimid]. Stimuli must be added in the order in
+        which they were presented.
+        """
+        rows = np.array(stim_onsetoffsetid, dtype=float).reshape(-1, 3)
+        for onset, offset, stimid in rows:
+            if len(self._onset) > 0 and onset < self._onset[-1]:
+                raise ValueError("Stimuli must be added in the order in which they were presented.")
+            if stimid in self.control_stimid:
+                self._control_inds.append(len(self._onset))
+            self._onset.append(onset)
+            self._offset.append(offset)
+            self._stimid.append(int(stimid))
+            self._response.append(None)
+            self._computed.append(None)
+            self._oob.append(None)
+            self._control.append(None)
+        self._update()
+
+    def finish(self):
+        """
+        FINISH - indicate that all data and stimuli have been added
+
+        ACC.finish()
+
+        Computes the responses of any stimuli whose windows extend past the data (these
+        are NaN for non-spike data, as in stimulus_response_scalar) and assigns the
+        control stimuli with vlt.neuro.stimulus.findcontrolstimulus, so that a regular
+        design uses the control stimulus of the same repetition.
+        """
+        self._finished = True
+        self._update()
+        self._assign_final_controls()
+
+    @property
+    def stimid(self):
+        """
+        The stimulus id of each stimulus added so far.
+        """
+        return np.array(self._stimid, dtype=int)
+
+    @property
+    def response(self):
+        """
+        The response to each stimulus added so far (NaN if not yet computed).
+        """
+        return self._stack(self._response)
+
+    @property
+    def controlstimnumber(self):
+        """
+        The index of the control stimulus of each stimulus (NaN if not known).
+        """
+        return np.array([np.nan if c is None else c for c in self._control])
+
+    @property
+    def control_response(self):
+        """
+        The response to the control stimulus of each stimulus (NaN if not known).
+        """
+        return self._stack([None if c is None else self._response[c] for c in self._control])
+
+    @property
+    def curve(self):
+        """
+        A dictionary with the current tuning curve, with fields
+        stimid (the stimulus ids, sorted), mean, std, sem, and n (the number of non-NaN
+        responses), with one row per stimulus id.
+        """
+        stimids = np.array(sorted(self._curve_index), dtype=int)
+        order = [self._curve_index[s] for s in stimids]
+        shape = (len(stimids),) + (self._channels or ())
+        n = np.array(self._curve_n, dtype=float)[order].reshape(shape)
+        sums = np.array(self._curve_sum, dtype=float)[order].reshape(shape)
+        sumsq = np.array(self._curve_sumsq, dtype=float)[order].reshape(shape)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(n > 0, sums / n, np.nan)
+            var = np.where(n > 1, (sumsq - n * mean ** 2) / (n - 1), np.nan)
+            std = np.sqrt(np.maximum(var, 0))
+            sem = std / np.sqrt(n)
+        return {'stimid': stimids, 'mean': mean, 'std': std, 'sem': sem, 'n': n}
+
+    @property
+    def _t(self):
+        return self._tbuf[self._start:self._start + self._len]
+
+    @property
+    def _csum(self):
+        return None if self._csumbuf is None else self._csumbuf[self._start:self._start + self._len + 1]
+
+    @property
+    def _cnan(self):
+        return None if self._cnanbuf is None else self._cnanbuf[self._start:self._start + self._len + 1]
+
+    def _append(self, timestamps, values):
+        # append samples to the buffer, moving the retained data to the front of the buffer
+        # (and doubling its size if it is more than half full) when the end is reached
+        n = len(timestamps)
+        needed = self._len + n
+        if self._start + needed > len(self._tbuf):
+            capacity = len(self._tbuf) if 2 * needed <= len(self._tbuf) else max(2 * needed, 1024)
+            tbuf = np.empty(capacity)
+            csumbuf = np.empty((capacity + 1,) + self._channels)
+            cnanbuf = np.empty((capacity + 1,) + self._channels)
+            tbuf[:self._len] = self._t
+            csumbuf[:self._len + 1] = self._csum
+            cnanbuf[:self._len + 1] = self._cnan
+            self._tbuf, self._csumbuf, self._cnanbuf = tbuf, csumbuf, cnanbuf
+            self._start = 0
+        end = self._start + self._len
+        isnan = np.isnan(values)
+        self._tbuf[end:end + n] = timestamps
+        self._csumbuf[end + 1:end + n + 1] = self._csumbuf[end] + np.cumsum(np.where(isnan, 0, values), axis=0)
+        self._cnanbuf[end + 1:end + n + 1] = self._cnanbuf[end] + np.cumsum(isnan, axis=0)
+        self._len += n
+
+    def _stack(self, values):
+        shape = self._channels or ()
+        return np.array([np.full(shape, np.nan) if v is None else v for v in values]).reshape((len(values),) + shape)
+
+    def _window_mean(self, t0, t1, right, duration):
+        # mean (or rate, for spikes) of the data in [t0, t1) or [t0, t1] (if RIGHT)
+        lo = np.searchsorted(self._t, t0, side='left')
+        hi = np.searchsorted(self._t, t1, side='right' if right else 'left')
+        s = self._csum[hi] - self._csum[lo]
+        nancount = self._cnan[hi] - self._cnan[lo]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if not self.isspike:
+                count = (hi - lo) - nancount
+                return np.where(count > 0, s / np.maximum(count, 1), np.nan)
+            if duration <= 0:
+                return np.zeros(s.shape)
+            return np.where(nancount > 0, np.nan, s / duration)
+
+    def _compute(self, i):
+        onset, offset = self._onset[i], self._offset[i]
+        shape = self._channels or ()
+        self._oob[i] = bool(not self.isspike and (self._first_time is None or self._first_time > onset or
+                                                  (self._covered_until < offset)))
+        if self._oob[i]:
+            return np.full(shape, np.nan)
+        if self._csum is None:
+            return np.zeros(shape)
+
+        r = self._window_mean(onset, offset, True, offset - onset)
+        if self.prestimulus_time and self.pt > 0:
+            p = self._window_mean(onset - self.pt, onset, False, self.pt)
+        else:
+            p = np.zeros(r.shape)
+
+        norm = self.prestimulus_normalization
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if norm in [1, 'subtract']:
+                r = r - p
+            elif norm in [2, 'fractional']:
+                r = np.where(p != 0, (r - p) / p, np.nan)
+            elif norm in [3, 'divide']:
+                r = np.where(p != 0, r / p, np.nan)
+        return np.array(r, dtype=float).reshape(shape)
+
+    def _add_to_curve(self, stimid, r, sign=1):
+        # add (or, if SIGN is -1, remove) a response from the running sums
+        if stimid not in self._curve_index:
+            self._curve_index[stimid] = len(self._curve_n)
+            zero = np.zeros(self._channels or ())
+            self._curve_n.append(zero.copy())
+            self._curve_sum.append(zero.copy())
+            self._curve_sumsq.append(zero.copy())
+        k = self._curve_index[stimid]
+        good = ~np.isnan(r)
+        self._curve_n[k] = self._curve_n[k] + sign * good
+        self._curve_sum[k] = self._curve_sum[k] + sign * np.where(good, r, 0)
+        self._curve_sumsq[k] = self._curve_sumsq[k] + sign * np.where(good, r, 0) ** 2
+
+    def _set_response(self, i):
+        self._computed[i] = self._compute(i)
+        self._response[i] = self._computed[i]
+        self._add_to_curve(self._stimid[i], self._response[i])
+
+    def _assign_final_controls(self):
+        # with all stimuli known, assign the controls as stimulus_response_scalar does;
+        # the responses of stimuli whose control changes are recomputed from the
+        # responses before the control check
+        N = len(self._stimid)
+        if N == 0:
+            return
+        controlstimnumber = findcontrolstimulus(self._stimid, self.control_stimid)
+        control = [None] * N
+        for i, c in enumerate(controlstimnumber[:N]):
+            if not np.isnan(c) and c < N:
+                control[i] = int(c)
+        for i in range(N):
+            if control[i] == self._control[i]:
+                continue
+            self._control[i] = control[i]
+            c = i if control[i] is None else control[i]
+            r = self._computed[i]
+            if self._oob[c] and not self._oob[i]:
+                r = np.full(r.shape, np.nan)
+            self._add_to_curve(self._stimid[i], self._response[i], sign=-1)
+            self._response[i] = r
+            self._add_to_curve(self._stimid[i], r)
+
+    def _update(self):
+        N = len(self._onset)
+
+        # responses of stimuli whose windows are now covered by the data
+        while self._next_pending < N and (self._finished or self._offset[self._next_pending] <= self._covered_until):
+            i = self._next_pending
+            if self._response[i] is None:
+                self._set_response(i)
+            self._next_pending += 1
+        # stimuli added in order may still finish out of order; compute any later ones that are ready
+        for i in range(self._next_pending, N):
+            if self._response[i] is None and self._offset[i] <= self._covered_until:
+                self._set_response(i)
+
+        # control stimuli that can no longer change
+        cs = self._control_inds
+        while self._next_unresolved < N and len(cs) > 0:
+            i = self._next_unresolved
+            after = np.searchsorted(cs, i, side='left')
+            if after == len(cs) and not self._finished:
+                break
+            candidates = [cs[j] for j in (after - 1, after) if 0 <= j < len(cs)]
+            self._control[i] = min(candidates, key=lambda c: (abs(c - i), c))
+            if self._control[i] != i:
+                self._control_check.append(i)
+            self._next_unresolved += 1
+
+        # stimuli whose control's windows extend beyond the data have a NaN response, as
+        # in stimulus_response_scalar
+        waiting = []
+        for i in self._control_check:
+            c = self._control[i]
+            if self._oob[c] is None or self._response[i] is None:
+                waiting.append(i)
+            elif self._oob[c] and not self._oob[i]:
+                self._add_to_curve(self._stimid[i], self._response[i], sign=-1)
+                self._response[i] = np.full(self._response[i].shape, np.nan)
+        self._control_check = waiting
+
+        # discard data that no stimulus can need any more
+        if N > 0 and len(self._t) > 0:
+            keep_from = self._onset[-1] - self.pt
+            if self._next_pending < N:
+                keep_from = min(keep_from, self._onset[self._next_pending] - self.pt)
+            k = int(np.searchsorted(self._t, keep_from, side='left'))
+            self._start += k
+            self._len -= k
@@ -1,7 +1,7 @@
 import numpy as np
-import vlt.neuro.stimulus.findcontrolstimulus as fcs
-import vlt.math.fouriercoeffs_tf2 as ftf2
-import vlt.math.fouriercoeffs_tf_spikes as ftfs
+from vlt.neuro.stimulus.findcontrolstimulus import findcontrolstimulus
+from vlt.math.fouriercoeffs_tf2 import fouriercoeffs_tf2
+from vlt.math.fouriercoeffs_tf_spikes import fouriercoeffs_tf_spikes
 
 def stimulus_response_scalar(timeseries, timestamps, stim_onsetoffsetid, **kwargs):
     """
@@ -11,17 +11,44 @@ def stimulus_response_scalar(timeseries, timestamps, stim_onsetoffsetid, **kwarg
 
     Inputs:
       TIMESERIES is a 1xT array of the data values of the thing exhibiting the response, such as
-          a voltage signal, calcium dF/F signal, or spike signals (1s).
+          a voltage signal, calcium dF/F signal, or spike signals (1s). TIMESERIES can also be
+          a TxC array with one column per channel (or ROI) sharing the same TIMESTAMPS; the
+          windows and control stimuli are then computed once and all channels are reduced together.
       TIMESTAMPS is a 1xT array of the occurrences of the signals in TIMESERIES
       STIM_ONSETOFFSETID is a variable that describes the stimulus history. Each row should
           contain [stim_onset_time stim_offset_time stimid] where the times are in units of TIMESTAMPS (s).
 
+    The samples of each stimulus window are located with a binary search of TIMESTAMPS
+    (which are sorted first if necessary), and mean and spike-count responses are
+    computed from NaN-aware cumulative sums, so each window costs O(1) after a single
+    O(T) pass over the data.
+
+    This function also takes name/value pairs that modify its behavior:
+    Parameter (default)         | Description
+    ------------------------------------------------------------------------
+    freq_response (0)           | Frequency at which to compute the response; 0 is
+                                |   the mean. Can be a vector indexed by stimid.
+    control_stimid ([])         | Stimulus id(s) of the control stimulus
+    prestimulus_time ([])       | Duration of the prestimulus window, if any
+    prestimulus_normalization   | How to normalize by the prestimulus response:
+      ([])                      |   'none', 'subtract', 'fractional', or 'divide'
+    isspike (0)                 | 1 if TIMESERIES is a spike train
+    spiketrain_dt (0.001)       | Sample interval of spike trains
+    harmonics (None)            | Multiples of freq_response at which to compute
+                                |   responses all at once (e.g., [0, 1, 2] for F0,
+                                |   F1 and F2). If given, responses have a last
+                                |   dimension with one entry per harmonic.
+
     Computes a dictionary RESPONSE with fields:
     Field name:                   | Description:
     ------------------------------------------------------------------------
     stimid                        | The stimulus id of each stimulus observed
-    response                      | The scalar response to each stimulus response.
+    response                      | The scalar response to each stimulus response
+                                  |   (N, or NxC if TIMESERIES has C columns; with
+                                  |   an extra last dimension of size numel(HARMONICS)
+                                  |   if HARMONICS is given).
     control_response              | The scalar response to the control stimulus for each stimulus
+                                  |   (same size as response).
     controlstimnumber             | The stimulus number used as the control stimulus for each stimulus
     parameters                    | A structure with the parameters used in the calculation
     """
@@ -32,6 +59,7 @@ def stimulus_response_scalar(timeseries, timestamps, stim_onsetoffsetid, **kwarg
     prestimulus_normalization = kwargs.get('prestimulus_normalization', [])
     isspike = kwargs.get('isspike', 0)
     spiketrain_dt = kwargs.get('spiketrain_dt', 0.001)
+    harmonics = kwargs.get('harmonics', None)
 
     # Store parameters
     # In MATLAB: parameters = vlt.data.workspace2struct(); then remove some fields.
@@ -42,202 +70,207 @@ def stimulus_response_scalar(timeseries, timestamps, stim_onsetoffsetid, **kwarg
         'prestimulus_time': prestimulus_time,
         'prestimulus_normalization': prestimulus_normalization,
         'isspike': isspike,
-        'spiketrain_dt': spiketrain_dt
+        'spiketrain_dt': spiketrain_dt,
+        'harmonics': harmonics
     }
     # Add any extra kwargs
     parameters.update(kwargs)
 
-    timeseries = np.array(timeseries).flatten()
     timestamps = np.array(timestamps).flatten()
+    timeseries = np.array(timeseries)
+    if timeseries.ndim < 2 or min(timeseries.shape) == 1 and timeseries.size == len(timestamps):
+        timeseries = timeseries.flatten()
+    elif timeseries.ndim != 2 or timeseries.shape[0] != len(timestamps):
+        raise ValueError("TIMESERIES must be a vector or a TxC array with one row per timestamp.")
+    multichannel = timeseries.ndim == 2
+
+    def col(v):
+        # make a per-stimulus vector broadcast against per-stimulus x channel arrays
+        return v[:, np.newaxis] if multichannel else v
+
     stim_onsetoffsetid = np.array(stim_onsetoffsetid)
 
+    if len(timestamps) > 1 and np.any(np.diff(timestamps) < 0):
+        order = np.argsort(timestamps, kind='stable')
+        timestamps = timestamps[order]
+        timeseries = timeseries[order]
+
     stimid = stim_onsetoffsetid[:, 2].astype(int)
-    response = np.full(len(stimid), np.nan)
-    control_response = np.full(len(stimid), np.nan)
+    onsets = stim_onsetoffsetid[:, 0]
+    offsets = stim_onsetoffsetid[:, 1]
+    N = len(stimid)
 
     sample_rate = 0
     if len(timestamps) > 1:
         sample_rate = 1.0 / np.median(np.diff(timestamps))
 
-    controlstimnumber = fcs.findcontrolstimulus(stimid, control_stimid)
+    controlstimnumber = findcontrolstimulus(stimid, control_stimid)
+
+    # index of the control stimulus of each stimulus, or -1 if there is none
+    control = np.full(N, -1, dtype=int)
+    n_c = min(len(controlstimnumber), N)
+    if n_c > 0:
+        cs = np.array(controlstimnumber[:n_c], dtype=float)
+        valid = ~np.isnan(cs)
+        valid[valid] = cs[valid] < N
+        control[:n_c][valid] = cs[valid].astype(int)
+    has_control = control >= 0
+    control_or_self = np.where(has_control, control, np.arange(N))
 
     if prestimulus_normalization:
         if isinstance(prestimulus_normalization, str):
             prestimulus_normalization = prestimulus_normalization.lower()
 
-    for i in range(len(stimid)):
-        stimulus_samples = np.where((timestamps >= stim_onsetoffsetid[i, 0]) &
-                                    (timestamps <= stim_onsetoffsetid[i, 1]))[0]
+    pt = 0
+    if prestimulus_time: # Check if not empty/None/0
+        pt = prestimulus_time if np.isscalar(prestimulus_time) else prestimulus_time[0] # handle list
 
-        control_stim_here = None
-        control_stimulus_samples = []
+    # sample windows [lo, hi) of each stimulus and prestimulus period
+    stim_lo = np.searchsorted(timestamps, onsets, side='left')
+    stim_hi = np.searchsorted(timestamps, offsets, side='right')
+    if prestimulus_time and pt > 0:
+        pre_lo = np.searchsorted(timestamps, onsets - pt, side='left')
+        pre_hi = np.searchsorted(timestamps, onsets, side='left')
+    else:
+        pre_lo = np.zeros(N, dtype=int)
+        pre_hi = np.zeros(N, dtype=int)
 
-        # Access controlstimnumber safely
-        if len(controlstimnumber) > i and not np.isnan(controlstimnumber[i]):
-            control_stim_here = int(controlstimnumber[i])
-            if control_stim_here < len(stim_onsetoffsetid): # Bound check
-                control_stimulus_samples = np.where((timestamps >= stim_onsetoffsetid[control_stim_here, 0]) &
-                                                    (timestamps <= stim_onsetoffsetid[control_stim_here, 1]))[0]
-            else:
-                 control_stim_here = None # Invalid index
+    outofbounds = np.zeros(N, dtype=bool)
+    if not isspike and len(timestamps) > 0:
+        oob = (timestamps[-1] < offsets) | (timestamps[0] > onsets)
+        outofbounds = oob | (has_control & oob[control_or_self])
 
-        outofbounds1 = False
-        outofbounds2 = False
+    # frequency at which to evaluate the response to each stimulus
+    freq_response = np.array(freq_response).flatten()
+    if freq_response.size > 1:
+        # freq_response is indexed by stimid (1-based); out of range stimids use the first entry
+        idx = stimid - 1
+        in_range = (idx >= 0) & (idx < freq_response.size)
+        freq_here = np.where(in_range, freq_response[np.clip(idx, 0, freq_response.size - 1)], freq_response[0])
+    else:
+        freq_here = np.full(N, freq_response[0] if freq_response.size > 0 else 0)
 
+    # N x H frequencies, one column per requested harmonic
+    if harmonics is None:
+        freqs = freq_here[:, np.newaxis].astype(float)
+    else:
+        freqs = freq_here[:, np.newaxis] * np.array(harmonics, dtype=float).flatten()[np.newaxis, :]
+    H = freqs.shape[1]
+
+    is_fourier = freqs != 0
+    dtype = complex if np.any(is_fourier) else float
+
+    # responses of each stimulus window (value) and of the window when it is used as a control,
+    # N x H (x C)
+    shape = (N, H) + timeseries.shape[1:]
+    stim_value = np.zeros(shape, dtype=dtype)
+    pre_value = np.zeros(shape, dtype=dtype)
+    control_value = np.zeros(shape, dtype=dtype)
+    control_pre_value = np.zeros(shape, dtype=dtype)
+
+    def expand(v):
+        # make a per-stimulus vector broadcast against N x H (x C) arrays
+        return v.reshape((N,) + (1,) * (len(shape) - 1))
+
+    if np.any(~is_fourier):
+        sums, counts, nancounts = _window_sums(timeseries, stim_lo, stim_hi)
         if not isspike:
-            if len(timestamps) > 0:
-                outofbounds1 = (timestamps[-1] < stim_onsetoffsetid[i, 1]) or (timestamps[0] > stim_onsetoffsetid[i, 0])
-                if control_stim_here is not None:
-                     outofbounds2 = (timestamps[-1] < stim_onsetoffsetid[control_stim_here, 1]) or (timestamps[0] > stim_onsetoffsetid[control_stim_here, 0])
+            window_mean = _nanmean_from_sums(sums, counts)
         else:
-            outofbounds1 = False
-            outofbounds2 = False
+            dur = col(offsets - onsets)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                window_mean = np.where(dur > 0, sums / dur, 0)
+            window_mean[(nancounts > 0) & (dur > 0)] = np.nan
 
-        if outofbounds1 or outofbounds2:
-            response_here = np.nan
-            control_response_here = np.nan
-        else:
-            prestimulus_samples = []
-            control_prestimulus_samples = []
-
-            if prestimulus_time: # Check if not empty/None/0
-                pt = prestimulus_time if np.isscalar(prestimulus_time) else prestimulus_time[0] # handle list
-                if pt > 0:
-                    prestimulus_samples = np.where((timestamps >= stim_onsetoffsetid[i, 0] - pt) &
-                                                   (timestamps < stim_onsetoffsetid[i, 0]))[0]
-                    if control_stim_here is not None:
-                         control_prestimulus_samples = np.where((timestamps >= stim_onsetoffsetid[control_stim_here, 0] - pt) &
-                                                                (timestamps < stim_onsetoffsetid[control_stim_here, 0]))[0]
-
-            # Calculate response
-
-            # Handle freq_response per stimulus
-            freq_response_here = freq_response
-            if np.size(freq_response) > 1:
-                try:
-                    # stimid[i] is 1-based or 0-based?
-                    # In MATLAB usually 1-based. stimids2reps assumed 1..NUMSTIMS.
-                    # freq_response(stimid(i)).
-                    # If stimid starts at 1, we need stimid[i]-1 for python index.
-                    # Or maybe stimid values are arbitrary?
-                    # "stimid values may repeat many times".
-                    # If freq_response is a vector, it assumes it is indexed by stimid.
-                    # I will assume stimid corresponds to index if it's within range.
-                    idx = int(stimid[i]) - 1 # Assuming 1-based stimid mapped to 0-based index
-                    if idx >= 0 and idx < np.size(freq_response):
-                         freq_response_here = freq_response[idx]
-                    else:
-                         freq_response_here = freq_response[0]
-                except:
-                    freq_response_here = freq_response[0] # Fallback
-
-            response_here = 0
-            control_response_here = 0
-            prestimulus_here = 0
-            control_prestimulus_here = 0
-
-            if freq_response_here == 0:
-                if not isspike:
-                    response_here = np.nanmean(timeseries[stimulus_samples]) if len(stimulus_samples) > 0 else np.nan
-                    control_response_here = np.nanmean(timeseries[control_stimulus_samples]) if len(control_stimulus_samples) > 0 else np.nan
-                else:
-                    dur = stim_onsetoffsetid[i, 1] - stim_onsetoffsetid[i, 0]
-                    response_here = np.sum(timeseries[stimulus_samples]) / dur if dur > 0 else 0
-                    if control_stim_here is not None:
-                        dur_c = stim_onsetoffsetid[control_stim_here, 1] - stim_onsetoffsetid[control_stim_here, 0]
-                        control_response_here = np.sum(timeseries[control_stimulus_samples]) / dur_c if dur_c > 0 else 0
-
-                if prestimulus_time:
-                    if not isspike:
-                         prestimulus_here = np.nanmean(timeseries[prestimulus_samples]) if len(prestimulus_samples) > 0 else np.nan
-                         control_prestimulus_here = np.nanmean(timeseries[control_prestimulus_samples]) if len(control_prestimulus_samples) > 0 else np.nan
-                    else:
-                         pt = prestimulus_time if np.isscalar(prestimulus_time) else prestimulus_time[0]
-                         prestimulus_here = np.sum(timeseries[prestimulus_samples]) / pt if pt > 0 else 0
-                         control_prestimulus_here = np.sum(timeseries[control_prestimulus_samples]) / pt if pt > 0 else 0
+        if prestimulus_time:
+            sums, counts, nancounts = _window_sums(timeseries, pre_lo, pre_hi)
+            if not isspike:
+                pre_mean = _nanmean_from_sums(sums, counts)
+            elif pt > 0:
+                pre_mean = sums / pt
+                pre_mean[nancounts > 0] = np.nan
             else:
-                 # Fourier
-                 if not isspike:
-                     if len(stimulus_samples) > 0:
-                         response_here = ftf2.fouriercoeffs_tf2(timeseries[stimulus_samples], freq_response_here, sample_rate)
-                     if len(control_stimulus_samples) > 0:
-                         control_response_here = ftf2.fouriercoeffs_tf2(timeseries[control_stimulus_samples], freq_response_here, sample_rate)
-                 else:
-                     if len(stimulus_samples) > 0:
-                         dur = stim_onsetoffsetid[i, 1] - stim_onsetoffsetid[i, 0]
-                         response_here = ftfs.fouriercoeffs_tf_spikes(timestamps[stimulus_samples] - stim_onsetoffsetid[i, 0], freq_response_here, dur)
-                     if len(control_stimulus_samples) > 0:
-                         dur_c = stim_onsetoffsetid[control_stim_here, 1] - stim_onsetoffsetid[control_stim_here, 0]
-                         control_response_here = ftfs.fouriercoeffs_tf_spikes(timestamps[control_stimulus_samples] - stim_onsetoffsetid[control_stim_here, 0], freq_response_here, dur_c)
-
-                 if prestimulus_time:
-                     if not isspike:
-                         if len(prestimulus_samples) > 0:
-                             prestimulus_here = ftf2.fouriercoeffs_tf2(timeseries[prestimulus_samples], freq_response_here, sample_rate)
-                         if len(control_prestimulus_samples) > 0:
-                             control_prestimulus_here = ftf2.fouriercoeffs_tf2(timeseries[control_prestimulus_samples], freq_response_here, sample_rate)
-                     else:
-                         pt = prestimulus_time if np.isscalar(prestimulus_time) else prestimulus_time[0]
-                         if len(prestimulus_samples) > 0:
-                             prestimulus_here = ftfs.fouriercoeffs_tf_spikes(timestamps[prestimulus_samples] - stim_onsetoffsetid[i, 0] + pt, freq_response_here, pt) # MATLAB subtracts prestimulus_time logic?
-                             # MATLAB: timestamps - stim_start - prestimulus_time.
-                             # timestamps are in range [start-pre, start].
-                             # so timestamps - start is [-pre, 0].
-                             # minus prestimulus_time?
-                             # MATLAB: timestamps(prestimulus_samples)-stim_onsetoffsetid(i,1)-prestimulus_time
-                             # Wait, if timestamps are [start-pre, start], then timestamps-start is [-pre, 0].
-                             # Subtracting pre gives [-2pre, -pre].
-                             # This seems wrong for fourier of [0, duration]?
-                             # `fouriercoeffs_tf_spikes` expects times relative to window start?
-                             # Or just times.
-                             # If we want the phase to be consistent, we might want it relative to stim start?
-                             # If we treat the prestimulus window as a window of length `pre`.
-                             # If we shift it to start at 0?
-                             # timestamps - (start - pre) = timestamps - start + pre.
-                             # MATLAB: `timestamps(...) - start - pre`. This seems weird.
-                             # Let's check MATLAB code again.
-                             # `timestamps(prestimulus_samples)-stim_onsetoffsetid(i,1)-prestimulus_time`
-                             # This shifts times to be very negative.
-                             # Maybe it's a typo in MATLAB or I misunderstand?
-                             # "timestamps(prestimulus_samples)" are near "start".
-                             # Actually they are `start-pre` to `start`.
-                             # So `timestamps - start` is `[-pre, 0]`.
-                             # `timestamps - start - pre` is `[-2pre, -pre]`.
-                             # This is probably not what is intended for a fourier transform of a segment, unless phase matters relative to something way back.
-                             # But `fouriercoeffs_tf_spikes` just does `sum(exp(-i*2*pi*f*t))`.
-                             # If t is shifted, phase is shifted.
-                             # If we want to compare magnitude, it doesn't matter.
-                             # If we subtract `start-pre` (start of window), we get `[0, pre]`.
-                             # That would be `timestamps - (stim_onsetoffsetid(i,1) - prestimulus_time)`.
-                             # = `timestamps - stim + pre`.
-                             # MATLAB has `- pre`.
-                             # Maybe I should just copy MATLAB exactly?
-                             # `timestamps - stim_onsetoffsetid(i,1) - prestimulus_time`.
-
-                             prestimulus_here = ftfs.fouriercoeffs_tf_spikes(timestamps[prestimulus_samples] - stim_onsetoffsetid[i, 0] - pt, freq_response_here, pt)
-
-                         if len(control_prestimulus_samples) > 0:
-                             control_prestimulus_here = ftfs.fouriercoeffs_tf_spikes(timestamps[control_prestimulus_samples] - stim_onsetoffsetid[control_stim_here, 0] - pt, freq_response_here, pt)
-
-            if prestimulus_normalization:
-                norm = prestimulus_normalization
-                if norm in [0, 'none']:
-                    pass
-                elif norm in [1, 'subtract']:
-                    response_here = response_here - prestimulus_here
-                    control_response_here = control_response_here - control_prestimulus_here
-                elif norm in [2, 'fractional']:
-                    response_here = (response_here - prestimulus_here) / prestimulus_here if prestimulus_here != 0 else np.nan
-                    control_response_here = (control_response_here - control_prestimulus_here) / control_prestimulus_here if control_prestimulus_here != 0 else np.nan
-                elif norm in [3, 'divide']:
-                    response_here = response_here / prestimulus_here if prestimulus_here != 0 else np.nan
-                    control_response_here = control_response_here / control_prestimulus_here if control_prestimulus_here != 0 else np.nan
-
-        response[i] = response_here
-        if control_stim_here is not None:
-            control_response[i] = control_response_here
+                pre_mean = np.zeros(window_mean.shape)
+        else:
+            pre_mean = np.zeros(window_mean.shape)
+
+        # each window is reduced once; controls just index the results
+        control_mean = window_mean[control_or_self]
+        control_pre_mean = pre_mean[control_or_self]
+        for h in range(H):
+            m = ~is_fourier[:, h]
+            stim_value[m, h] = window_mean[m]
+            control_value[m, h] = control_mean[m]
+            pre_value[m, h] = pre_mean[m]
+            control_pre_value[m, h] = control_pre_mean[m]
+
+    def fourier_window(j, f):
+        # Fourier responses of the stimulus and prestimulus windows of stimulus j at the
+        # frequencies f, one row per frequency
+        r = 0
+        p = 0
+        if not isspike:
+            if stim_hi[j] > stim_lo[j]:
+                r = fouriercoeffs_tf2(timeseries[stim_lo[j]:stim_hi[j]], f, sample_rate)
+            if prestimulus_time and pre_hi[j] > pre_lo[j]:
+                p = fouriercoeffs_tf2(timeseries[pre_lo[j]:pre_hi[j]], f, sample_rate)
         else:
-            control_response[i] = np.nan
+            if stim_hi[j] > stim_lo[j]:
+                dur = offsets[j] - onsets[j]
+                r = fouriercoeffs_tf_spikes(timestamps[stim_lo[j]:stim_hi[j]] - onsets[j], f, dur)
+            if prestimulus_time and pre_hi[j] > pre_lo[j]:
+                # MATLAB: timestamps(prestimulus_samples)-stim_onsetoffsetid(i,1)-prestimulus_time
+                p = fouriercoeffs_tf_spikes(timestamps[pre_lo[j]:pre_hi[j]] - onsets[j] - pt, f, pt)
+            if multichannel:
+                # spike Fourier coefficients depend only on the timestamps; same for every channel
+                r = np.array(r).reshape(-1, 1)
+                p = np.array(p).reshape(-1, 1)
+        return r, p
+
+    # Fourier responses of each (trial, frequencies) pair, so that a trial that is the control
+    # of many stimuli is evaluated only once
+    fourier_memo = {}
+
+    def fourier_window_memo(j, f):
+        key = (j, f.tobytes())
+        if key not in fourier_memo:
+            fourier_memo[key] = fourier_window(j, f)
+        return fourier_memo[key]
+
+    for i in np.where(np.any(is_fourier, axis=1) & ~outofbounds)[0]:
+        h = is_fourier[i]
+        stim_value[i, h], pre_value[i, h] = fourier_window_memo(i, freqs[i, h])
+        if has_control[i]:
+            control_value[i, h], control_pre_value[i, h] = fourier_window_memo(control[i], freqs[i, h])
+
+    response = stim_value
+    control_response = control_value
+
+    if prestimulus_normalization:
+        norm = prestimulus_normalization
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if norm in [0, 'none']:
+                pass
+            elif norm in [1, 'subtract']:
+                response = response - pre_value
+                control_response = control_response - control_pre_value
+            elif norm in [2, 'fractional']:
+                response = np.where(pre_value != 0, (response - pre_value) / pre_value, np.nan)
+                control_response = np.where(control_pre_value != 0, (control_response - control_pre_value) / control_pre_value, np.nan)
+            elif norm in [3, 'divide']:
+                response = np.where(pre_value != 0, response / pre_value, np.nan)
+                control_response = np.where(control_pre_value != 0, control_response / control_pre_value, np.nan)
+
+    response = np.where(expand(outofbounds), np.nan, response)
+    control_response = np.where(expand(has_control & ~outofbounds), control_response, np.nan)
+
+    if harmonics is None:
+        response = response[:, 0]
+        control_response = control_response[:, 0]
+    else:
+        # harmonics are the last dimension: N x H or N x C x H
+        response = np.moveaxis(response, 1, -1)
+        control_response = np.moveaxis(control_response, 1, -1)
 
     result = {
         'stimid': stimid,
@@ -248,3 +281,25 @@ def stimulus_response_scalar(timeseries, timestamps, stim_onsetoffsetid, **kwarg
     }
 
     return result
+
+def _window_sums(x, lo, hi):
+    """
+    Sum, number of non-NaN values, and number of NaN values of X[lo:hi] for each window.
+
+    X can be a vector or a TxC array (summed along the first axis). NaN values are
+    excluded from the sums.
+    """
+    isnan = np.isnan(x)
+    zero = np.zeros((1,) + x.shape[1:])
+    csum = np.concatenate([zero, np.cumsum(np.where(isnan, 0, x), axis=0)])
+    cnan = np.concatenate([zero, np.cumsum(isnan, axis=0)])
+    nancounts = cnan[hi] - cnan[lo]
+    counts = (hi - lo).reshape((-1,) + (1,) * (x.ndim - 1)) - nancounts
+    return csum[hi] - csum[lo], counts, nancounts
+
+def _nanmean_from_sums(sums, counts):
+    """
+    Mean of each window from its sum and number of non-NaN values; NaN if there are none.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
@@ -0,0 +1 @@
+from .responses2respstruct import responses2respstruct
@@ -1,12 +1,22 @@
 from .oridir_vectorindexes import oridir_vectorindexes
 from .oridir_fitindexes import oridir_fitindexes
+from .oridir_fitindexes_many import oridir_fitindexes_many
 from .compute_circularvariance import compute_circularvariance
 from .compute_dircircularvariance import compute_dircircularvariance
 from .compute_orientationindex import compute_orientationindex
 from .compute_directionindex import compute_directionindex
 from .compute_tuningwidth import compute_tuningwidth
 from .compute_directionsignificancedotproduct import compute_directionsignificancedotproduct
+from .compute_directionsignificancedotproduct_batch import compute_directionsignificancedotproduct_batch
 from .fit2fitoi import fit2fitoi
 from .fit2fitoidiffsum import fit2fitoidiffsum
 from .fit2fitdi import fit2fitdi
 from .fit2fitdidiffsum import fit2fitdidiffsum
+from .fit2fitindexes import fit2fitindexes
+from .fit2fitindexes_batch import fit2fitindexes_batch
+from .compute_circularvariance_batch import compute_circularvariance_batch
+from .compute_dircircularvariance_batch import compute_dircircularvariance_batch
+from .compute_orientationindex_batch import compute_orientationindex_batch
+from .compute_directionindex_batch import compute_directionindex_batch
+from .compute_tuningwidth_batch import compute_tuningwidth_batch
+from .oridir_bootstrap import oridir_bootstrap
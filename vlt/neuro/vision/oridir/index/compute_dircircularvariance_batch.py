@@ -0,0 +1,29 @@
+import numpy as np
+
+def compute_dircircularvariance_batch(angles, rates):
+    """
+    vlt.neuro.vision.oridir.index.compute_dircircularvariance_batch
+    CV = vlt.neuro.vision.oridir.index.compute_dircircularvariance_batch( ANGLES, RATES )
+
+    Computes vlt.neuro.vision.oridir.index.compute_dircircularvariance for many cells
+    at once. Takes ANGLES in degrees. RATES is a (cells x angles) matrix with one
+    tuning curve per row; the circular sums of all cells are a single matrix product
+    with EXP(I*ANGLES).
+
+    CV is a vector with one direction circular variance per cell.
+
+    See Ringach et al. J.Neurosci. 2002 22:5639-5651
+    """
+
+    angles = np.array(angles).flatten()
+    rates = np.array(rates, dtype=float).reshape(-1, len(angles))
+
+    angles_rad = angles / 360 * 2 * np.pi
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = (rates @ np.exp(1j * angles_rad)) / np.sum(np.abs(rates), axis=1)
+
+    cv = 1 - np.abs(r)
+    cv = np.round(100 * cv) / 100
+
+    return cv
@@ -0,0 +1,32 @@
+import numpy as np
+from vlt.neuro.vision.oridir.index.compute_orientationindex_batch import _offset_angle_indexes
+
+def compute_directionindex_batch(angles, rates):
+    """
+    vlt.neuro.vision.oridir.index.compute_directionindex_batch
+    DI = vlt.neuro.vision.oridir.index.compute_directionindex_batch( ANGLES, RATES )
+
+    Computes vlt.neuro.vision.oridir.index.compute_directionindex for many cells
+    at once. Takes ANGLES in degrees. RATES is a (cells x angles) matrix with one
+    tuning curve per row.
+
+    di = (maxrate - rate(stimulus in oppositedirection))/maxrate
+           di == 1 means maximally selective
+           di == 0 means not selective
+
+    DI is a vector with one direction index per cell.
+    """
+
+    angles = np.array(angles).flatten()
+    rates = np.array(rates, dtype=float).reshape(-1, len(angles))
+
+    cells = np.arange(rates.shape[0])
+    ind = np.argmax(rates, axis=1)
+    opposite = _offset_angle_indexes(tuple(angles.tolist()))[ind, 0]
+
+    m1 = rates[cells, ind]
+    m2 = rates[cells, opposite]
+
+    di = (m1 - m2) / (m1 + 0.0001)
+
+    return np.round(100 * di) / 100
@@ -0,0 +1,61 @@
+import numpy as np
+from functools import lru_cache
+from scipy.stats import t
+
+def compute_directionsignificancedotproduct_batch(angles, rates):
+    """
+    COMPUTE_DIRECTIONSIGNIFICANCEDOTPRODUCT_BATCH Direction tuning significance of many cells
+
+    P = COMPUTE_DIRECTIONSIGNIFICANCEDOTPRODUCT_BATCH(ANGLES, RATES)
+
+    Computes vlt.neuro.vision.oridir.index.compute_directionsignificancedotproduct
+    for many cells at once. The orientation and direction vectors of all trials of
+    all cells are computed with a single product with the complex exponentials of
+    ANGLES, and the one-sample t-tests of the dot products are computed together.
+
+    Inputs:  ANGLES is a vector of direction angles at which the response has
+             been measured.
+             RATES is a (cells x trials x angles) array of responses; RATES[c] holds
+             the trials of cell c, one trial per row. Cells with fewer trials can be
+             padded with NaN: trials that contain a NaN are left out.
+    Output:  P a vector with, for each cell, the probability that the "true"
+             direction tuning vector is non-zero. It is NaN for cells with fewer
+             than 2 trials.
+    """
+
+    angles = np.array(angles, dtype=float).flatten()
+    rates = np.array(rates, dtype=float)
+    if rates.ndim == 2:
+        rates = rates[np.newaxis]
+
+    valid = ~np.any(np.isnan(rates), axis=2) # cells x trials
+    n = np.sum(valid, axis=1)
+    rates = np.where(valid[:, :, np.newaxis], rates, 0)
+
+    # orientation (column 0) and direction (column 1) vectors of each trial
+    vec = np.einsum('cta,ak->ctk', rates, _direction_exponentials(tuple(angles.tolist())))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # unit orientation vector of the mean response, in direction space
+        ot_vec = np.exp(1j * np.angle(np.sum(vec[:, :, 0], axis=1) / n) / 2)
+
+        dot_prods = np.real(vec[:, :, 1] * np.conj(ot_vec)[:, np.newaxis])
+
+        m = np.sum(dot_prods, axis=1) / n
+        ss = np.sum(np.where(valid, (dot_prods - m[:, np.newaxis]) ** 2, 0), axis=1)
+        tstat = m / np.sqrt(ss / (n - 1) / n)
+
+    p = np.full(len(n), np.nan)
+    testable = n > 1
+    p[testable] = 2 * t.sf(np.abs(tstat[testable]), n[testable] - 1)
+    return p
+
+@lru_cache(maxsize=32)
+def _direction_exponentials(angles):
+    """
+    The orientation and direction exponentials of ANGLES (angles x 2).
+    """
+    angles_rad = np.array(angles) * np.pi / 180
+    E = np.column_stack([np.exp(1j * 2 * (angles_rad % np.pi)), np.exp(1j * (angles_rad % (2 * np.pi)))])
+    E.setflags(write=False)
+    return E
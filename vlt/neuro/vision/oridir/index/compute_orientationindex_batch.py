@@ -0,0 +1,47 @@
+import numpy as np
+from functools import lru_cache
+
+def compute_orientationindex_batch(angles, rates):
+    """
+    vlt.neuro.vision.oridir.index.compute_orientationindex_batch
+    OI = vlt.neuro.vision.oridir.index.compute_orientationindex_batch( ANGLES, RATES )
+
+    Computes vlt.neuro.vision.oridir.index.compute_orientationindex for many cells
+    at once. Takes ANGLES in degrees. RATES is a (cells x angles) matrix with one
+    tuning curve per row.
+
+    oi = (max + max_180 - max_90 - max_270)/(max + max_180)
+
+    The angles closest to 90, 180 and 270 degrees away from each angle are looked up
+    once per set of ANGLES, so no search is done per cell.
+
+    OI is a vector with one orientation index per cell. No interpolation is done.
+    """
+
+    angles = np.array(angles).flatten()
+    rates = np.array(rates, dtype=float).reshape(-1, len(angles))
+
+    cells = np.arange(rates.shape[0])
+    ind = np.argmax(rates, axis=1)
+    opposite = _offset_angle_indexes(tuple(angles.tolist()))[ind]
+
+    m1 = rates[cells, ind] # max rate
+    m2 = rates[cells, opposite[:, 0]] # 180 degrees away
+    m3 = rates[cells, opposite[:, 1]] # 90 degrees away
+    m4 = rates[cells, opposite[:, 2]] # 270 degrees away
+
+    oi = (m1 + m2 - m3 - m4) / (0.0001 + (m1 + m2))
+
+    return np.round(100 * oi) / 100
+
+@lru_cache(maxsize=64)
+def _offset_angle_indexes(angles):
+    """
+    For each angle, the indexes of the angles closest to it + 180, + 90 and + 270 degrees
+    (numel(ANGLES) x 3), found as in compute_orientationindex.
+    """
+    angles = np.array(angles)
+    targets = (angles[:, np.newaxis] + np.array([180, 90, 270])[np.newaxis, :]) % 360
+    table = np.argmin(np.abs(angles[np.newaxis, np.newaxis, :] - targets[:, :, np.newaxis]), axis=2)
+    table.setflags(write=False)
+    return table
@@ -0,0 +1,75 @@
+import numpy as np
+from functools import lru_cache
+
+def compute_tuningwidth_batch(angles, rates):
+    """
+    vlt.neuro.vision.oridir.index.compute_tuningwidth_batch
+    TUNINGWIDTH = vlt.neuro.vision.oridir.index.compute_tuningwidth_batch( ANGLES, RATES )
+
+    Computes vlt.neuro.vision.oridir.index.compute_tuningwidth for many cells at once.
+    Takes ANGLES in degrees. RATES is a (cells x angles) matrix with one tuning curve
+    per row.
+
+    All curves are linearly interpolated onto 0:720 degrees at once, with the
+    bracketing samples and offsets of each point computed once per set of ANGLES. The
+    interpolation uses the same arithmetic as interp1d in compute_tuningwidth, so flat
+    segments stay exactly flat and ties in the maximum and the half-height points are
+    broken in the same way. The half-height points on either side of the maximum are
+    found for all cells at once.
+
+    TUNINGWIDTH is a vector with one tuning width per cell: half of the distance
+    between the two points sandwiching the maximum where the response is 1/sqrt(2) of
+    the maximum rate, or 90 when the function does not come below that point.
+    """
+
+    angles = np.array(angles).flatten()
+    rates = np.array(rates, dtype=float).reshape(-1, len(angles))
+    cells = np.arange(rates.shape[0])
+
+    # rates = [rates rates rates(1)], interpolated at 0:720
+    ext_rates = np.concatenate([rates, rates, rates[:, :1]], axis=1)
+    order, lo, hi, dx, t = _interpolation_points(tuple(angles.tolist()))
+    ext_rates = ext_rates[:, order]
+    y_lo = ext_rates[:, lo]
+    slope = (ext_rates[:, hi] - y_lo) / dx
+    intrates = slope * t + y_lo
+
+    # [maxrate,pref]=max(intrates(181:540));
+    pref = np.argmax(intrates[:, 180:540], axis=1) + 180
+    maxrate = intrates[cells, pref]
+    halfheight = maxrate / np.sqrt(2)
+
+    # closest points to the half height within 90 degrees on either side of the maximum;
+    # pref is between 180 and 539, so both windows lie inside 0:720
+    offsets = np.arange(91)
+    left_window = intrates[cells[:, np.newaxis], pref[:, np.newaxis] - 90 + offsets]
+    right_window = intrates[cells[:, np.newaxis], pref[:, np.newaxis] + offsets]
+    left = pref - 90 + np.argmin(np.abs(left_window - halfheight[:, np.newaxis]), axis=1)
+    right = pref + np.argmin(np.abs(right_window - halfheight[:, np.newaxis]), axis=1)
+
+    tuningwidth = np.minimum((right - left) / 2.0, 90)
+
+    # returns 90 when the function does not come below the half height
+    never_below = np.min(intrates - halfheight[:, np.newaxis], axis=1) > 0
+    tuningwidth[never_below] = 90
+
+    return tuningwidth
+
+@lru_cache(maxsize=64)
+def _interpolation_points(angles):
+    """
+    The sort order of [angles angles+360 720], and for each point of 0:720 the indexes
+    of the bracketing samples (lo, hi), their distance, and the offset of the point
+    from the lower sample, as interp1d computes them (extrapolating at the ends).
+    """
+    ext_angles = np.concatenate([np.array(angles, dtype=float), np.array(angles, dtype=float) + 360, [720.0]])
+    order = np.argsort(ext_angles)
+    x = ext_angles[order]
+    fineangles = np.arange(0, 721, 1)
+    hi = np.clip(np.searchsorted(x, fineangles), 1, len(x) - 1).astype(int)
+    lo = hi - 1
+    dx = x[hi] - x[lo]
+    t = fineangles - x[lo]
+    for a in (order, lo, hi, dx, t):
+        a.setflags(write=False)
+    return order, lo, hi, dx, t
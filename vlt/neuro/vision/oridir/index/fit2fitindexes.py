@@ -0,0 +1,36 @@
+import numpy as np
+from vlt.neuro.vision.oridir.index.fit2fitindexes_batch import fit2fitindexes_batch
+from vlt.neuro.vision.oridir.index.fit2fitoi import fit2fitoi
+from vlt.neuro.vision.oridir.index.fit2fitoidiffsum import fit2fitoidiffsum
+from vlt.neuro.vision.oridir.index.fit2fitdi import fit2fitdi
+from vlt.neuro.vision.oridir.index.fit2fitdidiffsum import fit2fitdidiffsum
+
+def fit2fitindexes(R, blank=None):
+    """
+    FIT2FITINDEXES - orientation and direction indexes from a double gaussian fit
+
+    [OI, OIDIFFSUM, DI, DIDIFFSUM] = vlt.neuro.vision.oridir.index.fit2fitindexes(R)
+
+    Returns the values of vlt.neuro.vision.oridir.index.fit2fitoi, fit2fitoidiffsum,
+    fit2fitdi and fit2fitdidiffsum of the fit R, finding the preferred, null and
+    orthogonal directions only once.
+
+    R is a 2-row vector (or 2xN array).
+    row 0: directions
+    row 1: responses
+
+    If the directions are evenly spaced from 0 (such as the 0:359 of
+    vlt.neuro.vision.oridir.index.oridir_fitindexes), the indexes are computed by
+    vlt.neuro.vision.oridir.index.fit2fitindexes_batch; otherwise each function is
+    called.
+    """
+
+    R = np.array(R, dtype=float)
+    directions = R[0, :]
+    responses = R[1, :]
+    N = len(directions)
+
+    if N % 4 == 0 and np.allclose(directions, np.arange(N) * 360 / N):
+        return tuple(v[0] for v in fit2fitindexes_batch(responses))
+
+    return fit2fitoi(R), fit2fitoidiffsum(R), fit2fitdi(R), fit2fitdidiffsum(R)
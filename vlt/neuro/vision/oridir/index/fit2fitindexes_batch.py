@@ -0,0 +1,49 @@
+import numpy as np
+
+def fit2fitindexes_batch(fits):
+    """
+    FIT2FITINDEXES_BATCH - orientation and direction indexes of many double gaussian fits
+
+    [OI, OIDIFFSUM, DI, DIDIFFSUM] = vlt.neuro.vision.oridir.index.fit2fitindexes_batch(FITS)
+
+    Computes vlt.neuro.vision.oridir.index.fit2fitoi, fit2fitoidiffsum, fit2fitdi and
+    fit2fitdidiffsum for many fits at once. FITS is a (cells x N) matrix with one fit
+    curve per row, evaluated at the N evenly spaced directions 0:360/N:360-360/N
+    (such as the 0:359 fit curves of vlt.fit.otfit_carandini_batch). N must be a
+    multiple of 4.
+
+    Because the directions are evenly spaced, the null and orthogonal directions of
+    the preferred direction are found by adding N/2, N/4 and 3N/4 to its index.
+
+    OI     = (r_pref + r_null - r_orth1 - r_orth2) / (r_pref + r_null)
+    OIDIFFSUM = (r_pref + r_null - r_orth1 - r_orth2) / (r_pref + r_null + r_orth1 + r_orth2)
+    DI     = (r_pref - r_null) / r_pref
+    DIDIFFSUM = (r_pref - r_null) / (r_pref + r_null)
+
+    Each output is a vector with one value per cell; it is NaN where the
+    denominator is 0.
+    """
+
+    fits = np.array(fits, dtype=float)
+    fits = fits.reshape(-1, fits.shape[-1])
+    N = fits.shape[1]
+    if N % 4 != 0:
+        raise ValueError("The number of directions must be a multiple of 4.")
+
+    cells = np.arange(fits.shape[0])
+    pref = np.argmax(fits, axis=1)
+
+    r_p = fits[cells, pref]
+    r_n = fits[cells, (pref + N // 2) % N]
+    r_o = fits[cells, (pref + N // 4) % N] + fits[cells, (pref + 3 * N // 4) % N]
+
+    def ratio(num, denom):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(denom == 0, np.nan, num / denom)
+
+    oi = ratio(r_p + r_n - r_o, r_p + r_n)
+    oidiffsum = ratio(r_p + r_n - r_o, r_p + r_n + r_o)
+    di = ratio(r_p - r_n, r_p)
+    didiffsum = ratio(r_p - r_n, r_p + r_n)
+
+    return oi, oidiffsum, di, didiffsum
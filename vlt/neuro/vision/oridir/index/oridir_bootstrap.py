@@ -0,0 +1,106 @@
+import numpy as np
+from vlt.neuro.vision.oridir.index.compute_circularvariance_batch import compute_circularvariance_batch
+from vlt.neuro.vision.oridir.index.compute_dircircularvariance_batch import compute_dircircularvariance_batch
+from vlt.neuro.vision.oridir.index.compute_orientationindex_batch import compute_orientationindex_batch
+from vlt.neuro.vision.oridir.index.compute_directionindex_batch import compute_directionindex_batch
+from vlt.neuro.vision.oridir.index.compute_tuningwidth_batch import compute_tuningwidth_batch
+
+def oridir_bootstrap(respstruct, n_boot=1000, seed=None, ci=95):
+    """
+    ORIDIR_BOOTSTRAP - bootstrap confidence intervals of orientation/direction indexes
+
+    [CI, SAMPLES] = vlt.neuro.vision.oridir.index.oridir_bootstrap(RESPSTRUCT, [N_BOOT], [SEED], [CI])
+
+    Estimates the uncertainty of the vector indexes of
+    vlt.neuro.vision.oridir.index.oridir_vectorindexes by resampling the individual
+    trials of each direction (with replacement) N_BOOT times (default 1000). SEED seeds
+    the random number generator. CI is the width of the confidence intervals in percent
+    (default 95).
+
+    All resampled trial indexes are drawn at once into one N_BOOT x trials x directions
+    array; the resampled mean curves are found with fancy indexing, the vector sums
+    with a matrix product, and the indexes of all resamples with the batch index
+    functions, so there is no loop over resamples.
+
+    RESPSTRUCT is a dictionary of response properties with fields:
+    Field    | Description
+    -----------------------------------------------------------------------------
+    curve    |    4xnumber of directions tested,
+             |      curve[0,:] is directions tested (degrees, compass coords.)
+    ind      |    list of individual trial responses for each direction (list of arrays);
+             |      NaN responses are ignored
+
+    CI is a dictionary with the [low high] confidence interval of each index, and
+    SAMPLES a dictionary with the N_BOOT resampled values of each index:
+    ot_pref                         |   Angle preference in orientation space
+    ot_circularvariance             |   Magnitude of response in orientation space
+    ot_index                        |   Orientation index ( (pref-orth)/pref) )
+    tuning_width                    |   Vector tuning width
+    dir_pref                        |   Angle preference in direction space
+    dir_circularvariance            |   Direction index in vector space
+    dir_index                       |   Direction index
+    The direction fields are NaN if only orientations (up to 180 degrees) were tested.
+    The intervals of the preferred angles are found from the deviations of the
+    resamples from the circular mean preference, so they may extend below 0 or above
+    180 (orientation) or 360 (direction) degrees.
+    """
+
+    angles = np.array(respstruct['curve'][0, :], dtype=float)
+    A = len(angles)
+
+    # trials x directions, NaN-padded
+    trials = [np.array(t, dtype=float).flatten() for t in respstruct['ind']]
+    trials = [t[~np.isnan(t)] for t in trials]
+    n = np.array([len(t) for t in trials])
+    if np.any(n == 0):
+        raise ValueError("Each direction must have at least one trial.")
+    T = int(np.max(n))
+    padded = np.full((T, A), np.nan)
+    for a, t in enumerate(trials):
+        padded[:len(t), a] = t
+
+    # all resamples at once: idx[b, t, a] is the trial of direction a used as draw t of
+    # resample b; only the first n[a] draws of direction a are used
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, n[np.newaxis, np.newaxis, :], size=(n_boot, T, A))
+    draws = padded[idx, np.arange(A)[np.newaxis, np.newaxis, :]]
+    used = np.arange(T)[np.newaxis, :, np.newaxis] < n[np.newaxis, np.newaxis, :]
+    curves = np.sum(np.where(used, draws, 0), axis=1) / n # n_boot x directions
+
+    hasdirection = np.max(angles) > 180
+    if hasdirection:
+        tuneangles = angles
+        tunecurves = curves
+    else:
+        tuneangles = np.concatenate([angles, angles + 180])
+        tunecurves = np.concatenate([curves, curves], axis=1)
+
+    angles_rad = angles * np.pi / 180
+    samples = {
+        'ot_pref': (180 / np.pi * np.angle(curves @ np.exp(1j * 2 * (angles_rad % np.pi)))) % 180,
+        'ot_circularvariance': compute_circularvariance_batch(tuneangles, tunecurves),
+        'ot_index': compute_orientationindex_batch(tuneangles, tunecurves),
+        'tuning_width': compute_tuningwidth_batch(tuneangles, tunecurves),
+    }
+    if hasdirection:
+        samples['dir_pref'] = (180 / np.pi * np.angle(curves @ np.exp(1j * (angles_rad % (2 * np.pi))))) % 360
+        samples['dir_circularvariance'] = compute_dircircularvariance_batch(tuneangles, tunecurves)
+        samples['dir_index'] = compute_directionindex_batch(angles, curves)
+    else:
+        for name in ['dir_pref', 'dir_circularvariance', 'dir_index']:
+            samples[name] = np.full(n_boot, np.nan)
+
+    percentiles = [(100 - ci) / 2, 100 - (100 - ci) / 2]
+    intervals = {}
+    for name, values in samples.items():
+        if np.all(np.isnan(values)):
+            intervals[name] = np.array([np.nan, np.nan])
+        elif name in ['ot_pref', 'dir_pref']:
+            period = 180 if name == 'ot_pref' else 360
+            center = (period / (2 * np.pi) * np.angle(np.mean(np.exp(1j * 2 * np.pi * values / period)))) % period
+            deviation = ((values - center + period / 2) % period) - period / 2
+            intervals[name] = center + np.percentile(deviation, percentiles)
+        else:
+            intervals[name] = np.percentile(values, percentiles)
+
+    return intervals, samples
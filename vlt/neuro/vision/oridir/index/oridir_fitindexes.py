@@ -1,25 +1,37 @@
 import numpy as np
-import vlt.fit.otfit_carandini as otfit
-import vlt.neuro.vision.oridir.index.fit2fitoi as f2foi
-import vlt.neuro.vision.oridir.index.fit2fitoidiffsum as f2foids
-import vlt.neuro.vision.oridir.index.fit2fitdi as f2fdi
-import vlt.neuro.vision.oridir.index.fit2fitdidiffsum as f2fdids
+from vlt.fit.otfit_carandini import otfit_carandini
+from vlt.fit.otfit_carandini_init import otfit_carandini_init
+from vlt.neuro.vision.oridir.index.fit2fitindexes import fit2fitindexes
 from vlt.math.rectify import rectify
 from vlt.data.rowvec import rowvec
 
-def oridir_fitindexes(respstruct):
+def oridir_fitindexes(respstruct, init='widthseeds'):
     """
     ORIDIR_FITINDEXES - compute orientation/direction fits, index values
 
-    FI = vlt.neuro.vision.oridir.index.oridir_fitindexes(RESPSTRUCT)
+    FI = vlt.neuro.vision.oridir.index.oridir_fitindexes(RESPSTRUCT, [INIT])
+
+    INIT selects how the fits are started:
+      'widthseeds' | (default) fit from the best response angle with each of the
+                   |   tuning widths [da/2 da 40 60 90] and keep the best fit
+      'templates'  | start a single fit from the best of a bank of double-Gaussian
+                   |   templates (see vlt.fit.otfit_carandini_init); about 5 times
+                   |   faster and less sensitive to the starting width
     """
 
-    fi = {}
+    tuneangles, tuneresps, maxresp, da, starts = _fit_setup(respstruct, init)
+
+    fits = [_fit_seed(tuneangles, tuneresps, maxresp, da, start) for start in starts]
 
+    return _fits2fitindexes(fits)
+
+def _fit_setup(respstruct, init='widthseeds'):
+    """
+    Tuning data, hints, and starting parameters [Rsp Rp Ot sigm Rn] of the fits of RESPSTRUCT.
+    """
     resp = respstruct['curve']
     angles = resp[0, :]
     mean_resp = resp[1, :]
-    std_resp = resp[3, :] # curve(4,:) is standard error
 
     # [maxresp,if0]=max(resp(2,:));
     maxresp = np.max(mean_resp)
@@ -29,31 +41,55 @@ def oridir_fitindexes(respstruct):
     if np.max(angles) <= 180:
         tuneangles = np.concatenate([angles, angles + 180])
         tuneresps = np.concatenate([mean_resp, mean_resp])
-        tuneerr = np.concatenate([std_resp, std_resp])
     else:
         tuneangles = angles
         tuneresps = mean_resp
-        tuneerr = std_resp
 
     sorted_angles = np.sort(angles)
     da = np.diff(sorted_angles)
     da = da[0]
 
-    widthseeds = [da/2, da, 40, 60, 90]
-    errors = [float('inf')]
-
-    Rsp, Rp, Ot, sigm, Rn, fitcurve, er, R2 = None, None, None, None, None, None, None, None
-
-    for ws in widthseeds:
-        Rspt, Rpt, Ott, sigmt, Rnt, fitcurvet, ert, R2t = otfit.otfit_carandini(
-            tuneangles, 0, maxresp, otpref, ws,
+    if init == 'widthseeds':
+        widthseeds = [da/2, da, 40, 60, 90]
+        starts = [(0, maxresp, otpref, ws, maxresp) for ws in widthseeds]
+    elif init == 'templates':
+        P, _ = otfit_carandini_init(tuneangles, tuneresps,
             widthint=[da/2, 180],
             Rpint=[0, 3*maxresp],
             Rnint=[0, 3*maxresp],
-            spontint=[np.min(tuneresps), np.max(tuneresps)],
-            data=tuneresps
-        )
+            spontint=[np.min(tuneresps), np.max(tuneresps)])
+        starts = [tuple(P)]
+    else:
+        raise ValueError(f"Unknown INIT {init}; must be 'widthseeds' or 'templates'.")
+
+    return tuneangles, tuneresps, maxresp, da, starts
 
+def _fit_seed(tuneangles, tuneresps, maxresp, da, start):
+    """
+    One otfit_carandini fit from the starting parameters START = [Rsp Rp Ot sigm Rn].
+    """
+    Rsp, Rp, Ot, sigm, Rn = start
+    return otfit_carandini(
+        tuneangles, Rsp, Rp, Ot, sigm,
+        Rnhint=Rn,
+        widthint=[da/2, 180],
+        Rpint=[0, 3*maxresp],
+        Rnint=[0, 3*maxresp],
+        spontint=[np.min(tuneresps), np.max(tuneresps)],
+        data=tuneresps
+    )
+
+def _fits2fitindexes(fits):
+    """
+    Fit index values from the fits of all starting points; the first fit with the lowest error is used.
+    """
+    fi = {}
+
+    errors = [float('inf')]
+
+    Rsp, Rp, Ot, sigm, Rn, fitcurve, er, R2 = None, None, None, None, None, None, None, None
+
+    for Rspt, Rpt, Ott, sigmt, Rnt, fitcurvet, ert, R2t in fits:
         if ert < errors[0]:
              Rsp, Rp, Ot, sigm, Rn = Rspt, Rpt, Ott, sigmt, Rnt
              fitcurve = fitcurvet
@@ -65,16 +101,18 @@ def oridir_fitindexes(respstruct):
     # fi.fit = [0:359; vlt.data.rowvec(fitcurve)];
     fi['fit'] = np.vstack([np.arange(360), rowvec(fitcurve)])
 
-    fi['ot_index'] = f2foi.fit2fitoi(fi['fit'])
+    oi, oidiffsum, di, didiffsum = fit2fitindexes(fi['fit'])
+
+    fi['ot_index'] = oi
     fi['ot_index_rectified'] = min(rectify(fi['ot_index']), 1)
-    fi['ot_index_diffsum'] = f2foids.fit2fitoidiffsum(fi['fit'])
+    fi['ot_index_diffsum'] = oidiffsum
     fi['ot_index_diffsum_rectified'] = min(rectify(fi['ot_index_diffsum']), 1)
 
     fi['dirpref'] = Ot
 
-    fi['dir_index'] = f2fdi.fit2fitdi(fi['fit'])
+    fi['dir_index'] = di
     fi['dir_index_rectified'] = min(rectify(fi['dir_index']), 1)
-    fi['dir_index_diffsum'] = f2fdids.fit2fitdidiffsum(fi['fit'])
+    fi['dir_index_diffsum'] = didiffsum
     fi['dir_index_diffsum_rectified'] = min(rectify(fi['dir_index_diffsum']), 1)
 
     fi['tuning_width'] = sigm * np.sqrt(np.log(4))
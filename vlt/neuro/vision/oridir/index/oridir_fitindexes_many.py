@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from vlt.neuro.vision.oridir.index.oridir_fitindexes import _fit_setup, _fit_seed, _fits2fitindexes
+
+def oridir_fitindexes_many(respstructs, max_workers=None, chunksize=4, progress=None, init='widthseeds'):
+    """
+    ORIDIR_FITINDEXES_MANY - compute orientation/direction fits, index values for many cells
+
+    [FIS, ERRORS] = vlt.neuro.vision.oridir.index.oridir_fitindexes_many(RESPSTRUCTS, ...)
+
+    Computes vlt.neuro.vision.oridir.index.oridir_fitindexes for each response structure
+    in the list RESPSTRUCTS, using all of the cores of the computer. Each cell may be fit
+    from several starting points (such as several tuning widths); every (cell, starting
+    point) fit is an independent task, and the tasks are spread over a pool of worker
+    processes.
+
+    Inputs:
+      RESPSTRUCTS is a list of response structures (see oridir_fitindexes).
+      MAX_WORKERS is the number of worker processes (default: the number of CPUs). If it
+          is 1 (or 0), the fits are performed in this process.
+      CHUNKSIZE is the number of fits sent to a worker at a time (default 4).
+      PROGRESS, if given, is called as PROGRESS(NDONE, N) each time the fits of a cell are
+          complete, with NDONE cells of N done.
+      INIT selects how the fits are started ('widthseeds' or 'templates'; see
+          oridir_fitindexes).
+
+    Outputs:
+      FIS is a list with the fit index dictionary of each cell, in the order of
+          RESPSTRUCTS; it is None for cells that could not be fit.
+      ERRORS is a list with None for each cell that was fit, or the exception that was
+          raised while fitting the cell.
+
+    See also: vlt.neuro.vision.oridir.index.oridir_fitindexes
+    """
+
+    N = len(respstructs)
+    fis = [None] * N
+    errors = [None] * N
+
+    # the fits of each cell, one task per starting point
+    tasks = []
+    owners = []
+    for n, respstruct in enumerate(respstructs):
+        try:
+            tuneangles, tuneresps, maxresp, da, starts = _fit_setup(respstruct, init)
+        except Exception as e:
+            errors[n] = e
+            continue
+        for start in starts:
+            tasks.append((tuneangles, tuneresps, maxresp, da, start))
+            owners.append(n)
+
+    remaining = [0] * N
+    for n in owners:
+        remaining[n] += 1
+    fits = [[] for _ in range(N)]
+    ndone = 0
+
+    def collect(n, result):
+        nonlocal ndone
+        if isinstance(result, Exception):
+            if errors[n] is None:
+                errors[n] = result
+        else:
+            fits[n].append(result)
+        remaining[n] -= 1
+        if remaining[n] == 0:
+            if errors[n] is None:
+                try:
+                    fis[n] = _fits2fitindexes(fits[n])
+                except Exception as e:
+                    errors[n] = e
+            fits[n] = None
+            ndone += 1
+            if progress is not None:
+                progress(ndone, N)
+
+    # cells that failed during setup are done already
+    for n in range(N):
+        if errors[n] is not None:
+            ndone += 1
+            if progress is not None:
+                progress(ndone, N)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    if max_workers <= 1:
+        for n, result in zip(owners, map(_fit_task, tasks)):
+            collect(n, result)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # map returns the results in the order of the tasks, so the result is deterministic
+            for n, result in zip(owners, executor.map(_fit_task, tasks, chunksize=chunksize)):
+                collect(n, result)
+
+    return fis, errors
+
+def _fit_task(task):
+    """
+    One fit from one starting point; exceptions are returned rather than raised so that one cell
+    cannot stop the others.
+    """
+    try:
+        return _fit_seed(*task)
+    except Exception as e:
+        return e
@@ -0,0 +1,139 @@
+import numpy as np
+
+def responses2respstruct(stimid, response, angles_by_stimid, control_response=None, controlstimnumber=None, blank_stimid=None):
+    """
+    RESPONSES2RESPSTRUCT - build orientation/direction response structures from trial responses
+
+    RESPSTRUCT = vlt.neuro.vision.oridir.responses2respstruct(STIMID, RESPONSE, ANGLES_BY_STIMID, ...
+        [CONTROL_RESPONSE], [CONTROLSTIMNUMBER], [BLANK_STIMID])
+
+    Groups the individual trial responses RESPONSE to the stimuli STIMID (such as those
+    returned by vlt.neuro.stimulus.stimulus_response_scalar) by stimulus and computes the
+    tuning curve that vlt.neuro.vision.oridir.index.oridir_vectorindexes and
+    vlt.neuro.vision.oridir.index.oridir_fitindexes expect.
+
+    Inputs:
+      STIMID is a vector with the stimulus id of each of N trials.
+      RESPONSE is a vector of the N trial responses, or an N x M array with the
+          responses of M cells (such as all of the ROIs of an imaging field).
+      ANGLES_BY_STIMID gives the direction (degrees, compass coordinates) of each
+          stimulus. It can be a dictionary {stimid: angle} or a vector where entry k
+          is the angle of stimid k+1. Trials of stimuli without an angle (such as a
+          blank control stimulus, or an id beyond the end of the vector, or with a
+          NaN angle) are not included in the curve.
+      CONTROL_RESPONSE (optional) is a vector (or N x M array) of the control response
+          of each trial.
+      CONTROLSTIMNUMBER (optional) is the trial number of the control stimulus of each
+          trial (as returned by stimulus_response_scalar, NaN if none; entries beyond
+          the number of trials are ignored). In the output of
+          stimulus_response_scalar, the response of each control trial is repeated in
+          CONTROL_RESPONSE for every trial that uses it; if CONTROLSTIMNUMBER is given,
+          each control trial is counted only once in the blank statistics. Without it,
+          every entry of CONTROL_RESPONSE is taken to be a separate control trial.
+      BLANK_STIMID (optional) is the stimulus id (or ids) of the blank stimulus; if it
+          is given, the blank statistics are computed from the RESPONSE of the trials
+          of the blank stimulus instead of from CONTROL_RESPONSE.
+
+    The trials are grouped once with np.unique and all means, standard deviations
+    (NaN values excluded) and standard errors are computed with bincount, for all
+    cells at once.
+
+    RESPSTRUCT is a dictionary (or, if RESPONSE has M columns, a list of M dictionaries)
+    with fields:
+    Field    | Description
+    -----------------------------------------------------------------------------
+    curve    |    4xnumber of directions tested, sorted by direction
+             |      curve[0,:] is directions tested (degrees, compass coords.)
+             |      curve[1,:] is mean responses
+             |      curve[2,:] is standard deviation
+             |      curve[3,:] is standard error
+    ind      |    list of individual trial responses for each direction (list of arrays)
+    blankresp|    [mean std stderr] of the blank trials (only if CONTROL_RESPONSE or
+             |      BLANK_STIMID is given)
+    blankind |    the individual responses of the blank trials (only if given)
+    """
+
+    stimid = np.array(stimid).flatten()
+    response = np.array(response, dtype=float)
+    population = response.ndim == 2
+    if not population:
+        response = response.reshape(-1, 1)
+    if response.shape[0] != len(stimid):
+        raise ValueError("RESPONSE must have one row per entry of STIMID.")
+    M = response.shape[1]
+
+    # angle of each trial
+    if isinstance(angles_by_stimid, dict):
+        trial_angle = np.array([angles_by_stimid.get(s, np.nan) for s in stimid.tolist()], dtype=float)
+    else:
+        angles_by_stimid = np.array(angles_by_stimid, dtype=float).flatten()
+        k = stimid.astype(int) - 1
+        in_range = (k >= 0) & (k < len(angles_by_stimid))
+        trial_angle = np.where(in_range, angles_by_stimid[np.clip(k, 0, max(len(angles_by_stimid) - 1, 0))], np.nan)
+    keep = ~np.isnan(trial_angle)
+
+    angles, group = np.unique(trial_angle[keep], return_inverse=True)
+    A = len(angles)
+    r = response[keep]
+
+    # (angle, cell) statistics with one bincount each
+    good = ~np.isnan(r)
+    flat = (group[:, np.newaxis] * M + np.arange(M)[np.newaxis, :]).ravel()
+    n = np.bincount(flat, weights=good.ravel(), minlength=A * M).reshape(A, M)
+    values = np.where(good, r, 0).ravel()
+    sums = np.bincount(flat, weights=values, minlength=A * M).reshape(A, M)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(n > 0, sums / n, np.nan)
+        dev = np.where(good, r - mean[group], 0).ravel()
+        ss = np.bincount(flat, weights=dev ** 2, minlength=A * M).reshape(A, M)
+        std = np.where(n > 1, np.sqrt(ss / (n - 1)), np.where(n == 1, 0, np.nan))
+        sem = std / np.sqrt(n)
+
+    # trial responses of each angle, as row blocks of the grouped responses
+    order = np.argsort(group, kind='stable')
+    blocks = np.split(r[order], np.cumsum(np.bincount(group, minlength=A))[:-1])
+
+    # responses of the blank trials, one row per blank trial
+    c = None
+    if blank_stimid is not None:
+        if control_response is not None:
+            raise ValueError("Only one of CONTROL_RESPONSE and BLANK_STIMID can be given.")
+        c = response[np.isin(stimid, np.array(blank_stimid).flatten())]
+    elif control_response is not None:
+        control_response = np.array(control_response, dtype=float).reshape(len(stimid), -1)
+        c = np.broadcast_to(control_response, (len(stimid), M))
+        if controlstimnumber is not None:
+            controlstimnumber = np.array(controlstimnumber, dtype=float).flatten()
+            # findcontrolstimulus pads a partial last repetition, so CONTROLSTIMNUMBER
+            # can be longer than STIMID; only the first entries are used, as in
+            # stimulus_response_scalar
+            if len(controlstimnumber) < len(stimid):
+                raise ValueError("CONTROLSTIMNUMBER must have at least one entry per entry of STIMID.")
+            controlstimnumber = controlstimnumber[:len(stimid)]
+            has_control = ~np.isnan(controlstimnumber)
+            _, first = np.unique(controlstimnumber[has_control], return_index=True)
+            c = c[np.where(has_control)[0][np.sort(first)]]
+
+    if c is not None:
+        cgood = ~np.isnan(c)
+        cn = np.sum(cgood, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cmean = np.where(cn > 0, np.sum(np.where(cgood, c, 0), axis=0) / cn, np.nan)
+            cstd = np.where(cn > 1, np.sqrt(np.sum(np.where(cgood, c - cmean, 0) ** 2, axis=0) / (cn - 1)),
+                            np.where(cn == 1, 0, np.nan))
+            csem = cstd / np.sqrt(cn)
+
+    respstructs = []
+    for m in range(M):
+        rs = {
+            'curve': np.vstack([angles, mean[:, m], std[:, m], sem[:, m]]),
+            'ind': [b[:, m] for b in blocks],
+        }
+        if c is not None:
+            rs['blankresp'] = np.array([cmean[m], cstd[m], csem[m]])
+            rs['blankind'] = c[:, m]
+        respstructs.append(rs)
+
+    if population:
+        return respstructs
+    return respstructs[0]
@@ -1,2 +1,3 @@
 from .point2samplelabel import point2samplelabel
 from .samplelabel2point import samplelabel2point
+from .estimate_noise import estimate_noise
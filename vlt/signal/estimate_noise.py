@@ -0,0 +1,73 @@
+import numpy as np
+import vlt.file.custom_file_formats as cff
+
+def estimate_noise(vhsb, method='mad', sample_fraction=0.1, chunk_samples=10000, max_samples=1000000, percentile=99, seed=None):
+    """
+    ESTIMATE_NOISE - estimate the noise level of each channel of a VHSB file
+
+    NOISE = vlt.signal.estimate_noise(VHSB, [METHOD], ...)
+
+    Estimates a robust noise level for each channel of the VHLab series binary
+    file VHSB without reading the whole recording. Blocks of CHUNK_SAMPLES
+    consecutive samples are drawn at random (without replacement) from a
+    memory-mapped view of the file until SAMPLE_FRACTION of the recording (but no
+    more than MAX_SAMPLES samples) has been drawn, and the statistic is computed
+    on the drawn samples. The result can be used to choose the thresholds of
+    the DOTS passed to vlt.signal.dotdisc (e.g., -4 * NOISE).
+
+    Inputs:
+      VHSB is the filename of the VHSB file.
+      METHOD is the statistic to compute:
+        'mad'        | (default) the median absolute deviation from the median,
+                     |   divided by 0.6745 so that it estimates the standard
+                     |   deviation of Gaussian noise (Quiroga et al. 2004)
+        'percentile' | the PERCENTILE-th percentile of the samples
+
+    This function also takes name/value pairs that modify its behavior:
+    Parameter (default)         | Description
+    ------------------------------------------------------------------------
+    sample_fraction (0.1)       | Fraction of the recording to draw (0..1]
+    chunk_samples (10000)       | Number of consecutive samples in each block
+    max_samples (1000000)       | Maximum number of samples to draw
+    percentile (99)             | Percentile to use if METHOD is 'percentile'
+    seed (None)                 | Seed for the random block selection
+
+    NOISE is a vector with one value per channel.
+    """
+
+    method = method.lower()
+    if method not in ['mad', 'percentile']:
+        raise ValueError(f"Unknown method {method}; must be 'mad' or 'percentile'.")
+
+    y, h = cff.vhsb_memmap(vhsb)
+    N = y.shape[0]
+    if N == 0:
+        return np.full(y.shape[1], np.nan)
+
+    chunk_samples = int(max(1, min(chunk_samples, N)))
+    num_blocks = int(np.ceil(N / chunk_samples))
+    target = min(np.ceil(sample_fraction * N), max_samples)
+    blocks_to_draw = int(min(num_blocks, max(1, np.ceil(target / chunk_samples))))
+
+    rng = np.random.default_rng(seed)
+    # read blocks in file order so the reads are sequential
+    blocks = np.sort(rng.choice(num_blocks, size=blocks_to_draw, replace=False))
+
+    starts = blocks * chunk_samples
+    stops = np.minimum(starts + chunk_samples, N)
+    values = np.empty((int(np.sum(stops - starts)), y.shape[1]))
+    pos = 0
+    for start, stop in zip(starts, stops):
+        values[pos:pos + stop - start] = y[start:stop]
+        pos += stop - start
+
+    if h['Y_usescale']:
+        values = (values - h['Y_offset']) * h['Y_scale']
+
+    if method == 'mad':
+        med = np.median(values, axis=0)
+        noise = np.median(np.abs(values - med), axis=0) / 0.6745
+    else:
+        noise = np.percentile(values, percentile, axis=0)
+
+    return noise
@@ -1,2 +1,3 @@
 from .stderr import stderr
 from .hotellingt2test import hotellingt2test
+from .hotellingt2test_batch import hotellingt2test_batch
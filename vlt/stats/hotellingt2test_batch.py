@@ -0,0 +1,73 @@
+import numpy as np
+from scipy.stats import f, chi2
+
+def hotellingt2test_batch(X_stack, mu, alpha=0.05):
+    """
+    vlt.stats.hotellingt2test_batch - Hotelling T^2 test for many sets of multivariate samples
+
+    [H,P] = vlt.stats.hotellingt2test_batch(X_STACK,MU)
+    [H,P] = vlt.stats.hotellingt2test_batch(X_STACK,MU,ALPHA)
+
+    Performs vlt.stats.hotellingt2test on each of the C sets of samples in the CxNxP
+    array X_STACK, where X_STACK[c] holds N observations of P-dimensional data. Sets
+    with fewer observations can be padded with NaN: rows that contain a NaN are left
+    out of the test of their set. MU is the 1xP mean to be tested (or a CxP matrix of
+    means, one per set). ALPHA, the significance level, is 0.05 by default.
+
+    The means and covariances of all sets are computed at once, the covariances are
+    inverted with one batched inverse (sets whose covariance inv finds singular use
+    the pseudoinverse, as in hotellingt2test), and the P values of all sets are
+    computed with single calls to the F (fewer than 50 observations) or chi-square
+    (50 or more) survival functions.
+
+    H is a vector that is 1 for each set where the null hypothesis (that the mean of
+    the set is equal to MU) can be rejected at significance level ALPHA. P is a
+    vector of the actual P values; it is NaN for sets with no more observations than
+    dimensions.
+    """
+
+    X = np.array(X_stack, dtype=float)
+    if X.ndim == 2:
+        X = X[np.newaxis]
+    C, N, p = X.shape
+    mu = np.broadcast_to(np.array(mu, dtype=float).reshape(-1, p), (C, p))
+
+    valid = ~np.any(np.isnan(X), axis=2) # C x N
+    n = np.sum(valid, axis=1)
+    Xz = np.where(valid[:, :, np.newaxis], X, 0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        m = np.sum(Xz, axis=1) / n[:, np.newaxis]
+        centered = np.where(valid[:, :, np.newaxis], X - m[:, np.newaxis, :], 0)
+        S = np.einsum('cni,cnj->cij', centered, centered) / (n - 1)[:, np.newaxis, np.newaxis]
+
+    diff = m - mu
+    testable = n > p
+
+    # inverses of the covariances as in hotellingt2test: inv, or pinv for the sets
+    # whose covariance inv finds singular
+    invS = np.full((C, p, p), np.nan)
+    idx = np.where(testable)[0]
+    try:
+        invS[idx] = np.linalg.inv(S[idx])
+    except np.linalg.LinAlgError:
+        for c in idx:
+            try:
+                invS[c] = np.linalg.inv(S[c])
+            except np.linalg.LinAlgError:
+                invS[c] = np.linalg.pinv(S[c])
+
+    x = np.einsum('cij,cj->ci', invS, diff)
+
+    T2 = n * np.sum(diff * x, axis=1)
+
+    P = np.full(C, np.nan)
+    big = testable & (n >= 50) # Chi-square approximation
+    P[big] = chi2.sf(T2[big], p)
+    small = testable & (n < 50) # F approximation
+    nn = n[small]
+    F_stat = (nn - p) / ((nn - 1) * p) * T2[small]
+    P[small] = f.sf(F_stat, p, nn - p)
+
+    H = P < alpha
+    return H, P